@@ -0,0 +1,138 @@
+# --- BARISTA DISPLAY ---
+# Separate app for the bar/kitchen tablet. It connects to the POS order queue
+# (ORDER_QUEUE = True in script1.py) and shows open orders as they are checked
+# out. Tap a drink when it is made; BUMP clears the whole order. Every display
+# connected to the same POS sees the change at once.
+from functools import partial
+
+from kivy.clock import Clock
+from kivy.lang import Builder
+from kivy.properties import StringProperty
+from kivymd.app import MDApp
+from kivymd.uix.card import MDCard
+from kivymd.uix.list import OneLineListItem
+
+from pos_engine import item_label
+from pos_engine.config import ORDER_QUEUE_PORT
+from pos_engine.order_queue import OrderQueueClient
+
+# --- CONFIGURATION ---
+POS_HOST = '127.0.0.1'  # address of the tablet running the POS
+POS_PORT = ORDER_QUEUE_PORT
+
+# --- KV LAYOUT ---
+KV = '''
+MDBoxLayout:
+    orientation: 'vertical'
+
+    MDTopAppBar:
+        id: toolbar
+        title: "Orders"
+        elevation: 10
+
+    ScrollView:
+        do_scroll_x: False
+        MDGridLayout:
+            id: order_grid
+            cols: 3
+            adaptive_height: True
+            spacing: "10dp"
+            padding: "10dp"
+
+<OrderCard>:
+    orientation: 'vertical'
+    adaptive_height: True
+    padding: "10dp"
+    spacing: "5dp"
+    elevation: 3
+    radius: [12]
+
+    MDLabel:
+        text: root.title
+        bold: True
+        font_style: "H6"
+        size_hint_y: None
+        height: "40dp"
+
+    MDBoxLayout:
+        id: item_box
+        orientation: 'vertical'
+        adaptive_height: True
+
+    MDRaisedButton:
+        text: "BUMP ORDER"
+        size_hint_x: 1
+        on_release: app.bump(root.order_id)
+'''
+
+
+class OrderCard(MDCard):
+    order_id = StringProperty()
+    title = StringProperty()
+
+    def show_items(self, order):
+        box = self.ids.item_box
+        box.clear_widgets()
+        self.rows = []
+        for index, item in enumerate(order["items"]):
+            row = OneLineListItem(on_release=partial(self.toggle, index))
+            self.rows.append(row)
+            box.add_widget(row)
+            self.show_item(index, item)
+
+    def show_item(self, index, item):
+        label = item_label(item)
+        self.rows[index].text = f"[s]{label}[/s]" if item["done"] else f"[b]{label}[/b]"
+
+    def toggle(self, index, *args):
+        app = MDApp.get_running_app()
+        order = app.client.queue.orders.get(self.order_id)
+        if order is None: return  # closed or bumped from another display before this tap
+        app.client.mark_done(self.order_id, index, not order["items"][index]["done"])
+
+
+class BaristaApp(MDApp):
+    cards = {}  # order id -> OrderCard
+
+    def build(self):
+        self.theme_cls.primary_palette = "Brown"
+        self.theme_cls.accent_palette = "Orange"
+        self.theme_cls.theme_style = "Light"
+        self.client = OrderQueueClient(POS_HOST, POS_PORT, self.on_change,
+                                       call_soon=lambda fn, *args: Clock.schedule_once(lambda dt: fn(*args), 0))
+        return Builder.load_string(KV)
+
+    def on_start(self):
+        self.client.start()
+
+    def on_stop(self):
+        self.client.stop()
+
+    def bump(self, order_id):
+        self.client.mark_done(order_id)
+
+    def add_card(self, order):
+        card = OrderCard(order_id=order["id"], title=f"Order #{order['id']}  {order['date'][-5:]}")
+        card.show_items(order)
+        self.cards[order["id"]] = card
+        self.root.ids.order_grid.add_widget(card)
+
+    def on_change(self, message):
+        # Pushed by the POS; only the card the message is about is touched
+        kind = message["type"]
+        if kind == "snapshot":
+            self.root.ids.order_grid.clear_widgets()
+            self.cards = {}
+            for order in self.client.queue.orders.values(): self.add_card(order)
+        elif kind == "order":
+            self.add_card(message["order"])
+        elif kind == "item" and message["order"] in self.cards:
+            order = self.client.queue.orders[message["order"]]
+            self.cards[message["order"]].show_item(message["item"], order["items"][message["item"]])
+        elif kind == "closed" and message["order"] in self.cards:
+            self.root.ids.order_grid.remove_widget(self.cards.pop(message["order"]))
+        self.root.ids.toolbar.title = f"Orders ({len(self.client.queue.orders)})"
+
+
+if __name__ == '__main__':
+    BaristaApp().run()
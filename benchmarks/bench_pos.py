@@ -0,0 +1,225 @@
+# --- POS BENCHMARKS ---
+# Headless timings of the engine hot paths on synthetic shifts:
+#   load        PosEngine.open() on a shift that already holds N receipts
+#   cart        add_to_cart per line
+#   checkout    PosEngine.checkout() per sale (recipe deduction + durable receipt write)
+#   report      end-of-shift CSV for N receipts
+#   peak memory tracemalloc peak of load and report (separate pass, tracing skews timings)
+#
+#   python benchmarks/bench_pos.py                          # 100 .. 100k receipts, both backends
+#   python benchmarks/bench_pos.py --sizes 1000 --backend json --output bench.json
+#
+# Results go to stdout (or --output) as JSON; a short table is printed to stderr.
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pos_engine import PosEngine, DEFAULT_INVENTORY, DEFAULT_PRODUCTS, RECIPES
+from pos_engine import config
+from pos_engine.aggregates import ShiftAggregates
+from pos_engine.recipes import RecipeMatrix
+from pos_engine.storage import atomic_write_json, FSYNC_ALWAYS, FSYNC_BATCH, FSYNC_NEVER
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+LINES_PER_CART = [(1, 50), (2, 30), (3, 15), (4, 5)]  # (lines, weight %): most orders are one drink
+QTY_PER_LINE = [(1, 85), (2, 12), (3, 3)]
+STOCK_MULTIPLIER = 100000  # synthetic shifts never run out of anything
+
+
+# --- SYNTHETIC DATA ---
+def menu_skus():
+    return [(f"{name} {size}", price) for items in DEFAULT_PRODUCTS.values()
+            for name, sizes in items.items() for size, price in sizes.items()]
+
+
+def weighted(rng, table):
+    return rng.choices([v for v, _ in table], weights=[w for _, w in table])[0]
+
+
+def synthetic_cart(rng, skus):
+    lines = rng.sample(skus, weighted(rng, LINES_PER_CART))
+    return [(sku, price, weighted(rng, QTY_PER_LINE)) for sku, price in lines]
+
+
+def synthetic_receipts(rng, skus, count, first_id=1700000000, shift_hours=12):
+    # Spread evenly over one shift so the hourly buckets look like a real day
+    start = time.mktime((2024, 1, 1, 8, 0, 0, 0, 0, -1))
+    step = shift_hours * 3600 / max(count, 1)
+    for i in range(count):
+        items = [{"name": sku, "price": price, "qty": qty} for sku, price, qty in synthetic_cart(rng, skus)]
+        yield {"id": str(first_id + i), "date": time.strftime("%Y-%m-%d %H:%M", time.localtime(start + i * step)),
+               "total": sum(item['price'] * item['qty'] for item in items), "items": items}
+
+
+def write_shift(data_dir, receipts):
+    # Lay the shift down in the JSON format; the SQLite backend migrates it on first open
+    os.makedirs(data_dir)
+    inventory = {ing: qty * STOCK_MULTIPLIER for ing, qty in DEFAULT_INVENTORY.items()}
+    matrix = RecipeMatrix(RECIPES, inventory)
+    stats = ShiftAggregates.rebuild(receipts, matrix)
+    path = lambda name: os.path.join(data_dir, name)
+    atomic_write_json(path(config.INVENTORY_FILE), inventory)
+    atomic_write_json(path(config.SHIFT_START_FILE), inventory)
+    atomic_write_json(path(config.PRODUCTS_FILE), DEFAULT_PRODUCTS)
+    atomic_write_json(path(config.SHIFT_STATS_FILE), stats.to_dict())
+    atomic_write_json(path(config.RECEIPTS_FILE), receipts, indent=None)
+
+
+# --- MEASUREMENTS ---
+def percentiles(samples):
+    if not samples: return {}
+    ordered = sorted(samples)
+    pick = lambda p: ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+    return {"count": len(ordered), "mean_ms": statistics.fmean(ordered) * 1000, "p50_ms": pick(50) * 1000,
+            "p90_ms": pick(90) * 1000, "p99_ms": pick(99) * 1000, "max_ms": ordered[-1] * 1000}
+
+
+def open_engine(data_dir, args):
+    return PosEngine(data_dir=data_dir, backend=args.backend_name, write_behind_delay=args.write_behind_delay,
+                     receipt_fsync=args.fsync, compact_every=args.compact_every).open()
+
+
+def timed_open(data_dir, args):
+    t0 = time.perf_counter()
+    engine = open_engine(data_dir, args)
+    return engine, time.perf_counter() - t0
+
+
+def bench_size(size, args, workdir):
+    rng = random.Random(args.seed + size)
+    skus = menu_skus()
+    data_dir = os.path.join(workdir, f"{args.backend_name}_{size}")
+    t0 = time.perf_counter()
+    write_shift(data_dir, list(synthetic_receipts(rng, skus, size)))
+    result = {"receipts": size, "backend": args.backend_name, "setup_s": time.perf_counter() - t0}
+
+    # First open pays for the JSON -> SQLite migration; report it apart from the steady-state load
+    engine, result["first_open_s"] = timed_open(data_dir, args)
+    engine.close()
+    loads = []
+    for _ in range(args.repeat):
+        engine, elapsed = timed_open(data_dir, args)
+        loads.append(elapsed)
+        engine.close()
+    result["load_s"] = {"min": min(loads), "median": statistics.median(loads)}
+
+    engine = open_engine(data_dir, args)
+    cart_times, checkout_times = [], []
+    for _ in range(args.checkouts):
+        for sku, price, qty in synthetic_cart(rng, skus):
+            t0 = time.perf_counter()
+            engine.add_to_cart(sku, price, qty)
+            cart_times.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        engine.checkout()
+        checkout_times.append(time.perf_counter() - t0)
+    result["cart_add"] = percentiles(cart_times)
+    result["checkout"] = percentiles(checkout_times)
+    engine.flush()
+
+    # Keep the shift open for the memory pass: end_shift is measured on a copy
+    report_dir = data_dir + "_report"
+    shutil.copytree(data_dir, report_dir)
+    engine.close()
+    engine = open_engine(report_dir, args)
+    t0 = time.perf_counter()
+    engine.end_shift(background=False, compress=args.compress)
+    result["report_s"] = time.perf_counter() - t0
+    engine.close()
+
+    if args.memory:
+        tracemalloc.start()
+        engine = open_engine(data_dir, args)
+        result["load_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        engine.end_shift(background=False, compress=args.compress)
+        result["report_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        engine.close()
+
+    shutil.rmtree(data_dir, ignore_errors=True)
+    shutil.rmtree(report_dir, ignore_errors=True)
+    return result
+
+
+def environment():
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    try:
+        import sqlite3
+        sqlite_version = sqlite3.sqlite_version
+    except ImportError:
+        sqlite_version = None
+    return {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+            "cpus": os.cpu_count(), "numpy": numpy_version, "sqlite": sqlite_version}
+
+
+def print_table(results):
+    print(f"{'backend':8}{'receipts':>10}{'load ms':>10}{'p50 ms':>9}{'p99 ms':>9}{'report s':>10}{'peak MB':>9}",
+          file=sys.stderr)
+    for r in results:
+        peak = max(r.get("load_peak_bytes", 0), r.get("report_peak_bytes", 0)) / 1e6
+        print(f"{r['backend']:8}{r['receipts']:>10}{r['load_s']['median'] * 1000:>10.1f}"
+              f"{r['checkout']['p50_ms']:>9.2f}{r['checkout']['p99_ms']:>9.2f}{r['report_s']:>10.2f}{peak:>9.1f}",
+              file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the POS engine on synthetic shifts.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma separated receipt counts per shift")
+    parser.add_argument("--backend", choices=["sqlite", "json", "both"], default="both")
+    parser.add_argument("--checkouts", type=int, default=500, help="timed checkouts per shift size")
+    parser.add_argument("--repeat", type=int, default=3, help="timed loads per shift size")
+    parser.add_argument("--fsync", choices=[FSYNC_ALWAYS, FSYNC_BATCH, FSYNC_NEVER], default=config.RECEIPT_FSYNC)
+    parser.add_argument("--compact-every", type=int, default=config.RECEIPT_COMPACT_EVERY)
+    parser.add_argument("--write-behind-delay", type=float, default=config.WRITE_BEHIND_DELAY)
+    parser.add_argument("--compress", action="store_true", help="also gzip the report, as REPORT_COMPRESS does")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the tracemalloc pass")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workdir", help="where the synthetic shifts are written (default: a temp dir)")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    backends = ["sqlite", "json"] if args.backend == "both" else [args.backend]
+    workdir = args.workdir or tempfile.mkdtemp(prefix="pos_bench_")
+    results = []
+    try:
+        # Keep stdout clean for the JSON; the engine's own messages go to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            for backend in backends:
+                args.backend_name = backend
+                for size in sizes:
+                    print(f"{backend} {size} receipts...")
+                    results.append(bench_size(size, args, workdir))
+    finally:
+        if not args.workdir: shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), "environment": environment(),
+              "settings": {k: v for k, v in vars(args).items() if k not in ("output", "workdir", "backend_name")},
+              "results": results}
+    print_table(results)
+    if args.output:
+        with open(args.output, 'w') as f: json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+# --- UI BENCHMARKS ---
+# Runs the real CafeApp (script1.py + app.kv) and replays scripted cashier
+# sessions against it, driving the Kivy event loop one frame at a time:
+#   interactions  time from an action (tap, dialog pick, screen switch) to the end of the next frame
+#   frames        every frame drawn during the session; "dropped" = frames over 1.5x FRAME_BUDGET
+#
+# The app runs in a throwaway data dir holding a synthetic open shift, with the
+# frame cap lifted so frame times show work, not vsync. Needs a GL context: on a
+# desktop just run it; on a CI box or server use a virtual display, or SDL's
+# offscreen driver where Mesa's EGL is installed.
+#
+#   python benchmarks/bench_ui.py --output ui.json
+#   xvfb-run -a python benchmarks/bench_ui.py --session rush --repeat 5 --output ui.json
+#   SDL_VIDEODRIVER=offscreen python benchmarks/bench_ui.py --output ui.json
+#   python benchmarks/bench_ui.py --compare ui_main.json   # exit code 1 on a regression
+#
+# ui_baseline.json is the default run (mixed, 3 repeats, 2000 receipts) on a
+# single-CPU box with the offscreen driver and Mesa llvmpipe (software GL), where
+# drawing the window dominates every interaction. Compare against it only on the
+# same kind of setup; on real hardware record your own baseline first.
+#
+# Sessions are lists of steps, either one of SESSIONS below or a JSON file:
+#   ["category", "HOT COFFEE"]        tap a category card
+#   ["size", "Cafe Latte", "12oz"]    tap a product card, then a size in the dialog
+#   ["cart", 0, 1]                    +1 / -1 on the n-th cart line
+#   ["checkout"]                      ["back"] (to the category grid)
+#   ["screen", "receipts"]            toolbar button; "pos" returns to the till
+#   ["edit_mode", 60]                 toggle edit mode and keep the cards shaking for N frames
+#   ["scroll", "receipts"]            load the next page of the sales history
+#   ["quick", "2x cl12"]              type into the quick-entry field, then press Enter
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pos import environment, menu_skus, percentiles, synthetic_receipts, write_shift
+
+SESSIONS = {
+    # A morning rush: several drinks per order, a correction, checkout, repeat
+    "rush": [
+        ["category", "HOT COFFEE"], ["size", "Cafe Latte", "12oz"], ["size", "Americano", "16oz"],
+        ["cart", 0, 1], ["cart", 1, -1], ["back"], ["category", "ICED COFFEE"],
+        ["size", "Iced Latte", "16oz"], ["checkout"],
+        ["back"], ["category", "HOT COFFEE"], ["size", "Cappuccino", "12oz"], ["size", "Cappuccino", "12oz"],
+        ["checkout"], ["back"],
+    ],
+    # The back-office round: every secondary screen, history paging and edit mode
+    "admin": [
+        ["screen", "inventory"], ["screen", "pos"], ["screen", "dashboard"], ["screen", "pos"],
+        ["screen", "receipts"], ["scroll", "receipts"], ["scroll", "receipts"], ["screen", "pos"],
+        ["screen", "admin"], ["screen", "pos"], ["category", "HOT COFFEE"], ["edit_mode", 60], ["edit_mode", 10],
+        ["back"],
+    ],
+}
+# The rush order again, keyed in as quick codes instead of taps
+SESSIONS["quick"] = [
+    ["quick", "cl12"], ["quick", "a16"], ["cart", 0, 1], ["cart", 1, -1], ["quick", "il16"], ["checkout"],
+    ["quick", "2x c12"], ["checkout"],
+]
+SESSIONS["mixed"] = SESSIONS["rush"] + SESSIONS["admin"]
+
+
+# --- APP SETUP ---
+def prepare_kivy(width, height):
+    # Must run before anything imports kivy.core.window
+    os.environ.setdefault("KIVY_NO_ARGS", "1")
+    os.environ.setdefault("KIVY_LOG_MODE", "MIXED")  # keep sys.stderr: the table and any traceback go there
+    os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+    os.environ.setdefault("KIVY_NO_FILELOG", "1")
+    from kivy.config import Config
+    Config.set('graphics', 'maxfps', '0')  # no frame cap: measure work, not vsync
+    Config.set('graphics', 'width', str(width))
+    Config.set('graphics', 'height', str(height))
+    Config.set('kivy', 'exit_on_escape', '0')
+
+
+class Driver:
+    # Owns the app and the event loop; every step is timed through act()
+    def __init__(self, app, settle_frames, frame_budget):
+        from kivy.base import EventLoop
+        self.app = app
+        self.loop = EventLoop
+        self.settle_frames = settle_frames
+        self.frame_budget = frame_budget
+        self.latencies = {}  # step kind -> [seconds]
+        self.frames = []     # seconds per frame
+        self.step_frames = {}  # step kind -> [seconds per frame while it settled]
+
+    def frame(self, kind=None):
+        t0 = time.perf_counter()
+        self.loop.idle()
+        elapsed = time.perf_counter() - t0
+        self.frames.append(elapsed)
+        if kind: self.step_frames.setdefault(kind, []).append(elapsed)
+        return elapsed
+
+    def advance(self, count, kind=None):
+        for _ in range(count): self.frame(kind)
+
+    def act(self, kind, action, settle=None):
+        t0 = time.perf_counter()
+        result = action()
+        self.frame(kind)
+        self.latencies.setdefault(kind, []).append(time.perf_counter() - t0)
+        self.advance((self.settle_frames if settle is None else settle) - 1, kind)
+        return result
+
+    def open_dialog(self):
+        from kivy.core.window import Window
+        from kivy.uix.modalview import ModalView
+        return next((w for w in Window.children if isinstance(w, ModalView)), None)
+
+    # --- STEPS ---
+    def run_step(self, step):
+        kind, args = step[0], step[1:]
+        app = self.app
+        if kind == "category":
+            self.act("category", lambda: app.load_products_for_category(args[0]))
+        elif kind == "back":
+            self.act("back", app.load_category_menu)
+        elif kind == "size":
+            name, size = args
+            card = app.product_cards[name]
+            self.act("size_dialog", lambda: card.dispatch('on_release'))
+            dialog = self.open_dialog()
+            if dialog is None: raise RuntimeError(f"No size dialog for {name}")
+            button = next(b for b in dialog.walk() if getattr(b, "text", "").startswith(f"{size} -"))
+            self.act("size_pick", lambda: button.dispatch('on_release'))
+        elif kind == "cart":
+            index, delta = args
+            lines = list(app.engine.cart.lines.values())
+            if index < len(lines): self.act("cart_edit", lambda: app.change_cart_qty(lines[index].line_id, delta))
+        elif kind == "checkout":
+            self.act("checkout", app.checkout)
+        elif kind == "screen":
+            name = args[0]
+            self.act(f"screen_{name}", (lambda: setattr(app.root, 'current', 'pos')) if name == "pos"
+                     else (lambda: app.show_screen(name)))
+        elif kind == "scroll":
+            screen = app.get_screen(args[0])
+            self.act("receipts_page", screen.load_more)
+        elif kind == "quick":
+            field = app.root.get_screen('pos').ids.quick_entry
+            self.act("quick_type", lambda: setattr(field, 'text', args[0]))
+            self.act("quick_add", app.quick_add)
+        elif kind == "edit_mode":
+            self.act("edit_mode", app.toggle_edit_mode, settle=args[0] if args else None)
+        else:
+            raise ValueError(f"Unknown session step: {step}")
+
+
+def load_session(name):
+    if name in SESSIONS: return SESSIONS[name]
+    with open(name) as f: return json.load(f)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(args, workdir):
+    # The app keeps its data in the working directory; give it a synthetic open shift
+    rng = random.Random(args.seed)
+    data_dir = os.path.join(workdir, "data")
+    write_shift(data_dir, list(synthetic_receipts(rng, menu_skus(), args.receipts)))
+    shutil.copy(os.path.join(ROOT, "Placeholder.png"), data_dir)
+    os.chdir(data_dir)
+
+    prepare_kivy(args.width, args.height)
+    import script1
+
+    from kivy.base import runTouchApp
+    app = script1.CafeApp()
+    t0 = time.perf_counter()
+    app._run_prepare()  # what App.run() does before its loop: build, window, on_start
+    runTouchApp(embedded=True)  # start the event loop without blocking; frames are drawn by Driver
+    driver = Driver(app, args.settle_frames, script1.FRAME_BUDGET)
+    driver.advance(1)
+    startup = time.perf_counter() - t0
+    driver.advance(args.warmup_frames)  # menu prebuild, thumbnails
+    driver.frames.clear()
+
+    session = load_session(args.session)
+    for _ in range(args.repeat):
+        for step in session: driver.run_step(step)
+    app.stop()
+
+    dropped = sum(1 for f in driver.frames if f > driver.frame_budget * 1.5)
+    return {"startup_s": startup,
+            "interactions": {kind: percentiles(samples) for kind, samples in sorted(driver.latencies.items())},
+            "step_frames": {kind: percentiles(samples) for kind, samples in sorted(driver.step_frames.items())},
+            "frames": dict(percentiles(driver.frames), dropped=dropped, budget_ms=driver.frame_budget * 1000)}
+
+
+# --- REPORTING ---
+def print_table(results):
+    print(f"{'interaction':<22}{'n':>6}{'p50 ms':>9}{'p90 ms':>9}{'max ms':>9}", file=sys.stderr)
+    for kind, p in results["interactions"].items():
+        print(f"{kind:<22}{p['count']:>6}{p['p50_ms']:>9.1f}{p['p90_ms']:>9.1f}{p['max_ms']:>9.1f}", file=sys.stderr)
+    f = results["frames"]
+    print(f"frames: {f['count']} drawn, p50 {f['p50_ms']:.1f}ms, p99 {f['p99_ms']:.1f}ms, {f['dropped']} over budget",
+          file=sys.stderr)
+
+
+def compare(results, baseline, tolerance):
+    # p90 latency per interaction (and frame p99) against an earlier run; returns the regressions
+    regressions = []
+    pairs = [(kind, p["p90_ms"], baseline["interactions"].get(kind, {}).get("p90_ms"))
+             for kind, p in results["interactions"].items()]
+    pairs.append(("frames p99", results["frames"]["p99_ms"], baseline["frames"].get("p99_ms")))
+    print(f"{'':<22}{'base ms':>9}{'now ms':>9}{'change':>9}", file=sys.stderr)
+    for kind, now, base in pairs:
+        if not base: continue
+        change = now / base - 1
+        flag = "  <-- slower" if change > tolerance else ""
+        print(f"{kind:<22}{base:>9.1f}{now:>9.1f}{change:>+9.0%}{flag}", file=sys.stderr)
+        if flag: regressions.append(kind)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay scripted cashier sessions against the POS UI.")
+    parser.add_argument("--session", default="mixed", help=f"one of {', '.join(SESSIONS)} or a JSON file")
+    parser.add_argument("--repeat", type=int, default=3, help="times the session is played")
+    parser.add_argument("--receipts", type=int, default=2000, help="receipts already in the shift")
+    parser.add_argument("--settle-frames", type=int, default=8, help="frames drawn after every step")
+    parser.add_argument("--warmup-frames", type=int, default=120)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=800)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", help="earlier results JSON; exit with 1 if a p90 got slower than --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="pos_ui_bench_")
+    try:
+        with contextlib.redirect_stdout(sys.stderr): results = run(args, workdir)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), "commit": git_commit(), "environment": environment(),
+              "settings": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+              "results": results}
+    print_table(results)
+    if args.output:
+        with open(args.output, 'w') as f: json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as f: baseline = json.load(f)["results"]
+        if compare(results, baseline, args.tolerance): sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,7 +9,7 @@ source.include_exts = py,png,jpg,kv,atlas
 version = 0.1
 
 # Important: use Kivy 2.2.1 for Android stable builds
-requirements = python3,kivy==2.2.1,kivymd,pillow
+requirements = python3,kivy==2.2.1,kivymd,pillow,sqlite3
 
 # Force kivymd to use AndroidX-compatible dependencies
 android.gradle_dependencies = androidx.appcompat:appcompat:1.6.1
@@ -0,0 +1,157 @@
+import os
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from kivy.clock import Clock
+from kivy.core.image import Image as CoreImage
+from kivy.graphics.texture import Texture
+
+from pos_engine.metrics import timed
+
+# --- IMAGE LIBRARY CHECK ---
+# Pillow is imported on first use so it stays off the startup path
+PILImage = ImageOps = None
+_pil_checked = False
+
+
+def _pil():
+    global PILImage, ImageOps, _pil_checked
+    if not _pil_checked:
+        _pil_checked = True
+        try:
+            from PIL import Image as PILImage, ImageOps
+        except ImportError:
+            print("Pillow library not found. Images will not be resized.")
+    return PILImage
+
+
+# --- TEXTURE CACHE ---
+class TextureCache:
+    # LRU of GPU textures capped by (approximate) memory, shared by every card
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._items = OrderedDict()  # key -> (texture, nbytes)
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None: return None
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key, texture, nbytes):
+        if key in self._items: self.used -= self._items.pop(key)[1]
+        self._items[key] = (texture, nbytes)
+        self.used += nbytes
+        while self.used > self.max_bytes and len(self._items) > 1:
+            self.used -= self._items.popitem(last=False)[1][1]
+
+
+# --- THUMBNAILS ---
+def make_thumbnail(source, dest, size):
+    # Crop/scale to exactly `size` so the card can draw it 1:1
+    with PILImage.open(source) as img:
+        ImageOps.fit(img.convert('RGBA'), size, PILImage.LANCZOS).save(dest, "PNG")
+
+
+class ThumbnailLoader:
+    # Decoding and resizing run on a small worker pool; only the texture upload
+    # (which must happen on the GL thread) is scheduled back onto the Kivy clock.
+    # Callers get a flat placeholder texture immediately and the real one later.
+    def __init__(self, thumb_dir, size, max_bytes=32 * 1024 * 1024, workers=2):
+        self.thumb_dir = thumb_dir
+        self.size = (int(size[0]), int(size[1]))
+        self.cache = TextureCache(max_bytes)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+        self._waiting = {}  # cache key -> callbacks waiting for that texture
+        self.placeholder = Texture.create(size=(1, 1), colorfmt='rgba')
+        self.placeholder.blit_buffer(bytes([230, 230, 230, 255]), colorfmt='rgba', bufferfmt='ubyte')
+        if not os.path.exists(thumb_dir): os.makedirs(thumb_dir)
+
+    def _key(self, source):
+        # mtime in the key: re-uploading an image under the same name reloads it
+        try:
+            return source, os.path.getmtime(source)
+        except OSError:
+            return None
+
+    def thumb_path(self, source):
+        w, h = self.size
+        stem = os.path.splitext(os.path.basename(source))[0]
+        return os.path.join(self.thumb_dir, f"{stem}_{w}x{h}.png")
+
+    def load(self, source, callback):
+        key = self._key(source)
+        texture = self.cache.get(key) if key else None
+        if texture is not None: return callback(texture)
+        callback(self.placeholder)
+        if key is None: return
+        if key in self._waiting:
+            self._waiting[key].append(callback)
+            return
+        self._waiting[key] = [callback]
+        if _pil() is None:
+            # No Pillow: Kivy decodes on the main thread, at least only once per image
+            Clock.schedule_once(lambda dt: self._finish_core(key), 0)
+        else:
+            self.pool.submit(self._decode, key)
+
+    @timed("image_decode")
+    def _decode(self, key):
+        source = key[0]
+        try:
+            with PILImage.open(source) as img: exact = img.size == self.size
+            path = source
+            if not exact:
+                path = self.thumb_path(source)
+                if not os.path.exists(path) or os.path.getmtime(path) < key[1]:
+                    make_thumbnail(source, path, self.size)
+            with PILImage.open(path) as img:
+                img = img.convert('RGBA')
+                size, data = img.size, img.tobytes()
+        except Exception as e:
+            print(f"Could not load image {source}: {e}")
+            Clock.schedule_once(lambda dt: self._waiting.pop(key, None), 0)
+            return
+        Clock.schedule_once(lambda dt: self._finish(key, size, data), 0)
+
+    @timed("image_upload")
+    def _finish(self, key, size, data):
+        texture = Texture.create(size=size, colorfmt='rgba')
+        texture.blit_buffer(data, colorfmt='rgba', bufferfmt='ubyte')
+        texture.flip_vertical()
+        self._deliver(key, texture, len(data))
+
+    @timed("image_decode_core")
+    def _finish_core(self, key):
+        try:
+            texture = CoreImage(key[0]).texture
+        except Exception as e:
+            print(f"Could not load image {key[0]}: {e}")
+            self._waiting.pop(key, None)
+            return
+        self._deliver(key, texture, texture.width * texture.height * 4)
+
+    def _deliver(self, key, texture, nbytes):
+        self.cache.put(key, texture, nbytes)
+        for callback in self._waiting.pop(key, []): callback(texture)
+
+    def save_product_image(self, source, dest_stem, on_done, on_error):
+        # Store the uploaded picture already at card resolution, off the UI thread
+        def work():
+            try:
+                if _pil() is None:
+                    dest = dest_stem + os.path.splitext(source)[1]
+                    shutil.copy(source, dest)
+                else:
+                    dest = dest_stem + ".png"
+                    make_thumbnail(source, dest, self.size)
+            except Exception as e:
+                Clock.schedule_once(lambda dt, error=e: on_error(error), 0)
+                return
+            Clock.schedule_once(lambda dt: on_done(dest), 0)
+        self.pool.submit(work)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
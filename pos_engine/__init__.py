@@ -0,0 +1,6 @@
+from .catalog import UNIT_SIZES, DEFAULT_INVENTORY, DEFAULT_PRODUCTS, RECIPES
+from .cart import Cart, CartLine, item_label
+from .engine import PosEngine, PosError, EventEmitter
+
+__all__ = ["PosEngine", "PosError", "EventEmitter", "Cart", "CartLine", "item_label",
+           "UNIT_SIZES", "DEFAULT_INVENTORY", "DEFAULT_PRODUCTS", "RECIPES"]
@@ -0,0 +1,95 @@
+# --- SHIFT AGGREGATES ---
+class ShiftAggregates:
+    # Running totals for the current shift. record() only touches the lines of
+    # one receipt and the ingredients it used, so nothing ever re-scans the
+    # receipt history to answer "how are we doing".
+    def __init__(self):
+        self.tickets = 0
+        self.revenue = 0
+        self.units = {}        # sku -> units sold
+        self.sku_revenue = {}  # sku -> revenue
+        self.hourly = {}       # "YYYY-mm-dd HH" -> [tickets, revenue]
+        self.ingredients = {}  # ingredient -> raw amount used (g / ml / pcs)
+        self.cost = 0          # cost of goods sold
+        self.sku_cost = {}     # sku -> cost of goods sold
+
+    def record(self, receipt, usage, unit_costs=None):
+        # unit_costs: sku -> cost of one (MarginEngine.unit_costs); without it costs stay as they are
+        self.tickets += 1
+        self.revenue += receipt['total']
+        for item in receipt['items']:
+            sku, qty = item['name'], item.get('qty', 1)
+            self.units[sku] = self.units.get(sku, 0) + qty
+            self.sku_revenue[sku] = self.sku_revenue.get(sku, 0) + item['price'] * qty
+            if unit_costs is not None:
+                cost = unit_costs.get(sku, 0) * qty
+                self.cost += cost
+                self.sku_cost[sku] = self.sku_cost.get(sku, 0) + cost
+        bucket = self.hourly.setdefault(receipt['date'][:13], [0, 0])
+        bucket[0] += 1
+        bucket[1] += receipt['total']
+        for ing, amt in usage.items(): self.ingredients[ing] = self.ingredients.get(ing, 0) + amt
+
+    @property
+    def average_ticket(self):
+        return self.revenue / self.tickets if self.tickets else 0
+
+    @property
+    def margin(self):
+        return self.revenue - self.cost
+
+    @property
+    def margin_rate(self):
+        return self.margin / self.revenue if self.revenue else 0
+
+    def top_products(self):
+        return sorted(self.units.items(), key=lambda kv: (-kv[1], kv[0]))
+
+    def to_dict(self):
+        return {"tickets": self.tickets, "revenue": self.revenue, "units": dict(self.units),
+                "sku_revenue": dict(self.sku_revenue), "hourly": {k: list(v) for k, v in self.hourly.items()},
+                "ingredients": dict(self.ingredients), "cost": self.cost, "sku_cost": dict(self.sku_cost)}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.tickets = data.get("tickets", 0)
+        stats.revenue = data.get("revenue", 0)
+        stats.units = dict(data.get("units", {}))
+        stats.sku_revenue = dict(data.get("sku_revenue", {}))
+        stats.hourly = {k: list(v) for k, v in data.get("hourly", {}).items()}
+        stats.ingredients = dict(data.get("ingredients", {}))
+        stats.cost = data.get("cost", 0)
+        stats.sku_cost = dict(data.get("sku_cost", {}))
+        return stats
+
+    @classmethod
+    def rebuild(cls, receipts, recipe_matrix, margins=None):
+        # One pass over the stored receipts, used when saved totals are missing
+        # or behind (e.g. the app died before they were written)
+        stats = cls()
+        for r in receipts:
+            counts = {}
+            for item in r['items']: counts[item['name']] = counts.get(item['name'], 0) + item.get('qty', 1)
+            stats.record(r, recipe_matrix.usage(counts), margins.unit_costs(r) if margins else None)
+        return stats
+
+    def summary_rows(self, unit_sizes):
+        # Rows for the end-of-shift CSV, straight from the running totals
+        rows = [["SHIFT SUMMARY"],
+                ["Receipts", self.tickets],
+                ["Revenue", self.revenue],
+                ["Average Ticket", f"{self.average_ticket:.2f}"],
+                ["Cost of Goods", f"{self.cost:.2f}"],
+                ["Gross Margin", f"{self.margin:.2f}"],
+                ["Margin %", f"{self.margin_rate * 100:.1f}"],
+                [],
+                ["SALES BY ITEM", "Units", "Revenue", "Cost", "Margin"]]
+        for sku, qty in self.top_products():
+            revenue, cost = self.sku_revenue.get(sku, 0), self.sku_cost.get(sku, 0)
+            rows.append([sku, qty, revenue, f"{cost:.2f}", f"{revenue - cost:.2f}"])
+        rows += [[], ["SALES BY HOUR", "Receipts", "Revenue"]]
+        rows += [[hour + ":00", n, rev] for hour, (n, rev) in sorted(self.hourly.items())]
+        rows += [[], ["INGREDIENT USAGE", "Used (Units)"]]
+        rows += [[ing, f"{amt / unit_sizes.get(ing, 1):.2f}"] for ing, amt in self.ingredients.items()]
+        return rows
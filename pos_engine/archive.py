@@ -0,0 +1,268 @@
+# --- SALES ARCHIVE ---
+# Every closed shift is kept as one compact binary file next to its CSV report,
+# so weeks and months of sales can be rolled up without re-reading any text.
+#
+# File layout:  MAGIC | header length (uint32 LE) | header JSON | zlib column blobs
+#   receipt columns  minute (int64, wall-clock minutes since 1970), total (float64), ids (utf-8, "\n" joined)
+#   line columns     receipt (uint32 row in the receipt columns), sku (uint16 code into header "skus"),
+#                    qty (uint16), price (float64), cost (float64 cost of one at checkout, NaN if unknown;
+#                    version 2 on, older files have no cost column)
+# The header also carries the shift's first/last minute, so a range query skips
+# files without opening their columns.
+import calendar
+import json
+import math
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from datetime import date
+
+from .recipes import RecipeMatrix, _numpy
+
+MAGIC = b"POSARC1\n"
+SUFFIX = ".posa"
+COLUMNS = {"minute": "q", "total": "d", "ids": "s", "receipt": "I", "sku": "H", "qty": "H", "price": "d",
+           "cost": "d"}
+NUMPY_TYPES = {"q": "i8", "d": "f8", "I": "u4", "H": "u2"}
+PARALLEL_MIN_SHIFTS = 64  # below this a process pool costs more than it saves
+
+
+def to_minute(date_text):
+    # "YYYY-mm-dd HH:MM" (local wall clock) -> minutes since 1970, no timezone maths
+    return calendar.timegm(time.strptime(date_text, "%Y-%m-%d %H:%M")) // 60
+
+
+def minute_text(minute):
+    return time.strftime("%Y-%m-%d %H:%M", time.gmtime(minute * 60))
+
+
+def period_key(day_number, group):
+    if group is None: return "all"
+    day = date.fromordinal(day_number + date(1970, 1, 1).toordinal())
+    if group == "day": return day.isoformat()
+    if group == "week":
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+    if group == "month": return f"{day.year}-{day.month:02d}"
+    raise ValueError(f"Unknown rollup group: {group}")
+
+
+# --- WRITING ---
+def write_shift_archive(path, receipts, shift=None):
+    skus, sku_codes, minutes = [], {}, {}
+    cols = {name: array(code) for name, code in COLUMNS.items() if code != "s"}
+    ids = []
+    for row, r in enumerate(receipts):
+        minute = minutes.get(r['date'])
+        if minute is None: minute = minutes[r['date']] = to_minute(r['date'])
+        cols["minute"].append(minute)
+        cols["total"].append(r['total'])
+        ids.append(str(r['id']))
+        for item in r['items']:
+            code = sku_codes.get(item['name'])
+            if code is None:
+                code = sku_codes[item['name']] = len(skus)
+                skus.append(item['name'])
+            cols["receipt"].append(row)
+            cols["sku"].append(code)
+            cols["qty"].append(item.get('qty', 1))
+            cols["price"].append(item['price'])
+            cols["cost"].append(item.get('cost', math.nan))
+
+    blobs = {name: zlib.compress(col.tobytes(), 6) for name, col in cols.items()}
+    blobs["ids"] = zlib.compress("\n".join(ids).encode("utf-8"), 6)
+    header = {"version": 2, "shift": shift, "byteorder": sys.byteorder, "skus": skus,
+              "receipts": len(ids), "lines": len(cols["receipt"]), "revenue": sum(cols["total"]),
+              "first": min(cols["minute"]) if ids else None, "last": max(cols["minute"]) if ids else None,
+              "columns": [[name, COLUMNS[name], len(blobs[name])] for name in COLUMNS]}
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        for name in COLUMNS: f.write(blobs[name])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+# --- READING ---
+def read_header(f):
+    if f.read(len(MAGIC)) != MAGIC: raise ValueError("Not a sales archive file")
+    size, = struct.unpack("<I", f.read(4))
+    return json.loads(f.read(size))
+
+
+def read_columns(path, names=None, use_numpy=True):
+    # -> (header, {name: array or numpy array}); "ids" comes back as a list of str
+    np = _numpy() if use_numpy else None
+    with open(path, 'rb') as f:
+        header = read_header(f)
+        cols = {}
+        for name, code, size in header["columns"]:
+            if names is not None and name not in names:
+                f.seek(size, os.SEEK_CUR)
+                continue
+            raw = zlib.decompress(f.read(size))
+            if code == "s":
+                cols[name] = raw.decode("utf-8").split("\n") if raw else []
+                continue
+            order = "<" if header["byteorder"] == "little" else ">"
+            if np is not None:
+                cols[name] = np.frombuffer(raw, dtype=order + NUMPY_TYPES[code])
+            else:
+                col = array(code)
+                col.frombytes(raw)
+                if header["byteorder"] != sys.byteorder: col.byteswap()
+                cols[name] = col
+    return header, cols
+
+
+def iter_archived_receipts(path):
+    # Receipts back in the usual dict form (for search, refunds, re-exports)
+    header, cols = read_columns(path, use_numpy=False)
+    receipts = [{"id": rid, "date": minute_text(m), "total": t, "items": []}
+                for rid, m, t in zip(cols["ids"], cols["minute"], cols["total"])]
+    skus = header["skus"]
+    costs = cols["cost"] if "cost" in cols else [math.nan] * len(cols["receipt"])
+    for row, code, qty, price, cost in zip(cols["receipt"], cols["sku"], cols["qty"], cols["price"], costs):
+        item = {"name": skus[code], "price": price, "qty": qty}
+        if not math.isnan(cost): item["cost"] = cost
+        receipts[row]["items"].append(item)
+    return iter(receipts)
+
+
+# --- ROLLUPS ---
+def _empty_rollup():
+    return {"tickets": 0, "revenue": 0.0, "products": {}, "hours": {}}
+
+
+def _scan_shift(path, start, end, group):
+    # Partial rollup of one file: {period: {"tickets", "revenue", "products": {sku: [units, revenue]},
+    # "hours": {hour: [tickets, revenue]}}}. Top-level so a process pool can run it.
+    header, cols = read_columns(path, ["minute", "total", "receipt", "sku", "qty", "price"])
+    np, skus, out = _numpy(), header["skus"], {}
+    minute, total = cols["minute"], cols["total"]
+    if np is not None:
+        keep = np.ones(len(minute), dtype=bool)
+        if start is not None: keep &= minute >= start
+        if end is not None: keep &= minute <= end
+        days = minute // 1440
+        line_amount = cols["qty"] * cols["price"]
+        for day in np.unique(days[keep]):
+            rows = keep & (days == day)
+            part = out.setdefault(period_key(int(day), group), _empty_rollup())
+            part["tickets"] += int(rows.sum())
+            part["revenue"] += float(total[rows].sum())
+            hours = (minute[rows] // 60) % 24
+            tickets_by_hour = np.bincount(hours, minlength=24)
+            revenue_by_hour = np.bincount(hours, weights=total[rows], minlength=24)
+            for h in np.nonzero(tickets_by_hour)[0]:
+                bucket = part["hours"].setdefault(int(h), [0, 0.0])
+                bucket[0] += int(tickets_by_hour[h])
+                bucket[1] += float(revenue_by_hour[h])
+            lines = rows[cols["receipt"]]
+            codes = cols["sku"][lines]
+            units = np.bincount(codes, weights=cols["qty"][lines], minlength=len(skus))
+            revenue = np.bincount(codes, weights=line_amount[lines], minlength=len(skus))
+            for code in np.nonzero(units)[0]:
+                product = part["products"].setdefault(skus[code], [0, 0.0])
+                product[0] += int(units[code])
+                product[1] += float(revenue[code])
+        return out
+
+    periods = []
+    for m, t in zip(minute, total):
+        if (start is not None and m < start) or (end is not None and m > end):
+            periods.append(None)
+            continue
+        part = out.setdefault(period_key(m // 1440, group), _empty_rollup())
+        periods.append(part)
+        part["tickets"] += 1
+        part["revenue"] += t
+        bucket = part["hours"].setdefault((m // 60) % 24, [0, 0.0])
+        bucket[0] += 1
+        bucket[1] += t
+    for row, code, qty, price in zip(cols["receipt"], cols["sku"], cols["qty"], cols["price"]):
+        part = periods[row]
+        if part is None: continue
+        product = part["products"].setdefault(skus[code], [0, 0.0])
+        product[0] += qty
+        product[1] += qty * price
+    return out
+
+
+def _merge(total, partial):
+    for period, part in partial.items():
+        into = total.setdefault(period, _empty_rollup())
+        into["tickets"] += part["tickets"]
+        into["revenue"] += part["revenue"]
+        for key in ("products", "hours"):
+            for name, (a, b) in part[key].items():
+                bucket = into[key].setdefault(name, [0, 0.0])
+                bucket[0] += a
+                bucket[1] += b
+
+
+class SalesArchive:
+    def __init__(self, archive_dir, recipes=None):
+        self.archive_dir = archive_dir
+        self.recipe_matrix = RecipeMatrix(recipes) if recipes else None
+        if not os.path.exists(archive_dir): os.makedirs(archive_dir)
+
+    def shift_path(self, shift):
+        # A name no earlier shift has: one closed in the same minute gets "_2", then "_3"...
+        path, n = os.path.join(self.archive_dir, f"shift_{shift}{SUFFIX}"), 1
+        while os.path.exists(path):
+            n += 1
+            path = os.path.join(self.archive_dir, f"shift_{shift}_{n}{SUFFIX}")
+        return path
+
+    def archive_shift(self, receipts, shift):
+        return write_shift_archive(self.shift_path(shift), receipts, shift)
+
+    def shift_files(self, start=None, end=None):
+        # Archive files overlapping [start, end] (minutes), oldest first, using headers only
+        found = []
+        for name in os.listdir(self.archive_dir):
+            if not name.endswith(SUFFIX): continue
+            path = os.path.join(self.archive_dir, name)
+            with open(path, 'rb') as f: header = read_header(f)
+            if header["first"] is None: continue
+            if (start is not None and header["last"] < start) or (end is not None and header["first"] > end): continue
+            found.append((header["first"], path))
+        return [path for _, path in sorted(found)]
+
+    def iter_receipts(self, start=None, end=None):
+        for path in self.shift_files(start, end): yield from iter_archived_receipts(path)
+
+    def rollup(self, start=None, end=None, group=None, workers=None):
+        # Sales between two "YYYY-mm-dd HH:MM" dates (inclusive), per "day"/"week"/"month"
+        # or over the whole range (group=None -> key "all"). Each period has tickets,
+        # revenue, products {sku: [units, revenue]}, hours {hour of day: [tickets, revenue]}
+        # and ingredients {ingredient: amount} (from the current recipes).
+        start = to_minute(start) if start else None
+        end = to_minute(end) if end else None
+        paths = self.shift_files(start, end)
+        workers = workers or os.cpu_count() or 1
+        args = (paths, [start] * len(paths), [end] * len(paths), [group] * len(paths))
+        result = {}
+        partials = None
+        if workers > 1 and len(paths) >= PARALLEL_MIN_SHIFTS:
+            try:
+                # Imported here: multiprocessing is slow to load and missing on some platforms
+                from concurrent.futures import ProcessPoolExecutor
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    partials = list(pool.map(_scan_shift, *args, chunksize=max(1, len(paths) // (workers * 4))))
+            except (OSError, NotImplementedError, ImportError):
+                partials = None  # no process support (e.g. Android): scan in this process
+        if partials is None: partials = map(_scan_shift, *args)
+        for partial in partials: _merge(result, partial)
+        for part in result.values():
+            units = {sku: units for sku, (units, _) in part["products"].items()}
+            part["ingredients"] = self.recipe_matrix.usage(units) if self.recipe_matrix else {}
+        return dict(sorted(result.items()))
@@ -0,0 +1,67 @@
+import itertools
+
+
+def item_label(item):
+    # Receipt items saved before quantities existed have no "qty" (one per line)
+    qty = item.get('qty', 1)
+    return item['name'] if qty == 1 else f"{qty}x {item['name']}"
+
+
+class CartLine:
+    def __init__(self, line_id, sku, price, qty=0):
+        self.line_id = line_id
+        self.sku = sku
+        self.price = price
+        self.qty = qty
+
+    def to_item(self):
+        return {"name": self.sku, "price": self.price, "qty": self.qty}
+
+
+# --- CART ---
+class Cart:
+    # One line per SKU ("<product> <size>") with a quantity. Line ids are stable
+    # for the lifetime of the line so the UI can find its widget directly, and
+    # the total is adjusted on every change instead of re-summed.
+    def __init__(self):
+        self.lines = {}  # sku -> CartLine, in the order they were first added
+        self.by_id = {}  # line_id -> CartLine
+        self.total = 0
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def add(self, sku, price, qty=1):
+        line = self.lines.get(sku)
+        if line is None:
+            line = CartLine(next(self._ids), sku, price)
+            self.lines[sku] = line
+            self.by_id[line.line_id] = line
+        return self.change_qty(line.line_id, qty)
+
+    def remove(self, line_id, qty=1):
+        return self.change_qty(line_id, -qty)
+
+    def change_qty(self, line_id, delta):
+        # Returns the changed line; qty 0 means it has been dropped from the cart
+        line = self.by_id.get(line_id)
+        if line is None: return None
+        delta = max(delta, -line.qty)
+        line.qty += delta
+        self.total += line.price * delta
+        if line.qty == 0:
+            del self.lines[line.sku]
+            del self.by_id[line_id]
+        return line
+
+    def counts(self):
+        return {sku: line.qty for sku, line in self.lines.items()}
+
+    def items(self):
+        return [line.to_item() for line in self.lines.values()]
+
+    def clear(self):
+        self.lines.clear()
+        self.by_id.clear()
+        self.total = 0
@@ -0,0 +1,156 @@
+# --- CATALOG ---
+
+# Unit Conversion (Grams/ML per 1 Unit)
+UNIT_SIZES = {
+    "Beans": 1000,
+    "Milk": 1000,
+    "Biscoff Spread": 1000,
+    "Biscoff Crackers": 1000,
+    "Condense": 1000,
+    "Choco Sauce": 1000,
+    "White Choco Sauce": 1000,
+    "Caramel Sauce": 1000,
+    "Fructose": 1000,
+    "Whip Cream": 1000,
+    "Hazelnut Syrup": 750,
+    "Salted Caramel Syrup": 750,
+    "Strawberry Syrup": 750,
+    "Irish Cream Syrup": 750,
+    "Vanilla Syrup": 750,
+    "Caramel Syrup": 750,
+    "Butterscotch Syrup": 750
+}
+
+DEFAULT_INVENTORY = {
+    "12oz Cups Hot": 100, "16oz Cups Hot": 100, "16oz Cups Iced": 100, "22oz Cups Iced": 100,
+    "Strawless lid hot": 200, "Strawless lid iced": 200, "Dome lid": 100,
+    "Beans": 5000, "Milk": 10000, "Fructose": 2000, "Sugar": 1000, "Water": 5000,
+    "Condense": 2000, "Choco Sauce": 2000, "White Choco Sauce": 1000, "Caramel Sauce": 1000,
+    "Whip Cream": 500, "Cinnamon Powder": 100, "Biscoff Spread": 500,
+    "Hazelnut Syrup": 750, "Salted Caramel Syrup": 750, "Strawberry Syrup": 750,
+    "Irish Cream Syrup": 750, "Vanilla Syrup": 750, "Caramel Syrup": 750, "Butterscotch Syrup": 750,
+    "Biscoff Crackers": 1000
+}
+
+# Purchase cost per unit: per UNIT_SIZES unit (a 1kg bag, a 750ml bottle),
+# per piece for cups and lids, per gram/ml for the rest
+DEFAULT_COSTS = {
+    "12oz Cups Hot": 3.5, "16oz Cups Hot": 4.0, "16oz Cups Iced": 4.5, "22oz Cups Iced": 5.5,
+    "Strawless lid hot": 1.5, "Strawless lid iced": 1.5, "Dome lid": 2.0,
+    "Beans": 900, "Milk": 95, "Fructose": 120, "Sugar": 0.07, "Water": 0.002,
+    "Condense": 160, "Choco Sauce": 380, "White Choco Sauce": 420, "Caramel Sauce": 400,
+    "Whip Cream": 350, "Cinnamon Powder": 0.6, "Biscoff Spread": 850,
+    "Hazelnut Syrup": 450, "Salted Caramel Syrup": 450, "Strawberry Syrup": 450,
+    "Irish Cream Syrup": 450, "Vanilla Syrup": 450, "Caramel Syrup": 450, "Butterscotch Syrup": 450,
+    "Biscoff Crackers": 600
+}
+
+DEFAULT_PRODUCTS = {
+    "HOT COFFEE": {
+        "Americano": {"12oz": 60, "16oz": 70},
+        "Cafe Latte": {"12oz": 80, "16oz": 90},
+        "Cappuccino": {"12oz": 80, "16oz": 90},
+        "Caramel Macchiato": {"12oz": 90, "16oz": 100},
+        "Salted Caramel": {"12oz": 95, "16oz": 105},
+        "Spanish Latte": {"12oz": 90, "16oz": 100},
+        "Vietnamese": {"12oz": 85, "16oz": 95},
+        "Choko Hazelnut": {"12oz": 95, "16oz": 105},
+        "Kafe Mocha": {"12oz": 95, "16oz": 105},
+        "White Mocha": {"12oz": 95, "16oz": 105},
+    },
+    "ICED COFFEE": {
+        "Iced Americano": {"16oz": 70, "22oz": 80},
+        "Iced Latte": {"16oz": 90, "22oz": 100},
+        "Iced Cappuccino": {"16oz": 90, "22oz": 100},
+        "Iced Caramel Macchiato": {"16oz": 100, "22oz": 110},
+        "Iced Salted Caramel": {"16oz": 110, "22oz": 120},
+        "Iced Spanish Latte": {"16oz": 100, "22oz": 110},
+        "Iced Vietnamese": {"16oz": 95, "22oz": 105},
+        "Iced Shaken Hazelnut": {"16oz": 100, "22oz": 110},
+        "Biscoff Latte": {"16oz": 110, "22oz": 120},
+        "Ube Espresso": {"16oz": 110, "22oz": 120},
+        "Oreo Latte": {"16oz": 110, "22oz": 120},
+        "Strawberry Coffee": {"16oz": 105, "22oz": 115},
+    },
+    "FLAVORED COFFEE": {
+        "Buttered Scotch": {"12oz": 85, "16oz": 95, "22oz": 105},
+        "Hazelnut": {"12oz": 85, "16oz": 95, "22oz": 105},
+        "Vanilla": {"12oz": 85, "16oz": 95, "22oz": 105},
+    },
+    "NON-COFFEE DRINKS": {
+        "Iced Choco": {"16oz": 90, "22oz": 100},
+        "Strawberry Choco": {"16oz": 100, "22oz": 110},
+        "Oreo Blend": {"16oz": 100, "22oz": 110},
+        "Oreo Matcha": {"16oz": 110, "22oz": 120},
+        "Ube Matcha": {"16oz": 110, "22oz": 120},
+        "Oreo Ube": {"16oz": 110, "22oz": 120},
+    }
+}
+
+RECIPES = {
+    "Americano 12oz": {"Beans": 18, "Water": 200, "12oz Cups Hot": 1, "Strawless lid hot": 1},
+    "Americano 16oz": {"Beans": 36, "Water": 300, "16oz Cups Hot": 1, "Strawless lid hot": 1},
+    "Cafe Latte 12oz": {"Beans": 18, "Milk": 180, "12oz Cups Hot": 1, "Strawless lid hot": 1},
+    "Cafe Latte 16oz": {"Beans": 36, "Milk": 200, "16oz Cups Hot": 1, "Strawless lid hot": 1},
+    "Cappuccino 12oz": {"Beans": 18, "Milk": 150, "12oz Cups Hot": 1, "Strawless lid hot": 1},
+    "Cappuccino 16oz": {"Beans": 36, "Milk": 180, "16oz Cups Hot": 1, "Strawless lid hot": 1},
+    "Caramel Macchiato 12oz": {"Beans": 18, "Milk": 150, "Caramel Syrup": 20, "12oz Cups Hot": 1},
+    "Caramel Macchiato 16oz": {"Beans": 36, "Milk": 200, "Caramel Syrup": 30, "16oz Cups Hot": 1},
+    "Salted Caramel 12oz": {"Beans": 18, "Milk": 150, "Salted Caramel Syrup": 20, "12oz Cups Hot": 1},
+    "Salted Caramel 16oz": {"Beans": 36, "Milk": 200, "Salted Caramel Syrup": 30, "16oz Cups Hot": 1},
+    "Spanish Latte 12oz": {"Beans": 18, "Milk": 150, "Condense": 20, "12oz Cups Hot": 1},
+    "Spanish Latte 16oz": {"Beans": 36, "Milk": 200, "Condense": 30, "16oz Cups Hot": 1},
+    "Vietnamese 12oz": {"Beans": 18, "Water": 100, "Condense": 30, "12oz Cups Hot": 1},
+    "Vietnamese 16oz": {"Beans": 36, "Water": 150, "Condense": 40, "16oz Cups Hot": 1},
+    "Choko Hazelnut 12oz": {"Beans": 18, "Milk": 180, "Hazelnut Syrup": 15, "Choco Sauce": 15, "12oz Cups Hot": 1},
+    "Choko Hazelnut 16oz": {"Beans": 36, "Milk": 200, "Hazelnut Syrup": 20, "Choco Sauce": 20, "16oz Cups Hot": 1},
+    "Kafe Mocha 12oz": {"Beans": 18, "Milk": 180, "Choco Sauce": 20, "12oz Cups Hot": 1},
+    "Kafe Mocha 16oz": {"Beans": 36, "Milk": 200, "Choco Sauce": 30, "16oz Cups Hot": 1},
+    "White Mocha 12oz": {"Beans": 18, "Milk": 180, "White Choco Sauce": 20, "12oz Cups Hot": 1},
+    "White Mocha 16oz": {"Beans": 36, "Milk": 200, "White Choco Sauce": 30, "16oz Cups Hot": 1},
+    "Iced Americano 16oz": {"Beans": 36, "Water": 200, "16oz Cups Iced": 1, "Strawless lid iced": 1},
+    "Iced Americano 22oz": {"Beans": 36, "Water": 250, "22oz Cups Iced": 1, "Strawless lid iced": 1},
+    "Iced Latte 16oz": {"Beans": 36, "Milk": 200, "16oz Cups Iced": 1, "Strawless lid iced": 1},
+    "Iced Latte 22oz": {"Beans": 36, "Milk": 250, "22oz Cups Iced": 1, "Strawless lid iced": 1},
+    "Iced Cappuccino 16oz": {"Beans": 36, "Milk": 180, "16oz Cups Iced": 1, "Strawless lid iced": 1},
+    "Iced Cappuccino 22oz": {"Beans": 36, "Milk": 220, "22oz Cups Iced": 1, "Strawless lid iced": 1},
+    "Iced Caramel Macchiato 16oz": {"Beans": 36, "Milk": 200, "Caramel Syrup": 30, "16oz Cups Iced": 1},
+    "Iced Caramel Macchiato 22oz": {"Beans": 36, "Milk": 250, "Caramel Syrup": 40, "22oz Cups Iced": 1},
+    "Iced Salted Caramel 16oz": {"Beans": 36, "Milk": 200, "Salted Caramel Syrup": 30, "16oz Cups Iced": 1},
+    "Iced Salted Caramel 22oz": {"Beans": 36, "Milk": 250, "Salted Caramel Syrup": 40, "22oz Cups Iced": 1},
+    "Iced Spanish Latte 16oz": {"Beans": 36, "Milk": 200, "Condense": 30, "16oz Cups Iced": 1},
+    "Iced Spanish Latte 22oz": {"Beans": 36, "Milk": 250, "Condense": 40, "22oz Cups Iced": 1},
+    "Iced Vietnamese 16oz": {"Beans": 36, "Water": 150, "Condense": 40, "16oz Cups Iced": 1},
+    "Iced Vietnamese 22oz": {"Beans": 36, "Water": 200, "Condense": 50, "22oz Cups Iced": 1},
+    "Iced Shaken Hazelnut 16oz": {"Beans": 36, "Milk": 150, "Hazelnut Syrup": 20, "16oz Cups Iced": 1},
+    "Iced Shaken Hazelnut 22oz": {"Beans": 36, "Milk": 200, "Hazelnut Syrup": 30, "22oz Cups Iced": 1},
+    "Biscoff Latte 16oz": {"Beans": 36, "Milk": 200, "Biscoff Spread": 20, "16oz Cups Iced": 1},
+    "Biscoff Latte 22oz": {"Beans": 36, "Milk": 250, "Biscoff Spread": 30, "22oz Cups Iced": 1},
+    "Ube Espresso 16oz": {"Beans": 36, "Milk": 200, "16oz Cups Iced": 1},
+    "Ube Espresso 22oz": {"Beans": 36, "Milk": 250, "22oz Cups Iced": 1},
+    "Oreo Latte 16oz": {"Beans": 36, "Milk": 200, "16oz Cups Iced": 1},
+    "Oreo Latte 22oz": {"Beans": 36, "Milk": 250, "22oz Cups Iced": 1},
+    "Strawberry Coffee 16oz": {"Beans": 36, "Milk": 200, "Strawberry Syrup": 20, "16oz Cups Iced": 1},
+    "Strawberry Coffee 22oz": {"Beans": 36, "Milk": 250, "Strawberry Syrup": 30, "22oz Cups Iced": 1},
+    "Buttered Scotch 12oz": {"Beans": 18, "Milk": 150, "Butterscotch Syrup": 20, "12oz Cups Hot": 1},
+    "Buttered Scotch 16oz": {"Beans": 36, "Milk": 200, "Butterscotch Syrup": 30, "16oz Cups Hot": 1},
+    "Buttered Scotch 22oz": {"Beans": 36, "Milk": 250, "Butterscotch Syrup": 40, "22oz Cups Iced": 1},
+    "Hazelnut 12oz": {"Beans": 18, "Milk": 150, "Hazelnut Syrup": 20, "12oz Cups Hot": 1},
+    "Hazelnut 16oz": {"Beans": 36, "Milk": 200, "Hazelnut Syrup": 30, "16oz Cups Hot": 1},
+    "Hazelnut 22oz": {"Beans": 36, "Milk": 250, "Hazelnut Syrup": 40, "22oz Cups Iced": 1},
+    "Vanilla 12oz": {"Beans": 18, "Milk": 150, "Vanilla Syrup": 20, "12oz Cups Hot": 1},
+    "Vanilla 16oz": {"Beans": 36, "Milk": 200, "Vanilla Syrup": 30, "16oz Cups Hot": 1},
+    "Vanilla 22oz": {"Beans": 36, "Milk": 250, "Vanilla Syrup": 40, "22oz Cups Iced": 1},
+    "Iced Choco 16oz": {"Milk": 200, "Choco Sauce": 30, "16oz Cups Iced": 1},
+    "Iced Choco 22oz": {"Milk": 250, "Choco Sauce": 40, "22oz Cups Iced": 1},
+    "Oreo Blend 16oz": {"Milk": 200, "Vanilla Syrup": 10, "16oz Cups Iced": 1},
+    "Oreo Blend 22oz": {"Milk": 250, "Vanilla Syrup": 20, "22oz Cups Iced": 1},
+    "Strawberry Choco 16oz": {"Milk": 200, "Strawberry Syrup": 20, "Choco Sauce": 20, "16oz Cups Iced": 1},
+    "Strawberry Choco 22oz": {"Milk": 250, "Strawberry Syrup": 30, "Choco Sauce": 30, "22oz Cups Iced": 1},
+    "Oreo Matcha 16oz": {"Milk": 200, "16oz Cups Iced": 1},
+    "Oreo Matcha 22oz": {"Milk": 250, "22oz Cups Iced": 1},
+    "Ube Matcha 16oz": {"Milk": 200, "16oz Cups Iced": 1},
+    "Ube Matcha 22oz": {"Milk": 250, "22oz Cups Iced": 1},
+    "Oreo Ube 16oz": {"Milk": 200, "16oz Cups Iced": 1},
+    "Oreo Ube 22oz": {"Milk": 250, "22oz Cups Iced": 1},
+}
@@ -0,0 +1,45 @@
+from .storage import FSYNC_ALWAYS
+
+# --- FILE PATHS (relative to the engine's data_dir) ---
+INVENTORY_FILE = 'inventory.json'
+PRODUCTS_FILE = 'products.json'
+RECEIPTS_FILE = 'receipts.json'
+IMAGES_FILE = 'product_images.json'
+SHIFT_START_FILE = 'shift_start.json'
+SHIFT_STATS_FILE = 'shift_stats.json'
+COSTS_FILE = 'ingredient_costs.json'
+RECEIPT_JOURNAL_FILE = 'receipts.journal'
+DATABASE_FILE = 'cafe_pos.db'
+SYNC_OUTBOX_FILE = 'sync_outbox.jsonl'
+UPLOAD_OUTBOX_FILE = 'upload_outbox.jsonl'
+DEVICE_ID_FILE = 'device_id.json'  # this terminal's id for sync and upload
+ARCHIVE_DIR = 'archive'  # one compressed sales file per closed shift
+
+# --- STORAGE ---
+STORAGE_BACKEND = "sqlite"  # "sqlite" or "json"; the JSON files are migrated into SQLite once
+WRITE_BEHIND_DELAY = 0.5    # seconds; inventory/product/image saves within this window become one write
+
+# --- RECEIPT JOURNAL ---
+RECEIPT_FSYNC = FSYNC_ALWAYS  # "always", "batch" or "never"; SQLite: synchronous FULL / NORMAL / OFF
+RECEIPT_COMPACT_EVERY = 200   # fold the journal into receipts.json every N sales
+
+# --- LOW STOCK ---
+LOW_STOCK_DRINKS = 15  # alert when an ingredient is down to this many of the drink that uses most of it
+LOW_STOCK_LEVELS = {}  # ingredient -> raw amount (g/ml/pcs) that always counts as low, e.g. {"Milk": 2000}
+
+# --- MULTI-TERMINAL SYNC ---
+SYNC_PORT = 8765
+SYNC_BATCH_SIZE = 50        # queued sales/counts sent per message
+SYNC_FLUSH_INTERVAL = 0.5   # seconds between sends while the queue is not empty
+SYNC_RETRY_DELAY = 2.0      # seconds before reconnecting to an unreachable server
+
+# --- ORDER QUEUE ---
+ORDER_QUEUE_PORT = 8766  # barista/kitchen displays connect here
+
+# --- HEAD OFFICE UPLOAD ---
+UPLOAD_BATCH_SIZE = 200     # receipts/reports per POST
+UPLOAD_GATHER_DELAY = 5.0   # seconds to wait after a new item so a burst of sales goes as one batch
+UPLOAD_RETRY_BASE = 5.0     # seconds before the first retry; doubles per failed attempt
+UPLOAD_RETRY_MAX = 600.0    # longest wait between retries
+UPLOAD_TIMEOUT = 30.0       # seconds per request
+UPLOAD_SERVER_PORT = 8780   # local stand-in server (python -m pos_engine.upload_server)
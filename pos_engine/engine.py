@@ -0,0 +1,500 @@
+import copy
+import json
+import os
+import threading
+import traceback
+import uuid
+from datetime import datetime
+
+from . import config
+from .storage import JsonStorage, SqliteStorage, WriteBehindWriter, SQLITE_AVAILABLE, atomic_write_json
+from .recipes import RecipeMatrix
+from .cart import Cart
+from .reports import write_shift_report
+from .aggregates import ShiftAggregates
+from .receipt_index import ReceiptIndex, parse_query
+from .archive import SalesArchive, iter_archived_receipts
+from .stock_alerts import LowStockMonitor
+from .margins import MarginEngine
+from .menu_index import MenuIndex, split_quantity
+from .metrics import timed
+from .catalog import UNIT_SIZES, DEFAULT_INVENTORY, DEFAULT_PRODUCTS, DEFAULT_COSTS, RECIPES
+
+
+class PosError(Exception):
+    # An operation the POS refuses (empty cart, shift closing); the message is meant for the cashier
+    pass
+
+
+# --- EVENTS ---
+class EventEmitter:
+    def __init__(self):
+        self._handlers = {}
+
+    def bind(self, event, handler):
+        self._handlers.setdefault(event, []).append(handler)
+
+    def unbind(self, event, handler):
+        handlers = self._handlers.get(event, [])
+        if handler in handlers: handlers.remove(handler)
+
+    def emit(self, event, *args):
+        # A failing listener is logged and skipped: most events fire after the change
+        # is stored, and the operation that raised them (a checkout) must still finish
+        for handler in list(self._handlers.get(event, ())):
+            try:
+                handler(*args)
+            except Exception:
+                print(f"Error in {event} handler {getattr(handler, '__qualname__', handler)}:")
+                traceback.print_exc()
+
+
+# --- ENGINE ---
+class PosEngine(EventEmitter):
+    # Owns the shop state (inventory, menu, cart, shift) and every operation on it.
+    # No Kivy here: a UI binds to the events below and calls the methods.
+    #
+    # Events:
+    #   cart_changed(line)                   one cart line added/changed (qty 0 = removed)
+    #   cart_cleared()
+    #   sale(receipt, usage)                 after a sale is stored
+    #   stock_counted(item, raw_qty)         a hand count on this terminal
+    #   inventory_changed(items)             stock of these ingredients was set (count or sync)
+    #   availability_changed(capacity, skus) SKU -> drinks the stock can still make; skus: the ones that changed
+    #   low_stock(raised, cleared)           alerts that just went low / ingredients no longer low
+    #   prices_changed(changes)              [(cat, name, size, price)] saved together
+    #   costs_changed(items)                 ingredient costs were set
+    #   image_changed(name, path)
+    #   shift_started()
+    #   report_progress(done, total)         from end_shift, via call_soon
+    #   shift_closed(paths)                  report written and shift data cleared
+    #   report_failed(error)
+    #
+    # Events raised from the report thread go through `call_soon(fn, *args)`, which the
+    # UI points at its main loop; headless callers can leave the default (call directly).
+    def __init__(self, data_dir=".", backend=config.STORAGE_BACKEND, write_behind_delay=config.WRITE_BEHIND_DELAY,
+                 receipt_fsync=config.RECEIPT_FSYNC, compact_every=config.RECEIPT_COMPACT_EVERY, recipes=RECIPES,
+                 call_soon=None):
+        super().__init__()
+        self.data_dir = data_dir
+        self.backend = backend
+        self.write_behind_delay = write_behind_delay
+        self.receipt_fsync = receipt_fsync
+        self.compact_every = compact_every
+        self.recipes = recipes
+        self.call_soon = call_soon or (lambda fn, *args: fn(*args))
+        self.inventory = {}
+        self.shift_start = {}
+        self.products = {}
+        self.image_map = {}
+        self.costs = {}  # ingredient -> cost per purchase unit (see catalog.DEFAULT_COSTS)
+        self.margins = None  # per-SKU cost and margin cache
+        self.menu_index = None  # quick-code / type-ahead lookup over the menu
+        self.cart = Cart()
+        self.capacity = {}  # SKU -> drinks the current stock can still make
+        self.stats = ShiftAggregates()
+        self.receipt_index = None  # built on the first search, then kept current by record_sale
+        self._index_backlog = None  # sales recorded while the index is built in the background
+        self.archive_index = None  # closed shifts, built on the first search that needs them
+        self._archive_sources = {}  # archived receipt id -> archive file
+        self._archive_building = False
+        self.last_receipt = None  # id of the newest stored sale, saved with the stock figures
+        self.recipe_matrix = None
+        self.low_stock = None
+        self.storage = None
+        self.writer = None
+        self._unsaved_prices = set()  # (cat, name, size) edited since the last price write started
+        self.archive = None  # closed shifts, for week/month rollups
+        self.closing_shift = False  # report is being written; no sales until it is done
+
+    def path(self, name):
+        return os.path.join(self.data_dir, name)
+
+    def device_id(self):
+        # A random id made once and kept in the data dir. Host names are no good for
+        # this: every Android tablet is "localhost", and sync keys sales by terminal.
+        path = self.path(config.DEVICE_ID_FILE)
+        if os.path.exists(path):
+            with open(path) as f: return json.load(f)
+        if not os.path.exists(self.data_dir): os.makedirs(self.data_dir)
+        device = uuid.uuid4().hex
+        atomic_write_json(path, device)
+        return device
+
+    def open(self):
+        if not os.path.exists(self.data_dir): os.makedirs(self.data_dir)
+        self.storage = self.open_storage()
+        self.writer = WriteBehindWriter(self.write_behind_delay)
+        self.archive = SalesArchive(self.path(config.ARCHIVE_DIR), self.recipes)
+        self.load_data()
+        return self
+
+    def open_storage(self):
+        json_storage = JsonStorage(self.path(config.INVENTORY_FILE), self.path(config.PRODUCTS_FILE),
+                                   self.path(config.RECEIPTS_FILE), self.path(config.RECEIPT_JOURNAL_FILE),
+                                   self.path(config.IMAGES_FILE), self.path(config.SHIFT_START_FILE),
+                                   self.path(config.SHIFT_STATS_FILE), self.path(config.COSTS_FILE),
+                                   fsync=self.receipt_fsync,
+                                   compact_every=self.compact_every)
+        if self.backend != "sqlite" or not SQLITE_AVAILABLE: return json_storage
+        db_file = self.path(config.DATABASE_FILE)
+        storage = SqliteStorage(db_file, fsync=self.receipt_fsync)
+        if storage.migrate_from(json_storage): print("Migrated JSON data into " + db_file)
+        json_storage.close()
+        return storage
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        self.writer.stop()
+        self.storage.close()
+
+    @timed("load_data")
+    def load_data(self):
+        newest = self.storage.receipts_page(0, 1)
+        self.last_receipt = newest[0]['id'] if newest else None
+        self.inventory = self.storage.load_inventory()
+        if self.inventory is None:
+            self.inventory = DEFAULT_INVENTORY.copy()
+            self.save_inventory()
+
+        self.products = self.storage.load_products()
+        if self.products is None:
+            self.products = copy.deepcopy(DEFAULT_PRODUCTS)
+            self.save_products()
+
+        self.image_map = self.storage.load_images() or {}
+        self.shift_start = self.storage.load_shift_start() or {}
+
+        self.costs = self.storage.load_costs()
+        if self.costs is None:
+            self.costs = DEFAULT_COSTS.copy()
+            self.save_costs()
+        self.menu_index = MenuIndex(self.products)
+
+        self.recipe_matrix = RecipeMatrix(self.recipes, self.inventory)
+        self.margins = MarginEngine(self.products, self.recipe_matrix, self.costs)
+        # JSON storage saves stock in the background; sales newer than the saved
+        # figures (the app died before that save) are deducted again
+        missed = self.storage.sales_since_inventory()
+        for r in missed:
+            counts = {}
+            for item in r['items']: counts[item['name']] = counts.get(item['name'], 0) + item.get('qty', 1)
+            self.recipe_matrix.deduct(self.inventory, counts)
+        if missed: self.save_inventory()
+        self.capacity = self.recipe_matrix.capacity(self.inventory)
+        self.low_stock = LowStockMonitor(self.recipe_matrix)
+        self.low_stock.check(self.inventory)
+
+        # Saved totals can lag behind the receipts if the app died before the
+        # background save (or were saved without costs); rebuild them from storage once in that case
+        stats = self.storage.load_shift_stats()
+        if stats is not None and stats.get("tickets") == self.storage.count_receipts() and "cost" in stats:
+            self.stats = ShiftAggregates.from_dict(stats)
+        else:
+            self.stats = ShiftAggregates.rebuild(self.storage.iter_receipts(), self.recipe_matrix, self.margins)
+
+    # Saves go through the write-behind thread; each gets its own snapshot so
+    # callers can keep mutating the live dicts.
+    def save_inventory(self):
+        self.writer.submit("inventory", self.storage.save_inventory, dict(self.inventory), self.last_receipt)
+
+    def save_products(self):
+        self.writer.submit("products", self.storage.save_products, copy.deepcopy(self.products))
+
+    def save_images(self):
+        self.writer.submit("images", self.storage.save_images, dict(self.image_map))
+
+    def save_shift_start(self):
+        self.writer.submit("shift_start", self.storage.save_shift_start, dict(self.shift_start))
+
+    def save_costs(self):
+        self.writer.submit("costs", self.storage.save_costs, dict(self.costs))
+
+    def save_shift_stats(self):
+        self.writer.submit("shift_stats", self.storage.save_shift_stats, self.stats.to_dict())
+
+    # --- CART ---
+    def add_to_cart(self, sku, price, qty=1):
+        line = self.cart.add(sku, price, qty)
+        self.emit("cart_changed", line)
+        return line
+
+    def change_cart_qty(self, line_id, delta):
+        line = self.cart.change_qty(line_id, delta)
+        if line: self.emit("cart_changed", line)
+        return line
+
+    def quick_search(self, text, limit=8):
+        # Keypad entry: "cl12", "lat 16", "2x cl12" -> (qty, [MenuEntry]); see menu_index
+        qty, text = split_quantity(text)
+        return qty, self.menu_index.search(text, limit)
+
+    def clear_cart(self):
+        self.cart.clear()
+        self.emit("cart_cleared")
+
+    @timed("checkout")
+    def checkout(self, date=None):
+        if not self.cart: raise PosError("Empty Cart")
+        if self.closing_shift: raise PosError("Shift is closing")
+        receipt = {"id": self.storage.next_order_id(), "date": date or datetime.now().strftime("%Y-%m-%d %H:%M"),
+                   "total": self.cart.total, "items": self.cart.items()}
+        usage = self.record_sale(receipt, self.cart.counts())
+        self.clear_cart()
+        self.refresh_availability(usage)
+        return receipt
+
+    def record_sale(self, receipt, counts):
+        # Deduct, store and total one receipt; also used by the sync server for
+        # sales that were rung up on other terminals
+        unit_costs = self.margins.unit_costs(receipt)
+        for item in receipt['items']: item['cost'] = unit_costs[item['name']]  # the receipt keeps its sale's costs
+        usage = self.recipe_matrix.deduct(self.inventory, counts)
+        self.storage.record_sale(self.inventory, usage, receipt)
+        self.last_receipt = receipt['id']
+        if self.storage.should_compact(): self.writer.submit("receipts", self.storage.compact)
+        # JSON storage leaves stock to this background save (the journal line makes the
+        # sale durable). SQLite already wrote it with the sale, but a save queued before
+        # the sale may land after it, so a fresh one is queued there too.
+        self.save_inventory()
+        self.stats.record(receipt, usage, unit_costs)
+        self.save_shift_stats()
+        if self.receipt_index is not None: self.receipt_index.add(receipt)
+        elif self._index_backlog is not None: self._index_backlog.append(receipt)
+        self.emit("sale", receipt, usage)
+        return usage
+
+    # --- STOCK ---
+    def is_available(self, name, sizes):
+        # Drinks without a recipe are never greyed out
+        return any(self.capacity.get(f"{name} {size}") != 0 for size in sizes)
+
+    def is_low(self, name, sizes):
+        return any(self.low_stock.is_low(f"{name} {size}") for size in sizes)
+
+    def refresh_availability(self, ingredients=None):
+        # With `ingredients`, only those and the drinks that use them are looked at again
+        skus = None if ingredients is None else self.recipe_matrix.skus_using(ingredients)
+        fresh = self.recipe_matrix.capacity(self.inventory, skus)
+        changed = [sku for sku, n in fresh.items() if self.capacity.get(sku) != n]
+        if skus is None: self.capacity = fresh
+        else: self.capacity.update(fresh)
+        self.emit("availability_changed", self.capacity, changed)
+        raised, cleared = self.low_stock.check(self.inventory, ingredients)
+        if raised or cleared: self.emit("low_stock", raised, cleared)
+
+    def set_stock_count(self, item, raw_qty):
+        # A hand count replaces both the live stock and the shift's starting figure.
+        # Not while the report is being written: it would miss the count, and the
+        # starting figures are about to be cleared.
+        if self.closing_shift: raise PosError("Shift is closing")
+        self.inventory[item] = raw_qty
+        self.shift_start[item] = raw_qty
+        self.save_inventory()
+        self.save_shift_start()
+        self.emit("stock_counted", item, raw_qty)
+        self.emit("inventory_changed", [item])
+        self.refresh_availability([item])
+
+    def apply_inventory_update(self, usage=None, levels=None):
+        # Stock changes that happened elsewhere (sync server): `usage` is subtracted,
+        # `levels` replaces the current figures
+        usage, levels = usage or {}, levels or {}
+        for ing, amt in usage.items(): self.inventory[ing] = self.inventory.get(ing, 0) - amt
+        self.inventory.update(levels)
+        self.save_inventory()
+        self.emit("inventory_changed", list(usage) + list(levels))
+        self.refresh_availability(list(usage) + list(levels))
+
+    # --- SHIFT ---
+    def has_shift(self):
+        # A just-started shift may still be waiting in the write-behind queue
+        return self.writer.is_dirty("shift_start") or self.storage.has_shift()
+
+    def start_shift(self):
+        self.shift_start = self.inventory.copy()
+        self.stats = ShiftAggregates()
+        self.save_shift_start()
+        self.save_shift_stats()
+        self.emit("shift_started")
+
+    def end_shift(self, report_path=None, timestamp=None, compress=False, background=True):
+        # Writes the report and the shift's sales archive (on a worker thread unless
+        # background=False) and only clears the shift once both are safely on disk.
+        # Returns the report path.
+        if not self.has_shift(): raise PosError("No shift running")
+        if self.closing_shift: raise PosError("Shift is closing")
+        self.writer.flush()
+        self.closing_shift = True
+
+        timestamp = timestamp or datetime.now().strftime("%Y-%m-%d_%H-%M")
+        if report_path is None:
+            report_path, n = self.path(f"Report_{timestamp}.csv"), 1
+            while os.path.exists(report_path):  # another shift closed this minute
+                n += 1
+                report_path = self.path(f"Report_{timestamp}_{n}.csv")
+        total = self.storage.count_receipts()
+        inventory, shift_start = dict(self.inventory), dict(self.shift_start)
+        summary = ShiftAggregates.from_dict(self.stats.to_dict())
+
+        def progress(done, count):
+            self.call_soon(self.emit, "report_progress", done, count)
+
+        def work():
+            try:
+                paths = write_shift_report(report_path, timestamp, inventory, shift_start, UNIT_SIZES,
+                                           self.storage.iter_receipts(), total, progress, compress, summary)
+                paths.append(self.archive.archive_shift(self.storage.iter_receipts(), timestamp))
+            except Exception as e:
+                self.call_soon(self._report_failed, e)
+                return
+            self.call_soon(self._close_shift, paths)
+
+        if background: threading.Thread(target=work, name="shift-report", daemon=True).start()
+        else: work()
+        return report_path
+
+    def _report_failed(self, error):
+        self.closing_shift = False
+        self.emit("report_failed", error)
+
+    def _close_shift(self, paths):
+        # Queued saves land first, so none of them can bring back the old shift after the clear
+        self.writer.flush()
+        self.closing_shift = False
+        self.shift_start = {}
+        self.stats = ShiftAggregates()
+        self.receipt_index = self._index_backlog = None
+        if self.archive_index is not None: self._index_archive_file(self.archive_index, self._archive_sources, paths[-1])
+        self.storage.clear_receipts()
+        self.storage.clear_shift_start()
+        self.emit("shift_closed", paths)
+
+    # --- MENU ---
+    def update_price(self, cat, name, size, price):
+        return bool(self.update_prices([(cat, name, size, price)]))
+
+    def update_prices(self, changes):
+        # Any number of (cat, name, size, price) edits become one background write
+        # and one prices_changed event. Returns the edits that changed a price.
+        wanted = {(cat, name, size): price for cat, name, size, price in changes}
+        changed = [(cat, name, size, price) for (cat, name, size), price in wanted.items()
+                   if self.products[cat][name].get(size) != price]
+        if not changed: return []
+        # Rows of a write that is still queued are carried over into this one
+        if not self.writer.is_dirty("prices"): self._unsaved_prices = set()
+        for cat, name, size, price in changed:
+            self.products[cat][name][size] = price
+            self._unsaved_prices.add((cat, name, size))
+        self.writer.submit("prices", self.storage.save_prices, copy.deepcopy(self.products),
+                           sorted(self._unsaved_prices))
+        self.margins.prices_changed(changed)
+        self.menu_index.update(changed)
+        self.emit("prices_changed", changed)
+        return changed
+
+    # --- COSTS ---
+    def update_costs(self, costs):
+        # {ingredient: cost per purchase unit}; returns the ingredients whose cost changed
+        changed = [ing for ing, cost in costs.items() if self.costs.get(ing) != cost]
+        if not changed: return []
+        for ing in changed: self.costs[ing] = costs[ing]
+        self.save_costs()
+        self.margins.costs_changed(changed)
+        self.emit("costs_changed", changed)
+        return changed
+
+    def receipt_margin(self, receipt):
+        # From the line costs stored at checkout, so later cost edits leave it alone;
+        # None for receipts saved before costs were kept
+        if not all('cost' in item for item in receipt['items']): return None
+        return receipt['total'] - sum(item['cost'] * item.get('qty', 1) for item in receipt['items'])
+
+    def set_product_image(self, name, path):
+        self.image_map[name] = path
+        self.save_images()
+        self.emit("image_changed", name, path)
+
+    # --- RECEIPTS ---
+    def count_receipts(self):
+        return self.storage.count_receipts()
+
+    def receipts_page(self, offset, limit, newest_first=True):
+        return self.storage.receipts_page(offset, limit, newest_first)
+
+    def build_receipt_index(self, background=False):
+        # One pass over the stored receipts. In the background the UI keeps selling;
+        # sales made meanwhile are added when the finished index is installed.
+        self.build_archive_index(background)
+        if self.receipt_index is not None or self._index_backlog is not None: return
+        if not background:
+            self.receipt_index = ReceiptIndex.build(self.storage.iter_receipts())
+            return
+        self._index_backlog = []
+
+        def work():
+            self.call_soon(self._install_receipt_index, ReceiptIndex.build(self.storage.iter_receipts()))
+
+        threading.Thread(target=work, name="receipt-index", daemon=True).start()
+
+    def _install_receipt_index(self, index):
+        if self._index_backlog is None: return  # superseded by a direct build or a shift close
+        backlog, self._index_backlog = self._index_backlog, None
+        for receipt in backlog: index.add(receipt)  # ones the build already saw are skipped
+        self.receipt_index = index
+
+    # Closed shifts are searched through their archive files: the index holds ids,
+    # dates and totals, and matching receipts are read back from the file they are in
+    def build_archive_index(self, background=False):
+        if self.archive_index is not None or (background and self._archive_building): return
+        if not background: return self._install_archive_index(self._scan_archive())
+        self._archive_building = True
+
+        def work():
+            self.call_soon(self._install_archive_index, self._scan_archive())
+
+        threading.Thread(target=work, name="archive-index", daemon=True).start()
+
+    def _scan_archive(self):
+        index, sources = ReceiptIndex(), {}
+        for path in self.archive.shift_files(): self._index_archive_file(index, sources, path)
+        return index, sources
+
+    @staticmethod
+    def _index_archive_file(index, sources, path):
+        for r in iter_archived_receipts(path):
+            index.add(r)
+            sources[r['id']] = path
+
+    def _install_archive_index(self, built):
+        self._archive_building = False
+        if self.archive_index is not None: return  # a direct build got there first
+        self.archive_index, self._archive_sources = built
+        indexed = set(self._archive_sources.values())
+        for path in self.archive.shift_files():  # shifts closed while it was being built
+            if path not in indexed: self._index_archive_file(self.archive_index, self._archive_sources, path)
+
+    def _archived_receipts(self, ids):
+        wanted = {}
+        for rid in ids: wanted.setdefault(self._archive_sources[rid], set()).add(rid)
+        found = {}
+        for path, rids in wanted.items():
+            found.update((r['id'], r) for r in iter_archived_receipts(path) if r['id'] in rids)
+        return [found[rid] for rid in ids if rid in found]
+
+    @timed("search_receipts")
+    def search_receipts(self, text, limit=200):
+        # Search bar query (see receipt_index.parse_query) -> matching receipts, newest first.
+        # The current shift comes first; closed shifts fill up the rest of `limit`.
+        if self.receipt_index is None:
+            self._index_backlog = None  # a background build still running is superseded
+            self.build_receipt_index()
+        if self.archive_index is None: self.build_archive_index()
+        query = parse_query(text, self.receipt_index.latest_date() or self.archive_index.latest_date())
+        found = self.storage.get_receipts(self.receipt_index.search(limit=limit, **query))
+        if len(found) < limit:
+            older = self.archive_index.search(limit=limit - len(found), **query)
+            found += self._archived_receipts(older)
+        return found
@@ -0,0 +1,75 @@
+# --- INVENTORY MODEL ---
+# Display rows for the inventory screen, kept current from engine events: a sale
+# or a count only recomputes the ingredients it touched. Listeners get
+# rows_changed(items) for those, or reloaded() after a shift starts or ends.
+# Sorting and filtering work on the row data via view().
+from .catalog import UNIT_SIZES
+from .engine import EventEmitter
+
+SORTS = {"default": "Stock order", "low": "Low first", "remaining": "Least left", "used": "Most used",
+         "name": "A-Z"}
+
+
+class InventoryModel(EventEmitter):
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+        self.rows = {}    # item -> {"name", "start_qty", "current_qty", "low"}: what one row shows
+        self.levels = {}  # item -> (current, shift start) in raw units, for sorting
+        self.order = []   # items in inventory order
+        engine.bind("sale", self.on_sale)
+        engine.bind("inventory_changed", self.refresh)
+        engine.bind("low_stock", self.on_low_stock)
+        engine.bind("shift_started", self.reload)
+        engine.bind("shift_closed", self.reload)
+        self.reload()
+
+    def close(self):
+        for event, handler in (("sale", self.on_sale), ("inventory_changed", self.refresh),
+                               ("low_stock", self.on_low_stock), ("shift_started", self.reload),
+                               ("shift_closed", self.reload)):
+            self.engine.unbind(event, handler)
+
+    # --- ENGINE EVENTS ---
+    def on_sale(self, receipt, usage):
+        self.refresh(list(usage))
+
+    def on_low_stock(self, raised, cleared):
+        self.refresh([a["ingredient"] for a in raised] + list(cleared))
+
+    def reload(self, *args):
+        self.order = list(self.engine.inventory)
+        self.rows, self.levels = {}, {}
+        for item in self.order: self.rows[item] = self._row(item)
+        self.emit("reloaded")
+
+    def refresh(self, items):
+        changed = []
+        for item in items:
+            if item not in self.engine.inventory: continue
+            if item not in self.rows: self.order.append(item)
+            row = self._row(item)
+            if self.rows.get(item) == row: continue
+            self.rows[item] = row
+            changed.append(item)
+        if changed: self.emit("rows_changed", changed)
+
+    def _row(self, item):
+        unit_size = UNIT_SIZES.get(item, 1)
+        raw, start = self.engine.inventory[item], self.engine.shift_start.get(item, 0)
+        self.levels[item] = (raw, start)
+        return {"name": item, "start_qty": f"{start / unit_size:.2f}", "current_qty": f"{raw / unit_size:.2f}",
+                "low": item in self.engine.low_stock.alerts}
+
+    # --- VIEW ---
+    def view(self, sort="default", text="", low_only=False):
+        # Rows to show, in order; `text` matches item names containing all its words
+        words = text.lower().split()
+        items = [item for item in self.order if (not low_only or self.rows[item]["low"])
+                 and all(w in item.lower() for w in words)]
+        left = lambda item: self.levels[item][0] / self.levels[item][1] if self.levels[item][1] else float("inf")
+        if sort == "low": items.sort(key=lambda item: (not self.rows[item]["low"], left(item)))
+        elif sort == "remaining": items.sort(key=left)
+        elif sort == "used": items.sort(key=lambda item: self.levels[item][0] - self.levels[item][1])
+        elif sort == "name": items.sort(key=str.lower)
+        return [self.rows[item] for item in items]
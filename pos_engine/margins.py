@@ -0,0 +1,67 @@
+# --- MARGINS ---
+# Cost of goods and margin per SKU ("<product> <size>"), worked out once from the
+# recipe and the ingredient costs and then served from a cache. Entries are only
+# dropped when something they depend on changes:
+#   a price        -> that SKU's margin
+#   an ingredient  -> cost and margin of the SKUs whose recipe uses it
+# so a checkout costs its receipt with dictionary lookups. Recipes are read from
+# the engine's RecipeMatrix, the same one that deducts stock, so costing never
+# drifts from usage; a new recipe means a new matrix and a new MarginEngine.
+from .catalog import UNIT_SIZES
+
+
+class MarginEngine:
+    def __init__(self, products, matrix, costs, unit_sizes=UNIT_SIZES):
+        self.products = products  # the engine's live menu: cat -> name -> size -> price
+        self.matrix = matrix      # the engine's RecipeMatrix
+        self.costs = costs        # the engine's live ingredient costs, per purchase unit
+        self.unit_sizes = unit_sizes
+        self.places = {f"{name} {size}": (cat, name, size)
+                       for cat, items in products.items() for name, sizes in items.items() for size in sizes}
+        self._cost = {}    # sku -> cost of one drink
+        self._margin = {}  # sku -> (price, cost, margin)
+
+    # --- LOOKUPS ---
+    def cost(self, sku):
+        # Drinks without a recipe cost nothing we know of
+        cost = self._cost.get(sku)
+        if cost is None:
+            j = self.matrix.sku_index.get(sku)
+            ingredients = self.matrix.ingredients
+            cost = 0 if j is None else sum(amt * self.costs.get(ingredients[i], 0) / self.unit_sizes.get(ingredients[i], 1)
+                                           for i, amt in self.matrix.columns[j])
+            self._cost[sku] = cost
+        return cost
+
+    def margin(self, sku):
+        # -> (price, cost, margin), or None for a SKU that is not on the menu
+        entry = self._margin.get(sku)
+        if entry is None:
+            place = self.places.get(sku)
+            if place is None: return None
+            cat, name, size = place
+            price = self.products[cat][name][size]
+            cost = self.cost(sku)
+            entry = self._margin[sku] = (price, cost, price - cost)
+        return entry
+
+    def table(self):
+        # Every menu SKU -> (price, cost, margin), in menu order
+        return {sku: self.margin(sku) for sku in self.places}
+
+    def unit_costs(self, receipt):
+        # sku -> cost of one, for the lines of one receipt (what ShiftAggregates.record takes).
+        # A cost stored on the line at checkout wins over today's.
+        return {item['name']: item['cost'] if 'cost' in item else self.cost(item['name']) for item in receipt['items']}
+
+    # --- INVALIDATION ---
+    def prices_changed(self, changes):
+        for cat, name, size, _ in changes:
+            sku = f"{name} {size}"
+            self.places[sku] = (cat, name, size)
+            self._margin.pop(sku, None)
+
+    def costs_changed(self, ingredients):
+        for sku in self.matrix.skus_using(ingredients):
+            self._cost.pop(sku, None)
+            self._margin.pop(sku, None)
@@ -0,0 +1,139 @@
+# --- MENU INDEX ---
+# Prefix trie over the menu for keypad / type-ahead order entry. Every SKU is
+# filed under the words of its name, its size and a short code (initials +
+# size digits: "Cafe Latte 12oz" -> "cl12"), and each trie node keeps the set
+# of SKUs below it, so a prefix lookup is one step per typed character:
+#   "cl12"   -> Cafe Latte 12oz
+#   "lat 16" -> every latte in 16oz (each word narrows the matches)
+#   "3x cl12" / "cl12 x3" -> the same, three of them
+# Codes are unique: a SKU whose initials are taken spells out more of its name,
+# last word first ("Iced Cappuccino 16oz" -> "ic16", "Iced Choco 16oz" -> "ich16").
+# Price edits only swap the entry; added or removed SKUs touch their own keys.
+import re
+from collections import namedtuple
+
+MenuEntry = namedtuple("MenuEntry", "sku cat name size price code order")
+
+QTY_TOKEN = re.compile(r"^(?:(\d+)x|x(\d+))$")
+
+
+def quick_codes(name, size):
+    # Candidate codes, shortest first: the initials, then more letters of each word
+    words = [word.lower() for word in name.split() if word[0].isalnum()]
+    digits = "".join(c for c in size if c.isdigit())
+    lengths = [1] * len(words)
+    yield "".join(w[0] for w in words) + digits
+    for i in reversed(range(len(words))):
+        while lengths[i] < len(words[i]):
+            lengths[i] += 1
+            yield "".join(w[:n] for w, n in zip(words, lengths)) + digits
+
+
+def quick_code(name, size):
+    return next(quick_codes(name, size))
+
+
+def split_quantity(text):
+    # "3x cl12" -> (3, "cl12"); text without a quantity token -> (1, text)
+    qty, rest = 1, []
+    for token in text.split():
+        match = QTY_TOKEN.match(token.lower())
+        if match and qty == 1: qty = int(match.group(1) or match.group(2)) or 1
+        else: rest.append(token)
+    return qty, " ".join(rest)
+
+
+class _Node:
+    __slots__ = ("children", "skus")
+
+    def __init__(self):
+        self.children = {}
+        self.skus = set()  # every SKU with a key that starts here
+
+
+class MenuIndex:
+    def __init__(self, products=None):
+        self.root = _Node()
+        self.entries = {}  # sku -> MenuEntry
+        self.codes = {}    # quick code -> sku
+        self._order = 0    # menu position of the next new SKU, for a stable result order
+        if products: self.sync(products)
+
+    @staticmethod
+    def keys(name, size, code):
+        return set(name.lower().split()) | {size.lower(), code}
+
+    # --- BUILDING ---
+    def add(self, cat, name, size, price):
+        sku = f"{name} {size}"
+        old = self.entries.get(sku)
+        if old is not None and (old.cat, old.name, old.size) == (cat, name, size):
+            self.entries[sku] = old._replace(price=price)  # a price edit: nothing to re-index
+            return
+        if old is not None: self.remove(sku)
+        code = self.free_code(name, size)
+        self.entries[sku] = MenuEntry(sku, cat, name, size, price, code, self._order)
+        self._order += 1
+        self.codes[code] = sku
+        for key in self.keys(name, size, code):
+            node = self.root
+            for ch in key:
+                node = node.children.setdefault(ch, _Node())
+                node.skus.add(sku)
+
+    def remove(self, sku):
+        entry = self.entries.pop(sku, None)
+        if entry is None: return
+        del self.codes[entry.code]
+        for key in self.keys(entry.name, entry.size, entry.code):
+            node, path = self.root, []
+            for ch in key:
+                child = node.children.get(ch)
+                if child is None: break  # pruned along with another of this SKU's keys
+                child.skus.discard(sku)
+                path.append((node, ch))
+                node = child
+            for parent, ch in reversed(path):  # prune branches no SKU uses any more
+                if parent.children[ch].skus: break
+                del parent.children[ch]
+
+    def free_code(self, name, size):
+        # SKUs already on the menu keep their codes; a newcomer takes the next free one
+        code = None
+        for code in quick_codes(name, size):
+            if code not in self.codes: return code
+        n = 2
+        while f"{code}-{n}" in self.codes: n += 1  # every letter of the name is taken
+        return f"{code}-{n}"
+
+    def update(self, changes):
+        # [(cat, name, size, price)], as in the engine's prices_changed event
+        for cat, name, size, price in changes: self.add(cat, name, size, price)
+
+    def sync(self, products):
+        # Bring the index in line with a whole menu; only differences are re-indexed
+        seen = set()
+        for cat, items in products.items():
+            for name, sizes in items.items():
+                for size, price in sizes.items():
+                    self.add(cat, name, size, price)
+                    seen.add(f"{name} {size}")
+        for sku in [sku for sku in self.entries if sku not in seen]: self.remove(sku)
+
+    # --- LOOKUP ---
+    def _find(self, prefix):
+        node = self.root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None: return ()
+        return node.skus
+
+    def search(self, text, limit=8):
+        # -> MenuEntries matching every word of `text`; an exact quick code comes first
+        words = text.lower().split()
+        if not words: return []
+        sets = sorted((self._find(word) for word in words), key=len)
+        found = set(sets[0]).intersection(*sets[1:])
+        exact = self.codes.get(words[0]) if len(words) == 1 else None
+        entries = sorted((self.entries[sku] for sku in found), key=lambda e: (e.sku != exact, e.order))
+        return entries[:limit]
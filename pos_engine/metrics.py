@@ -0,0 +1,122 @@
+# --- METRICS ---
+# Timing spans for the hot paths, kept in fixed-size ring buffers so memory use
+# never grows. One shared `metrics` object is used by the engine, the storage
+# writer and the UI. While disabled, a timed call costs one attribute check.
+#
+#   @timed("checkout")            decorate a function or method
+#   with metrics.span("redraw"):  time a block
+#   metrics.record("frame", dt)   add a value measured elsewhere
+import functools
+import json
+import time
+from collections import deque
+
+BUFFER_SIZE = 512  # values kept per span
+
+
+class Series:
+    # The last `size` values of one span (seconds), plus how many were ever recorded
+    __slots__ = ("values", "count", "total")
+
+    def __init__(self, size):
+        self.values = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self):
+        values = sorted(self.values)
+        if not values: return {"count": self.count}
+        pick = lambda p: values[min(int(p * len(values)), len(values) - 1)]
+        return {"count": self.count, "last": self.values[-1], "mean": self.total / self.count,
+                "p50": pick(0.5), "p95": pick(0.95), "max": values[-1]}
+
+
+class _NullSpan:
+    def __enter__(self): return self
+
+    def __exit__(self, *exc): return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "t0")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled=False, size=BUFFER_SIZE):
+        self.enabled = enabled
+        self.size = size
+        self.series = {}    # span name -> Series
+        self.counters = {}  # event name -> count (e.g. dropped frames)
+
+    def record(self, name, seconds):
+        series = self.series.get(name)
+        if series is None: series = self.series.setdefault(name, Series(self.size))
+        series.add(seconds)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def span(self, name):
+        return _Span(self, name) if self.enabled else NULL_SPAN
+
+    def clear(self):
+        self.series = {}
+        self.counters = {}
+
+    def summary(self):
+        return {name: series.summary() for name, series in sorted(self.series.items())}
+
+    def report(self):
+        # Plain-text table (milliseconds) for the diagnostics panel
+        lines = [f"{'span':<24}{'n':>7}{'p50':>8}{'p95':>8}{'max':>8}"]
+        for name, s in self.summary().items():
+            if "p50" not in s: continue
+            lines.append(f"{name[:23]:<24}{s['count']:>7}{s['p50'] * 1000:>8.1f}{s['p95'] * 1000:>8.1f}"
+                         f"{s['max'] * 1000:>8.1f}")
+        lines.extend(f"{name}: {n}" for name, n in sorted(self.counters.items()))
+        return "\n".join(lines)
+
+    def export(self, path):
+        # Summary plus the raw ring-buffer contents, as JSON
+        data = {"exported": time.strftime("%Y-%m-%d %H:%M:%S"), "summary": self.summary(),
+                "counters": dict(self.counters),
+                "samples": {name: list(series.values) for name, series in self.series.items()}}
+        with open(path, 'w') as f: json.dump(data, f, indent=1)
+        return path
+
+
+metrics = Metrics()
+
+
+def timed(name):
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not metrics.enabled: return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.record(name, time.perf_counter() - t0)
+        return inner
+    return wrap
@@ -0,0 +1,198 @@
+# --- ORDER QUEUE ---
+# Checked-out orders are pushed to barista/kitchen displays the moment the sale
+# is stored. Displays keep a TCP connection open (same line protocol as the sync
+# server) and get every change pushed; nothing polls.
+#
+#   server -> display  {"type": "snapshot", "orders": [order, ...]}
+#   server -> display  {"type": "order", "order": order}
+#   server -> display  {"type": "item", "order": id, "item": index, "done": bool}
+#   server -> display  {"type": "closed", "order": id}
+#   display -> server  {"type": "done", "order": id, "item": index, "done": bool}   (no "item": whole order)
+#
+#   order = {"id", "date", "total", "sent_at", "items": [{"name", "qty", "done"}]}
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+from . import config
+from .protocol import MAX_MESSAGE, read_message, encode
+
+
+class OrderQueue:
+    # Open orders with per-item done flags. The server changes it through
+    # add/mark_done; displays mirror it by feeding every message to apply().
+    def __init__(self):
+        self.orders = OrderedDict()  # order id -> order, oldest first
+
+    def add(self, receipt):
+        order = {"id": receipt["id"], "date": receipt["date"], "total": receipt["total"], "sent_at": time.time(),
+                 "items": [{"name": item["name"], "qty": item.get("qty", 1), "done": False}
+                           for item in receipt["items"]]}
+        self.orders[order["id"]] = order
+        return {"type": "order", "order": order}
+
+    def mark_done(self, order_id, item=None, done=True):
+        # Returns the messages that describe the change (none for an unknown order)
+        order = self.orders.get(order_id)
+        if order is None: return []
+        if item is None:
+            del self.orders[order_id]
+            return [{"type": "closed", "order": order_id}]
+        if not 0 <= item < len(order["items"]): return []
+        order["items"][item]["done"] = bool(done)
+        messages = [{"type": "item", "order": order_id, "item": item, "done": bool(done)}]
+        if all(i["done"] for i in order["items"]):
+            del self.orders[order_id]
+            messages.append({"type": "closed", "order": order_id})
+        return messages
+
+    def snapshot(self):
+        return {"type": "snapshot", "orders": list(self.orders.values())}
+
+    def apply(self, message):
+        kind = message.get("type")
+        if kind == "snapshot":
+            self.orders = OrderedDict((o["id"], o) for o in message["orders"])
+        elif kind == "order":
+            self.orders[message["order"]["id"]] = message["order"]
+        elif kind == "item" and message["order"] in self.orders:
+            self.orders[message["order"]]["items"][message["item"]]["done"] = message["done"]
+        elif kind == "closed":
+            self.orders.pop(message["order"], None)
+
+
+class OrderQueueServer:
+    # Runs on the POS in its own asyncio thread; publish() may be called from any thread
+    def __init__(self, engine=None, host="0.0.0.0", port=config.ORDER_QUEUE_PORT):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.queue = OrderQueue()
+        self.displays = set()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None  # why the listening socket could not be opened
+
+    def start(self):
+        # Raises OSError when the port cannot be bound; the POS then runs without displays
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), name="order-queue", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(5): self._error = OSError(f"order queue did not start on port {self.port}")
+        if self._error: raise self._error
+        if self.engine: self.engine.bind("sale", self.on_sale)
+        return self
+
+    def stop(self):
+        if self.engine: self.engine.unbind("sale", self.on_sale)
+        if self._loop: self._loop.call_soon_threadsafe(self._shutdown)
+        if self._thread: self._thread.join(timeout=5)
+
+    def on_sale(self, receipt, usage):
+        self.publish(receipt)
+
+    def publish(self, receipt):
+        # Nothing to do once the loop is gone (stopped, or never started)
+        loop = self._loop
+        if loop is None or loop.is_closed(): return
+        try:
+            loop.call_soon_threadsafe(self._publish, receipt)
+        except RuntimeError:
+            pass  # loop shutting down
+
+    def _publish(self, receipt):
+        self._broadcast([self.queue.add(receipt)])
+
+    def _shutdown(self):
+        self._server.close()
+        for writer in list(self.displays): writer.close()
+
+    async def _main(self):
+        try:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_MESSAGE)
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._loop = asyncio.get_running_loop()
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        await self._server.wait_closed()
+
+    def _broadcast(self, messages):
+        data = b"".join(encode(m) for m in messages)
+        for writer in list(self.displays): writer.write(data)
+
+    async def _handle(self, reader, writer):
+        try:
+            # Registered before anything can await: an order published after this snapshot must reach it
+            writer.write(encode(self.queue.snapshot()))
+            self.displays.add(writer)
+            await writer.drain()
+            while True:
+                message = await read_message(reader)
+                if message is None: break
+                if message.get("type") == "done":
+                    self._broadcast(self.queue.mark_done(message["order"], message.get("item"),
+                                                         message.get("done", True)))
+        except (ConnectionError, ValueError, KeyError) as e:
+            print(f"Order queue: dropped display connection: {e}")
+        finally:
+            self.displays.discard(writer)
+            writer.close()
+
+
+class OrderQueueClient:
+    # Display side: keeps `queue` mirrored and calls on_change(message) after each
+    # update, through call_soon (the UI thread) like the engine does.
+    def __init__(self, host, port=config.ORDER_QUEUE_PORT, on_change=None, call_soon=None, retry_delay=1.0):
+        self.host = host
+        self.port = port
+        self.queue = OrderQueue()
+        self.on_change = on_change or (lambda message: None)
+        self.call_soon = call_soon or (lambda fn, *args: fn(*args))
+        self.retry_delay = retry_delay
+        self.connected = False
+        self._loop = None
+        self._writer = None
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), name="order-display", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping = True
+        if self._loop and self._writer: self._loop.call_soon_threadsafe(self._writer.close)
+        if self._thread: self._thread.join(timeout=5)
+
+    def mark_done(self, order_id, item=None, done=True):
+        message = {"type": "done", "order": order_id, "done": done}
+        if item is not None: message["item"] = item
+        if self._loop and self._writer: self._loop.call_soon_threadsafe(self._writer.write, encode(message))
+
+    def _deliver(self, message):
+        self.queue.apply(message)
+        self.on_change(message)
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        while not self._stopping:
+            try:
+                reader, self._writer = await asyncio.open_connection(self.host, self.port, limit=MAX_MESSAGE)
+                self.connected = True
+                while True:
+                    message = await read_message(reader)
+                    if message is None: break
+                    self.call_soon(self._deliver, message)
+            except (ConnectionError, OSError, ValueError):
+                pass
+            finally:
+                self.connected = False
+                if self._writer: self._writer.close()
+                self._writer = None
+            if not self._stopping: await asyncio.sleep(self.retry_delay)
@@ -0,0 +1,50 @@
+# --- OUTBOX ---
+# File-backed queue of work that must reach another machine: sync ops for the
+# sync server, receipts and reports for the head-office upload. Each item is a
+# dict with a unique "key"; it stays queued (across restarts too) until the
+# receiver has acknowledged that key.
+import json
+import os
+import threading
+
+
+class Outbox:
+    # Items not yet acknowledged, oldest first. Appends are one fsynced
+    # line; an ack rewrites the (short) file.
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.ops = []
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        self.ops.append(json.loads(line))
+                    except ValueError:
+                        pass  # torn last line from a crash mid-append
+
+    def __len__(self):
+        return len(self.ops)
+
+    def append(self, op):
+        with self.lock:
+            self.ops.append(op)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(op) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def pending(self):
+        with self.lock: return list(self.ops)
+
+    def remove(self, keys):
+        keys = set(keys)
+        with self.lock:
+            if not any(op["key"] in keys for op in self.ops): return
+            self.ops = [op for op in self.ops if op["key"] not in keys]
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                for op in self.ops: f.write(json.dumps(op) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
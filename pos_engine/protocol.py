@@ -0,0 +1,22 @@
+# --- LINE PROTOCOL ---
+# Everything that talks over the LAN (sync server, terminals, order displays)
+# exchanges one JSON object per line over plain TCP.
+import json
+
+MAX_MESSAGE = 4 * 1024 * 1024  # asyncio stream limit; a full inventory snapshot is far below this
+
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+
+async def read_message(reader):
+    # None when the other side hung up
+    line = await reader.readline()
+    if not line: return None
+    return json.loads(line)
+
+
+async def send_message(writer, message):
+    writer.write(encode(message))
+    await writer.drain()
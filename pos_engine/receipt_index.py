@@ -0,0 +1,99 @@
+# --- RECEIPT INDEX ---
+# Lookup structures over the stored receipts, kept current on every sale so a
+# search never scans the receipt history:
+#   position  receipt id -> position (order of recording)
+#   by_time   sorted (date, position) pairs for range queries
+#   by_sku    sku -> ascending positions (inverted index)
+# Only ids, dates and totals are held here; matching receipts are read back
+# from storage by id.
+import bisect
+import heapq
+import re
+
+DAY = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+TIME_RANGE = re.compile(r"^(\d{1,2}:\d{2})-(\d{1,2}:\d{2})$")
+TOTAL = re.compile(r"^([<>]=?|=)(\d+(?:\.\d+)?)$")
+
+
+class ReceiptIndex:
+    def __init__(self):
+        self.ids = []       # position -> receipt id
+        self.totals = []    # position -> total
+        self.position = {}  # receipt id -> position
+        self.by_time = []   # sorted (date, position)
+        self.by_sku = {}    # sku -> ascending positions
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, receipts):
+        index = cls()
+        for r in receipts: index.add(r)
+        return index
+
+    def add(self, receipt):
+        if receipt['id'] in self.position: return
+        pos = len(self.ids)
+        self.ids.append(receipt['id'])
+        self.totals.append(receipt['total'])
+        self.position[receipt['id']] = pos
+        entry = (receipt['date'], pos)
+        # Sales arrive in time order, so this is nearly always an append
+        if not self.by_time or entry >= self.by_time[-1]: self.by_time.append(entry)
+        else: bisect.insort(self.by_time, entry)
+        for sku in {item['name'] for item in receipt['items']}: self.by_sku.setdefault(sku, []).append(pos)
+
+    def latest_date(self):
+        return self.by_time[-1][0] if self.by_time else None
+
+    def search(self, order_id=None, start=None, end=None, product=None, min_total=None, max_total=None, limit=200):
+        # Receipt ids matching every given filter, newest first. `start`/`end` are
+        # inclusive "YYYY-mm-dd HH:MM" dates; `product` matches SKUs containing all its words.
+        candidates = None
+
+        def narrow(positions):
+            nonlocal candidates
+            candidates = set(positions) if candidates is None else candidates.intersection(positions)
+
+        if order_id is not None:
+            pos = self.position.get(order_id)
+            narrow([] if pos is None else [pos])
+        if product:
+            words = product.lower().split()
+            matched = [positions for sku, positions in self.by_sku.items() if all(w in sku.lower() for w in words)]
+            narrow(set().union(*matched))
+        if start is not None or end is not None:
+            lo = bisect.bisect_left(self.by_time, (start, -1)) if start is not None else 0
+            hi = bisect.bisect_right(self.by_time, (end, float("inf"))) if end is not None else len(self.by_time)
+            narrow(pos for _, pos in self.by_time[lo:hi])
+        if candidates is None:
+            if min_total is None and max_total is None: return []
+            candidates = range(len(self.ids))
+        if min_total is not None: candidates = [p for p in candidates if self.totals[p] >= min_total]
+        if max_total is not None: candidates = [p for p in candidates if self.totals[p] <= max_total]
+        return [self.ids[p] for p in heapq.nlargest(limit, candidates)]
+
+
+def parse_query(text, latest_date=None):
+    # Search bar syntax, combinable: "#1712345678" or a long number (order id),
+    # "2024-05-01" (day), "10:00-12:00" (time of that day, default the latest
+    # receipt's day), ">100" / "<=250" / "=120" (total), anything else (product words)
+    query, words, day, hours = {}, [], None, None
+    for token in text.split():
+        total = TOTAL.match(token)
+        if token.startswith("#") and token[1:]: query["order_id"] = token[1:]
+        elif token.isdigit() and len(token) >= 6: query["order_id"] = token
+        elif DAY.match(token): day = token
+        elif TIME_RANGE.match(token): hours = TIME_RANGE.match(token).groups()
+        elif total:
+            op, value = total.group(1), float(total.group(2))
+            if op in ("<", "<=", "="): query["max_total"] = value - (1e-9 if op == "<" else 0)
+            if op in (">", ">=", "="): query["min_total"] = value + (1e-9 if op == ">" else 0)
+        else: words.append(token)
+    if hours and day is None and latest_date: day = latest_date[:10]
+    if day:
+        start, end = hours or ("00:00", "23:59")
+        query["start"], query["end"] = f"{day} {start:0>5}", f"{day} {end:0>5}"
+    if words: query["product"] = " ".join(words)
+    return query
@@ -0,0 +1,88 @@
+# --- NUMPY CHECK ---
+# Imported on first use so importing the engine stays cheap
+np = None
+_numpy_checked = False
+
+
+def _numpy():
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np
+
+
+# --- RECIPE MATRIX ---
+class RecipeMatrix:
+    # RECIPES compiled once into an ingredient x SKU matrix. Column j holds the
+    # amounts used by one "<product> <size>"; a cart becomes a vector of
+    # quantities per SKU, so stock usage is one matrix-vector product.
+    def __init__(self, recipes, ingredients=()):
+        self.skus = list(recipes)
+        self.sku_index = {sku: j for j, sku in enumerate(self.skus)}
+
+        self.ingredients = list(ingredients)
+        for recipe in recipes.values():
+            for ing in recipe:
+                if ing not in self.ingredients: self.ingredients.append(ing)
+        self.ingredient_index = {ing: i for i, ing in enumerate(self.ingredients)}
+
+        # Sparse columns double as the pure-Python fallback
+        self.columns = [[(self.ingredient_index[ing], amt) for ing, amt in recipes[sku].items()] for sku in self.skus]
+        rows = [[0] * len(self.skus) for _ in self.ingredients]
+        for j, column in enumerate(self.columns):
+            for i, amt in column: rows[i][j] = amt
+        # Reverse index: ingredient -> [(sku, amount)] for the SKUs that use it
+        self.users = {ing: [(self.skus[j], amt) for j, amt in enumerate(row) if amt > 0]
+                      for ing, row in zip(self.ingredients, rows)}
+        self.use_numpy = _numpy() is not None
+        self.matrix = np.array(rows) if self.use_numpy else rows
+
+    def _counts(self, counts):
+        # {sku: qty} -> [(column, qty)], skipping items that have no recipe
+        return [(self.sku_index[sku], qty) for sku, qty in counts.items() if sku in self.sku_index]
+
+    def usage(self, counts):
+        cols = self._counts(counts)
+        if self.use_numpy:
+            vec = np.zeros(len(self.skus), dtype=self.matrix.dtype)
+            for j, qty in cols: vec[j] += qty
+            used = (self.matrix @ vec).tolist()
+            return {self.ingredients[i]: amt for i, amt in enumerate(used) if amt}
+        used = {}
+        for j, qty in cols:
+            for i, amt in self.columns[j]:
+                ing = self.ingredients[i]
+                used[ing] = used.get(ing, 0) + amt * qty
+        return used
+
+    def deduct(self, inventory, counts):
+        used = self.usage(counts)
+        for ing, amt in used.items(): inventory[ing] = inventory.get(ing, 0) - amt
+        return used
+
+    def skus_using(self, ingredients):
+        return {sku for ing in ingredients for sku, _ in self.users.get(ing, ())}
+
+    def capacity(self, inventory, skus=None):
+        # How many of each SKU the current stock can still make: for every
+        # column, the smallest stock / amount over the ingredients it uses.
+        # `skus` limits the work to those columns (e.g. the ones a sale touched).
+        cols = range(len(self.skus)) if skus is None else [self.sku_index[s] for s in skus if s in self.sku_index]
+        stock = [inventory.get(ing, 0) for ing in self.ingredients]
+        if self.use_numpy:
+            matrix = self.matrix if skus is None else self.matrix[:, cols]
+            stock = np.array(stock, dtype=float)[:, None]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                per_ing = np.where(matrix > 0, stock // matrix, np.inf)
+            made = np.maximum(per_ing.min(axis=0), 0).tolist() if len(cols) else []
+            return {self.skus[j]: int(n) if n != np.inf else None for j, n in zip(cols, made)}
+        result = {}
+        for sku, column in ((self.skus[j], self.columns[j]) for j in cols):
+            made = [stock[i] // amt for i, amt in column if amt > 0]
+            result[sku] = max(int(min(made)), 0) if made else None
+        return result
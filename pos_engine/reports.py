@@ -0,0 +1,67 @@
+import csv
+import gzip
+import os
+import shutil
+
+from .cart import item_label
+
+PROGRESS_EVERY = 200  # receipts between progress callbacks
+
+
+def _fsync_dir(path):
+    # Make the rename itself durable (no-op where directories can't be opened)
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _finish(tmp_path, path):
+    os.replace(tmp_path, path)
+    _fsync_dir(path)
+
+
+def write_shift_report(path, timestamp, inventory, shift_start, unit_sizes, receipts, receipt_count,
+                       progress=None, compress=False, summary=None):
+    # Streams `receipts` (any iterable) straight into the CSV, so the sales log
+    # never has to be in memory. Written to a temp file and renamed at the end:
+    # the report either exists completely or not at all.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["INVENTORY REPORT", timestamp])
+        writer.writerow(["Item", "Start (Units)", "End (Units)", "Diff (Units)"])
+        for item, raw_end in inventory.items():
+            raw_start = shift_start.get(item, 0)
+            unit_size = unit_sizes.get(item, 1)
+            writer.writerow([item, f"{raw_start / unit_size:.2f}", f"{raw_end / unit_size:.2f}",
+                             f"{(raw_end - raw_start) / unit_size:.2f}"])
+        writer.writerow([])
+        if summary is not None:
+            writer.writerows(summary.summary_rows(unit_sizes))
+            writer.writerow([])
+        writer.writerow(["SALES LOG"])
+        done = 0
+        for r in receipts:
+            writer.writerow([r['id'], r['date'], r['total'], "; ".join([item_label(i) for i in r['items']])])
+            done += 1
+            if progress and done % PROGRESS_EVERY == 0: progress(done, receipt_count)
+        csvfile.flush()
+        os.fsync(csvfile.fileno())
+    _finish(tmp_path, path)
+
+    written = [path]
+    if compress:
+        gz_path = path + ".gz"
+        with open(path, 'rb') as src, gzip.open(gz_path + ".tmp", 'wb') as dst: shutil.copyfileobj(src, dst)
+        with open(gz_path + ".tmp", 'rb') as f: os.fsync(f.fileno())
+        _finish(gz_path + ".tmp", gz_path)
+        written.append(gz_path)
+    if progress: progress(receipt_count, receipt_count)
+    return written
@@ -0,0 +1,59 @@
+# --- LOW STOCK ALERTS ---
+# An ingredient is low when the drink that uses the most of it can only be made
+# a few more times (LOW_STOCK_DRINKS), or when it falls to a fixed level set in
+# LOW_STOCK_LEVELS. Only the ingredients a sale or count touched are looked at;
+# the recipe matrix's reverse index says which drinks each one affects.
+from . import config
+
+
+def alert_text(alert):
+    if alert["sku"] is None: return f"{alert['ingredient']}: {alert['stock']:g} left"
+    return f"{alert['ingredient']}: ~{alert['left']} {alert['sku']} left"
+
+
+class LowStockMonitor:
+    def __init__(self, recipe_matrix, drinks=config.LOW_STOCK_DRINKS, levels=None):
+        self.matrix = recipe_matrix
+        self.drinks = drinks
+        self.levels = dict(config.LOW_STOCK_LEVELS if levels is None else levels)
+        self.alerts = {}   # ingredient -> alert
+        self.flagged = {}  # sku -> low ingredients it uses
+
+    def evaluate(self, inventory, ing):
+        # The alert for one ingredient, or None while it is not low
+        stock = inventory.get(ing, 0)
+        users = self.matrix.users.get(ing, ())
+        sku, left = None, None
+        if users:
+            sku, amt = max(users, key=lambda user: user[1])  # fewest drinks left
+            left = max(int(stock // amt), 0)
+        low = (left is not None and left <= self.drinks) or (ing in self.levels and stock <= self.levels[ing])
+        if not low: return None
+        return {"ingredient": ing, "stock": stock, "sku": sku, "left": left, "skus": [s for s, _ in users]}
+
+    def check(self, inventory, ingredients=None):
+        # Re-evaluates the given ingredients (all when None). Returns
+        # (newly low alerts, ingredients no longer low); alerts that stay low
+        # are only refreshed in place.
+        if ingredients is None: ingredients = set(self.matrix.ingredients) | set(self.levels) | set(self.alerts)
+        raised, cleared = [], []
+        for ing in ingredients:
+            alert = self.evaluate(inventory, ing)
+            was_low = ing in self.alerts
+            if alert is None:
+                if was_low: cleared.append(self._clear(ing))
+                continue
+            self.alerts[ing] = alert
+            if was_low: continue
+            for sku in alert["skus"]: self.flagged.setdefault(sku, set()).add(ing)
+            raised.append(alert)
+        return raised, cleared
+
+    def _clear(self, ing):
+        for sku in self.alerts.pop(ing)["skus"]:
+            self.flagged[sku].discard(ing)
+            if not self.flagged[sku]: del self.flagged[sku]
+        return ing
+
+    def is_low(self, sku):
+        return sku in self.flagged
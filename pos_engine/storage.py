@@ -0,0 +1,561 @@
+import json
+import os
+import threading
+import time
+
+from .metrics import metrics
+
+# --- SQLITE CHECK ---
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+    print("sqlite3 not available. Falling back to JSON storage.")
+
+SQLITE_AVAILABLE = sqlite3 is not None
+
+# --- FSYNC POLICIES ---
+FSYNC_ALWAYS = "always"  # fsync after every sale (safest, default)
+FSYNC_BATCH = "batch"    # fsync every `batch_size` sales
+FSYNC_NEVER = "never"    # leave flushing to the OS
+
+
+def atomic_write_json(path, data, indent=4):
+    # Write to a temp file next to the target, then rename over it so a crash
+    # never leaves a half-written file behind.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# --- ORDER IDS ---
+class OrderIdGenerator:
+    # Ids stay "seconds since epoch" like before, but never repeat: a second sale
+    # in the same second (or after a clock step back) gets last id + 1.
+    def __init__(self, last_id=0):
+        self.last_id = last_id
+
+    def seed(self, receipts):
+        for r in receipts:
+            try:
+                self.last_id = max(self.last_id, int(r['id']))
+            except (KeyError, TypeError, ValueError):
+                pass
+
+    def next_id(self):
+        self.last_id = max(int(time.time()), self.last_id + 1)
+        return str(self.last_id)
+
+
+# --- RECEIPT JOURNAL ---
+class ReceiptJournal:
+    # receipts.json stays the checkpoint (same format as before). Every sale after
+    # the last checkpoint is appended as one JSON line to the journal file. To
+    # compact without holding up sales, the journal is renamed to <journal>.old and
+    # a fresh one started; the checkpoint covering both is written afterwards.
+    def __init__(self, checkpoint_path, journal_path, fsync=FSYNC_ALWAYS, batch_size=10, compact_every=200):
+        self.checkpoint_path = checkpoint_path
+        self.journal_path = journal_path
+        self.old_path = journal_path + ".old"  # rotated journal whose checkpoint is not written yet
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.compact_every = compact_every
+        self.ids = OrderIdGenerator()
+        self.pending = 0  # records in the journal since the last checkpoint
+        self._unsynced = 0
+        self._file = None
+
+    def replay(self):
+        receipts = []
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f: receipts = json.load(f)
+
+        self.pending = 0
+        # A crash between writing the checkpoint and removing a journal leaves
+        # records that are already in receipts.json; skip those.
+        seen = set(r.get('id') for r in receipts)
+        for path in (self.old_path, self.journal_path):
+            if not os.path.exists(path): continue
+            good_offset = 0
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"): raise ValueError
+                        receipt = json.loads(line)
+                    except ValueError:
+                        break  # torn write from a crash; drop it and everything after
+                    good_offset += len(line)
+                    self.pending += 1
+                    if receipt.get('id') not in seen:
+                        receipts.append(receipt)
+                        seen.add(receipt.get('id'))
+            if good_offset != os.path.getsize(path):
+                with open(path, 'rb+') as f: f.truncate(good_offset)
+
+        self.ids.seed(receipts)
+        if self.should_compact() or os.path.exists(self.old_path): self.checkpoint(receipts)
+        return receipts
+
+    def next_id(self):
+        return self.ids.next_id()
+
+    def append(self, receipt):
+        if self._file is None: self._file = open(self.journal_path, 'a')
+        self._file.write(json.dumps(receipt, separators=(',', ':')) + "\n")
+        self._file.flush()
+        self.pending += 1
+        self._unsynced += 1
+        if self.fsync == FSYNC_ALWAYS or (self.fsync == FSYNC_BATCH and self._unsynced >= self.batch_size):
+            self.sync()
+
+    def sync(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def should_compact(self):
+        return self.pending >= self.compact_every
+
+    def checkpoint(self, receipts):
+        # Fold the journal into receipts.json, then start a fresh journal.
+        atomic_write_json(self.checkpoint_path, receipts, indent=None)
+        self.close()
+        for path in (self.journal_path, self.old_path):
+            if os.path.exists(path): os.remove(path)
+        self.pending = 0
+
+    def rotate(self):
+        # Cheap half of a background compaction: the current journal becomes .old
+        # (appended to it if an earlier compaction did not finish) and the next
+        # sale starts a new one
+        self.close()
+        if os.path.exists(self.journal_path):
+            if os.path.exists(self.old_path):
+                with open(self.journal_path, 'rb') as src, open(self.old_path, 'ab') as dst:
+                    dst.write(src.read())
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.remove(self.journal_path)
+            else:
+                os.replace(self.journal_path, self.old_path)
+        self.pending = 0
+
+    def write_checkpoint(self, receipts):
+        # Slow half: `receipts` must include everything in .old
+        atomic_write_json(self.checkpoint_path, receipts, indent=None)
+        if os.path.exists(self.old_path): os.remove(self.old_path)
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+
+# --- STORAGE BACKENDS ---
+# Both backends expose the same operations, so CafeApp does not care which one
+# it talks to. load_* return None when nothing has been saved yet.
+
+class JsonStorage:
+    backend = "json"
+
+    def __init__(self, inventory_file, products_file, receipts_file, journal_file, images_file, shift_start_file,
+                 shift_stats_file, costs_file, fsync=FSYNC_ALWAYS, compact_every=200):
+        self.inventory_file = inventory_file
+        self.inventory_state_file = os.path.splitext(inventory_file)[0] + "_state.json"
+        self.products_file = products_file
+        self.images_file = images_file
+        self.shift_start_file = shift_start_file
+        self.shift_stats_file = shift_stats_file
+        self.costs_file = costs_file
+        self.journal = ReceiptJournal(receipts_file, journal_file, fsync=fsync, compact_every=compact_every)
+        self._receipts = None
+        self._by_id = None  # receipt id -> receipt, built on the first get_receipts
+        self.lock = threading.RLock()  # saves may come from the write-behind thread
+        self.checkpoint_lock = threading.Lock()  # one checkpoint write at a time
+
+    def _load(self, path):
+        if not os.path.exists(path): return None
+        with open(path) as f: return json.load(f)
+
+    def _dump(self, path, data):
+        with self.lock: atomic_write_json(path, data)
+
+    # Inventory / products / images
+    # Stock is saved in the background, so it can lag the journal by a few sales.
+    # inventory_state.json keeps it together with the id of the last sale it
+    # includes; sales_since_inventory() returns the ones after that.
+    def load_inventory(self):
+        state = self._load(self.inventory_state_file)
+        return state["inventory"] if state else self._load(self.inventory_file)
+
+    def save_inventory(self, inventory, last_receipt=None):
+        with self.lock:
+            atomic_write_json(self.inventory_state_file, {"inventory": inventory, "last_receipt": last_receipt})
+            atomic_write_json(self.inventory_file, inventory)  # plain copy, as earlier versions read it
+
+    def sales_since_inventory(self):
+        state = self._load(self.inventory_state_file)
+        if state is None: return []  # saved by a version that wrote stock with every sale
+        receipts = self._receipt_list()
+        ids = [r['id'] for r in receipts]
+        if state.get("last_receipt") in ids: return receipts[ids.index(state["last_receipt"]) + 1:]
+        return list(receipts)  # saved before this shift's first sale
+
+    def load_products(self): return self._load(self.products_file)
+
+    def save_products(self, products): self._dump(self.products_file, products)
+
+    def save_prices(self, products, keys): self.save_products(products)
+
+    def load_images(self): return self._load(self.images_file)
+
+    def save_images(self, image_map): self._dump(self.images_file, image_map)
+
+    def load_costs(self): return self._load(self.costs_file)
+
+    def save_costs(self, costs): self._dump(self.costs_file, costs)
+
+    # Shift state
+    def has_shift(self): return os.path.exists(self.shift_start_file)
+
+    def load_shift_start(self): return self._load(self.shift_start_file)
+
+    def save_shift_start(self, shift_start): self._dump(self.shift_start_file, shift_start)
+
+    def load_shift_stats(self): return self._load(self.shift_stats_file)
+
+    def save_shift_stats(self, stats): self._dump(self.shift_stats_file, stats)
+
+    def clear_shift_start(self):
+        with self.lock:
+            for path in (self.shift_start_file, self.shift_stats_file):
+                if os.path.exists(path): os.remove(path)
+
+    # Receipts
+    def _receipt_list(self):
+        if self._receipts is None: self._receipts = self.journal.replay()
+        return self._receipts
+
+    def next_order_id(self):
+        self._receipt_list()
+        return self.journal.next_id()
+
+    def record_sale(self, inventory, usage, receipt):
+        # Only the journal line is written here; stock and compaction follow via the
+        # engine's write-behind thread
+        with self.lock:
+            receipts = self._receipt_list()
+            receipts.append(receipt)
+            if self._by_id is not None: self._by_id[receipt['id']] = receipt
+            self.journal.append(receipt)
+
+    def should_compact(self): return self.journal.should_compact()
+
+    def compact(self):
+        # Write-behind thread: swap the journal under the lock, write the checkpoint outside it
+        with self.checkpoint_lock:
+            with self.lock:
+                snapshot = list(self._receipt_list())
+                self.journal.rotate()
+            self.journal.write_checkpoint(snapshot)
+
+    def count_receipts(self): return len(self._receipt_list())
+
+    def iter_receipts(self, newest_first=False):
+        receipts = list(self._receipt_list())
+        return reversed(receipts) if newest_first else iter(receipts)
+
+    def receipts_page(self, offset, limit, newest_first=True):
+        receipts = self._receipt_list()
+        if not newest_first: return receipts[offset:offset + limit]
+        end = len(receipts) - offset
+        return receipts[max(0, end - limit):max(0, end)][::-1]
+
+    def get_receipts(self, ids):
+        if self._by_id is None: self._by_id = {r['id']: r for r in self._receipt_list()}
+        return [self._by_id[i] for i in ids if i in self._by_id]
+
+    def clear_receipts(self):
+        with self.checkpoint_lock, self.lock:
+            self._receipts = []
+            self._by_id = None
+            self.journal.checkpoint(self._receipts)
+
+    def close(self):
+        self.journal.close()
+
+
+class SqliteStorage:
+    backend = "sqlite"
+
+    # Quantity and price columns are left untyped so ints stay ints (the UI shows
+    # "P60", not "P60.0").
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS inventory (item TEXT PRIMARY KEY, qty NOT NULL);
+        CREATE TABLE IF NOT EXISTS shift_start (item TEXT PRIMARY KEY, qty NOT NULL);
+        CREATE TABLE IF NOT EXISTS products (
+            category TEXT NOT NULL, name TEXT NOT NULL, size TEXT NOT NULL, price NOT NULL,
+            PRIMARY KEY (category, name, size));
+        CREATE TABLE IF NOT EXISTS images (product TEXT PRIMARY KEY, path TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS costs (item TEXT PRIMARY KEY, cost NOT NULL);
+        CREATE TABLE IF NOT EXISTS receipts (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL UNIQUE,
+            date TEXT, total, items TEXT NOT NULL);
+    """
+
+    # RECEIPT_FSYNC policy -> PRAGMA synchronous. With WAL, NORMAL only syncs at
+    # checkpoints, so a committed sale can be lost on power loss; FULL syncs every commit.
+    SYNCHRONOUS = {FSYNC_ALWAYS: "FULL", FSYNC_BATCH: "NORMAL", FSYNC_NEVER: "OFF"}
+
+    def __init__(self, db_file, fsync=FSYNC_ALWAYS):
+        self.db_file = db_file
+        # One shared connection guarded by a lock; readers that stream receipts
+        # open their own connection so they never hold up a checkout.
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={self.SYNCHRONOUS.get(fsync, 'FULL')}")
+        self.conn.executescript(self.SCHEMA)
+        self.lock = threading.RLock()
+        self.ids = OrderIdGenerator()
+        row = self.conn.execute("SELECT MAX(CAST(id AS INTEGER)) FROM receipts").fetchone()
+        self.ids.last_id = row[0] or 0
+
+    def _rows(self, sql, args=()):
+        with self.lock: return self.conn.execute(sql, args).fetchall()
+
+    def _get_meta(self, key):
+        rows = self._rows("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                          "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def _upsert_qty(self, table, data):
+        self.conn.executemany(f"INSERT INTO {table} (item, qty) VALUES (?, ?) "
+                              f"ON CONFLICT(item) DO UPDATE SET qty = excluded.qty", data.items())
+
+    # Inventory / products / images
+    def load_inventory(self):
+        rows = self._rows("SELECT item, qty FROM inventory ORDER BY rowid")
+        return dict(rows) if rows else None
+
+    def save_inventory(self, inventory, last_receipt=None):
+        with self.lock, self.conn: self._upsert_qty("inventory", inventory)
+
+    def sales_since_inventory(self): return []  # each sale updates stock in its own transaction
+
+    def should_compact(self): return False
+
+    def load_products(self):
+        rows = self._rows("SELECT category, name, size, price FROM products ORDER BY rowid")
+        if not rows: return None
+        products = {}
+        for cat, name, size, price in rows:
+            products.setdefault(cat, {}).setdefault(name, {})[size] = price
+        return products
+
+    def _price_rows(self, products):
+        for cat, items in products.items():
+            for name, sizes in items.items():
+                for size, price in sizes.items():
+                    yield cat, name, size, price
+
+    def _upsert_prices(self, rows):
+        self.conn.executemany("INSERT INTO products (category, name, size, price) VALUES (?, ?, ?, ?) "
+                              "ON CONFLICT(category, name, size) DO UPDATE SET price = excluded.price", rows)
+
+    def save_products(self, products):
+        with self.lock, self.conn: self._upsert_prices(self._price_rows(products))
+
+    def save_prices(self, products, keys):
+        # Only the given (cat, name, size) rows, in one transaction
+        rows = [(cat, name, size, products[cat][name][size]) for cat, name, size in keys]
+        with self.lock, self.conn: self._upsert_prices(rows)
+
+    def load_images(self):
+        rows = self._rows("SELECT product, path FROM images")
+        return dict(rows) if rows else None
+
+    def save_images(self, image_map):
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT INTO images (product, path) VALUES (?, ?) "
+                                  "ON CONFLICT(product) DO UPDATE SET path = excluded.path", image_map.items())
+
+    def load_costs(self):
+        rows = self._rows("SELECT item, cost FROM costs ORDER BY rowid")
+        return dict(rows) if rows else None
+
+    def _upsert_costs(self, costs):
+        self.conn.executemany("INSERT INTO costs (item, cost) VALUES (?, ?) "
+                              "ON CONFLICT(item) DO UPDATE SET cost = excluded.cost", costs.items())
+
+    def save_costs(self, costs):
+        with self.lock, self.conn: self._upsert_costs(costs)
+
+    # Shift state
+    def has_shift(self): return self._get_meta("shift_open") == "1"
+
+    def load_shift_start(self):
+        if not self.has_shift(): return None
+        return dict(self._rows("SELECT item, qty FROM shift_start ORDER BY rowid"))
+
+    def save_shift_start(self, shift_start):
+        with self.lock, self.conn:
+            self._upsert_qty("shift_start", shift_start)
+            self._set_meta("shift_open", "1")
+
+    def load_shift_stats(self):
+        stats = self._get_meta("shift_stats")
+        return json.loads(stats) if stats else None
+
+    def save_shift_stats(self, stats):
+        with self.lock, self.conn: self._set_meta("shift_stats", json.dumps(stats))
+
+    def clear_shift_start(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM shift_start")
+            self.conn.execute("DELETE FROM meta WHERE key = 'shift_stats'")
+            self._set_meta("shift_open", "0")
+
+    # Receipts
+    def next_order_id(self):
+        return self.ids.next_id()
+
+    def record_sale(self, inventory, usage, receipt):
+        # Stock deduction and the receipt land in one transaction: either the
+        # sale happened completely or not at all.
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT INTO inventory (item, qty) VALUES (?, ?) "
+                                  "ON CONFLICT(item) DO UPDATE SET qty = qty + excluded.qty",
+                                  [(ing, -amt) for ing, amt in usage.items()])
+            self._insert_receipts([receipt])
+
+    def _insert_receipts(self, receipts):
+        self.conn.executemany("INSERT OR IGNORE INTO receipts (id, date, total, items) VALUES (?, ?, ?, ?)",
+                              [(r['id'], r.get('date'), r.get('total'), json.dumps(r.get('items', [])))
+                               for r in receipts])
+
+    def _to_receipt(self, row):
+        return {"id": row[0], "date": row[1], "total": row[2], "items": json.loads(row[3])}
+
+    def count_receipts(self):
+        return self._rows("SELECT COUNT(*) FROM receipts")[0][0]
+
+    def iter_receipts(self, newest_first=False):
+        # Separate read connection: WAL lets this stream while sales keep coming in.
+        conn = sqlite3.connect(self.db_file)
+        try:
+            order = "DESC" if newest_first else "ASC"
+            for row in conn.execute(f"SELECT id, date, total, items FROM receipts ORDER BY seq {order}"):
+                yield self._to_receipt(row)
+        finally:
+            conn.close()
+
+    def receipts_page(self, offset, limit, newest_first=True):
+        order = "DESC" if newest_first else "ASC"
+        rows = self._rows(f"SELECT id, date, total, items FROM receipts ORDER BY seq {order} LIMIT ? OFFSET ?",
+                          (limit, offset))
+        return [self._to_receipt(row) for row in rows]
+
+    def get_receipts(self, ids):
+        ids, found = list(ids), {}
+        if not ids: return []
+        for start in range(0, len(ids), 500):  # stay under SQLite's bound-parameter limit
+            chunk = ids[start:start + 500]
+            rows = self._rows(f"SELECT id, date, total, items FROM receipts WHERE id IN ({','.join('?' * len(chunk))})",
+                              chunk)
+            found.update((row[0], self._to_receipt(row)) for row in rows)
+        return [found[i] for i in ids if i in found]
+
+    def clear_receipts(self):
+        with self.lock, self.conn: self.conn.execute("DELETE FROM receipts")
+
+    # One-time import of the old JSON files
+    def migrate_from(self, json_storage):
+        if self._get_meta("migrated_from_json"): return False
+        inventory = json_storage.load_inventory()
+        products = json_storage.load_products()
+        images = json_storage.load_images()
+        costs = json_storage.load_costs()
+        shift_start = json_storage.load_shift_start()
+        shift_stats = json_storage.load_shift_stats()
+        receipts = list(json_storage.iter_receipts())
+        with self.lock, self.conn:
+            if inventory: self._upsert_qty("inventory", inventory)
+            if products: self._upsert_prices(self._price_rows(products))
+            if images:
+                self.conn.executemany("INSERT OR IGNORE INTO images (product, path) VALUES (?, ?)", images.items())
+            if costs: self._upsert_costs(costs)
+            if shift_start is not None:
+                self._upsert_qty("shift_start", shift_start)
+                self._set_meta("shift_open", "1")
+            if shift_stats: self._set_meta("shift_stats", json.dumps(shift_stats))
+            self._insert_receipts(receipts)
+            self._set_meta("migrated_from_json", time.strftime("%Y-%m-%d %H:%M:%S"))
+        self.ids.seed(receipts)
+        return True
+
+    def close(self):
+        with self.lock: self.conn.close()
+
+
+# --- WRITE-BEHIND ---
+class WriteBehindWriter:
+    # Runs saves on a background thread. Saves are keyed ("inventory",
+    # "products", ...); submitting the same key again before it is written just
+    # replaces the pending one, so a burst of edits becomes a single write.
+    def __init__(self, delay=0.5):
+        self.delay = delay
+        self._pending = {}  # key -> (fn, args)
+        self._in_flight = set()
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, key, fn, *args):
+        with self._cond:
+            self._pending[key] = (fn, args)
+            self._cond.notify()
+
+    def is_dirty(self, key):
+        with self._cond: return key in self._pending or key in self._in_flight
+
+    def flush(self):
+        # Write everything now on the calling thread (waits for a batch the
+        # worker is already writing).
+        with self._write_lock: self._write(self._take())
+
+    def stop(self):
+        self._stop.set()
+        with self._cond: self._cond.notify()
+        self.flush()
+
+    def _take(self):
+        with self._cond:
+            batch, self._pending = self._pending, {}
+            self._in_flight = set(batch)
+        return batch
+
+    def _write(self, batch):
+        for key, (fn, args) in batch.items():
+            try:
+                with metrics.span(fn.__name__): fn(*args)
+            except Exception as e:
+                print(f"Background save of {key} failed: {e}")
+                with self._cond: self._pending.setdefault(key, (fn, args))  # retry next round
+        with self._cond: self._in_flight = set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                while not self._pending and not self._stop.is_set(): self._cond.wait()
+            if self._stop.wait(self.delay): return  # collect repeated saves into one batch
+            with self._write_lock: self._write(self._take())
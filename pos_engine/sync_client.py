@@ -0,0 +1,158 @@
+# --- SYNC CLIENT ---
+# Connects one PosEngine to the sync server. Sales and stock counts go into a
+# file-backed outbox first, so a terminal keeps selling while the server or the
+# Wi-Fi is down and catches up when it is back.
+#
+# The network runs on its own asyncio thread. Everything that touches the engine
+# or the outbox order (acks, snapshots, updates) is handed to engine.call_soon,
+# i.e. the UI thread, in the order it arrived.
+import asyncio
+import itertools
+import threading
+import time
+import uuid
+
+from . import config
+from .outbox import Outbox
+from .protocol import MAX_MESSAGE, read_message, send_message
+
+
+class SyncClient:
+    def __init__(self, engine, host, port=config.SYNC_PORT, terminal_id="pos", outbox_path=None,
+                 batch_size=config.SYNC_BATCH_SIZE, flush_interval=config.SYNC_FLUSH_INTERVAL,
+                 retry_delay=config.SYNC_RETRY_DELAY):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.terminal_id = terminal_id
+        self.instance = uuid.uuid4().hex  # tells the server a reconnect from a second terminal with our id
+        self.outbox = Outbox(outbox_path or engine.path(config.SYNC_OUTBOX_FILE))
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self.connected = False
+        self._count_ids = itertools.count()
+        self._loop = None
+        self._wake = None
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        self.engine.bind("sale", self.on_sale)
+        self.engine.bind("stock_counted", self.on_stock_counted)
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), name="pos-sync", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.engine.unbind("sale", self.on_sale)
+        self.engine.unbind("stock_counted", self.on_stock_counted)
+        self._stopping = True
+        self._poke()
+        if self._thread: self._thread.join(timeout=5)
+
+    # --- LOCAL CHANGES (UI thread) ---
+    def on_sale(self, receipt, usage):
+        self.outbox.append({"key": receipt["id"], "op": "sale", "receipt": receipt, "usage": usage})
+        self._poke()
+
+    def on_stock_counted(self, item, raw_qty):
+        key = f"count-{time.time_ns()}-{next(self._count_ids)}"
+        self.outbox.append({"key": key, "op": "count", "item": item, "qty": raw_qty})
+        self._poke()
+
+    def _poke(self):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass  # loop shutting down
+
+    # --- SERVER MESSAGES (UI thread) ---
+    def pending_levels(self, base):
+        # The server's figures do not include our unacknowledged ops yet; replay them
+        # on top so local stock keeps showing what this terminal already sold
+        levels = dict(base)
+        for op in self.outbox.pending():
+            if op["op"] == "sale":
+                for ing, amt in op["usage"].items():
+                    if ing in levels: levels[ing] -= amt
+            elif op["op"] == "count" and op["item"] in levels:
+                levels[op["item"]] = op["qty"]
+        return levels
+
+    def handle_message(self, message):
+        kind = message.get("type")
+        if kind == "ack":
+            self.outbox.remove(message["keys"])
+        elif kind == "snapshot":
+            self.outbox.remove(message.get("applied", []))
+            self.engine.apply_inventory_update(levels=self.pending_levels(message["inventory"]))
+        elif kind == "update" and message.get("origin") != self.terminal_id:
+            self.engine.apply_inventory_update(message.get("usage"), self.pending_levels(message.get("levels", {})))
+        elif kind == "error":
+            print(f"Sync: server refused this terminal: {message.get('error')}")
+
+    # --- NETWORK (sync thread) ---
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        while not self._stopping:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port, limit=MAX_MESSAGE)
+            except OSError:
+                self._wake.clear()
+                await self._sleep(self.retry_delay)
+                continue
+            try:
+                await self._session(reader, writer)
+            except (ConnectionError, OSError, ValueError) as e:
+                print(f"Sync: connection lost: {e}")
+            finally:
+                self.connected = False
+                writer.close()
+            if not self._stopping:
+                self._wake.clear()
+                await self._sleep(self.retry_delay)
+
+    async def _sleep(self, delay):
+        # Until the delay is up or something pokes us (new op, stop, lost connection)
+        try:
+            await asyncio.wait_for(self._wake.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _session(self, reader, writer):
+        pending = [op["key"] for op in self.outbox.pending() if op["op"] == "sale"]
+        await send_message(writer, {"type": "hello", "terminal": self.terminal_id, "instance": self.instance,
+                                    "pending": pending})
+        receiver = asyncio.ensure_future(self._receive(reader))
+        self.connected = True
+        sent = set()  # keys in flight on this connection; everything is re-sent after a reconnect
+        try:
+            while not self._stopping and not receiver.done():
+                self._wake.clear()
+                batch = [op for op in self.outbox.pending() if op["key"] not in sent][:self.batch_size]
+                if batch:
+                    await send_message(writer, {"type": "ops", "ops": [self._wire(op) for op in batch]})
+                    sent.update(op["key"] for op in batch)
+                await self._sleep(self.flush_interval if batch else 60)
+        finally:
+            receiver.cancel()
+        if receiver.done() and not receiver.cancelled() and receiver.exception():
+            raise receiver.exception()
+
+    async def _receive(self, reader):
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None: raise ConnectionError("server closed the connection")
+                self.engine.call_soon(self.handle_message, message)
+        finally:
+            self._wake.set()  # let the sender notice
+
+    @staticmethod
+    def _wire(op):
+        # Local usage stays in the outbox only; the server works it out from the recipes
+        return {k: v for k, v in op.items() if k != "usage"}
@@ -0,0 +1,144 @@
+# --- SYNC SERVER ---
+# One process on the LAN (a tablet or a small box) owns the shared inventory and
+# the receipt stream of every terminal.
+#
+#   terminal -> server  {"type": "hello", "terminal": "T1", "instance": "..", "pending": [keys]}
+#   server -> terminal  {"type": "snapshot", "inventory": {...}, "applied": [keys]}
+#                     | {"type": "error", "error": ".."}  (terminal id already connected; then closed)
+#   terminal -> server  {"type": "ops", "ops": [{"key": .., "op": "sale", "receipt": {..}}
+#                                              | {"key": .., "op": "count", "item": .., "qty": ..}]}
+#   server -> terminal  {"type": "ack", "keys": [keys]}
+#   server -> others    {"type": "update", "origin": "T1", "usage": {...}, "levels": {...}}
+#
+# Sales only ever subtract, so terminals can apply each other's usage in any
+# order. Each sale is stored once under "<terminal>-<receipt id>"; a batch that
+# is re-sent after a dropped connection is acknowledged again but not re-applied.
+# That needs terminal ids to be unique, so a second live connection with the same
+# id is refused unless it comes from the same running client (its "instance"),
+# which is then reconnecting and replaces its dead connection.
+#
+#   python -m pos_engine.sync_server --data-dir sync_data --port 8765
+import argparse
+import asyncio
+
+from . import config
+from .engine import PosEngine
+from .protocol import MAX_MESSAGE, read_message, send_message, encode
+
+
+class SyncServer:
+    def __init__(self, data_dir="sync_data", host="0.0.0.0", port=config.SYNC_PORT, backend=config.STORAGE_BACKEND):
+        self.host = host
+        self.port = port
+        self.engine = PosEngine(data_dir=data_dir, backend=backend)
+        self.applied = set()  # stored sale keys
+        self.clients = {}     # writer -> terminal id
+        self.live = {}        # terminal id -> (instance, writer) of its open connection
+        self.server = None
+
+    async def start(self):
+        self.engine.open()
+        self.applied = {r['id'] for r in self.engine.storage.iter_receipts()}
+        self.server = await asyncio.start_server(self.handle, self.host, self.port, limit=MAX_MESSAGE)
+        self.port = self.server.sockets[0].getsockname()[1]  # the real one when started on port 0
+        return self
+
+    async def serve_forever(self):
+        async with self.server: await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        for writer in list(self.clients): writer.close()
+        await self.server.wait_closed()
+        self.engine.flush()
+        self.engine.close()
+
+    @staticmethod
+    def sale_key(terminal, receipt_id):
+        return f"{terminal}-{receipt_id}"
+
+    async def handle(self, reader, writer):
+        terminal = None
+        try:
+            hello = await read_message(reader)
+            if not hello or hello.get("type") != "hello": return
+            terminal, instance = str(hello["terminal"]), hello.get("instance")
+            live = self.live.get(terminal)
+            if live and (instance is None or live[0] != instance):
+                print(f"Sync: refused a second connection for terminal {terminal}")
+                await send_message(writer, {"type": "error", "error": f"terminal id {terminal} is already connected"})
+                return
+            if live: live[1].close()  # the same client reconnecting; its old connection is dead
+            self.live[terminal] = (instance, writer)
+            applied = [k for k in hello.get("pending", []) if self.sale_key(terminal, k) in self.applied]
+            # Registered before anything can await: an update applied after this snapshot must reach it
+            writer.write(encode({"type": "snapshot", "inventory": self.engine.inventory, "applied": applied}))
+            self.clients[writer] = terminal
+            await writer.drain()
+            while True:
+                message = await read_message(reader)
+                if message is None: break
+                if message.get("type") == "ops": await self.apply_ops(terminal, message["ops"], writer)
+        except (ConnectionError, ValueError, KeyError) as e:
+            print(f"Sync: dropped terminal connection: {e}")
+        finally:
+            self.clients.pop(writer, None)
+            if self.live.get(terminal, (None, None))[1] is writer: del self.live[terminal]
+            writer.close()
+
+    async def apply_ops(self, terminal, ops, writer):
+        usage, counted = {}, set()
+        for op in ops:
+            if op["op"] == "sale":
+                for ing, amt in self.apply_sale(terminal, op["receipt"]).items(): usage[ing] = usage.get(ing, 0) + amt
+            elif op["op"] == "count":
+                self.engine.set_stock_count(op["item"], op["qty"])
+                counted.add(op["item"])
+        # Counted items go out as absolute figures (taken after the whole batch), the rest as usage
+        levels = {item: self.engine.inventory[item] for item in counted}
+        usage = {ing: amt for ing, amt in usage.items() if ing not in levels}
+        # Ack before anything can await, so this terminal sees it ahead of any later update
+        writer.write(encode({"type": "ack", "keys": [op["key"] for op in ops]}))
+        if usage or levels: self.broadcast(terminal, {"type": "update", "origin": terminal, "usage": usage,
+                                                      "levels": levels})
+        await writer.drain()
+
+    def apply_sale(self, terminal, receipt):
+        key = self.sale_key(terminal, receipt["id"])
+        if key in self.applied: return {}
+        counts = {}
+        for item in receipt["items"]: counts[item["name"]] = counts.get(item["name"], 0) + item.get("qty", 1)
+        usage = self.engine.record_sale(dict(receipt, id=key, terminal=terminal), counts)
+        self.applied.add(key)
+        return usage
+
+    def broadcast(self, origin, message):
+        data = encode(message)
+        for writer, terminal in list(self.clients.items()):
+            if terminal != origin: writer.write(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared inventory and receipt server for several POS terminals.")
+    parser.add_argument("--data-dir", default="sync_data")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=config.SYNC_PORT)
+    parser.add_argument("--backend", choices=["sqlite", "json"], default=config.STORAGE_BACKEND)
+    args = parser.parse_args(argv)
+
+    async def run():
+        server = await SyncServer(args.data_dir, args.host, args.port, args.backend).start()
+        print(f"Sync server listening on {args.host}:{server.port}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# --- UPLOAD SERVER (stand-in) ---
+# A minimal head-office endpoint for trying out and testing the uploader on a
+# LAN or a laptop. Items are stored once per key; repeats are counted and dropped.
+# Reports land in <data-dir>/reports/<terminal>/, receipts in <data-dir>/receipts.jsonl.
+#
+#   python -m pos_engine.upload_server --data-dir head_office --port 8780 [--fail-rate 0.3]
+#   (terminal: UPLOAD_URL = "http://<this machine>:8780/upload" in script1.py)
+import argparse
+import gzip
+import json
+import os
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import config
+
+
+class UploadStore:
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.receipts_path = os.path.join(data_dir, "receipts.jsonl")
+        self.keys_path = os.path.join(data_dir, "received_keys.txt")
+        self.lock = threading.Lock()
+        self.duplicates = 0
+        if not os.path.exists(data_dir): os.makedirs(data_dir)
+        self.keys = set()
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path) as f: self.keys = {line.rstrip("\n") for line in f if line.strip()}
+
+    def accept(self, terminal, items):
+        # -> (stored, duplicates). Data is written before its key, so a crash can
+        # only cause a repeat to be stored again, never a loss.
+        with self.lock:
+            new = [item for item in items if item["key"] not in self.keys]
+            self.duplicates += len(items) - len(new)
+            receipts = [item for item in new if item["kind"] == "receipt"]
+            if receipts:
+                with open(self.receipts_path, 'a') as f:
+                    for item in receipts: f.write(json.dumps({"terminal": terminal, **item["receipt"]}) + "\n")
+            for item in new:
+                if item["kind"] == "report" and item.get("csv") is not None:
+                    folder = os.path.join(self.data_dir, "reports", os.path.basename(terminal))
+                    if not os.path.exists(folder): os.makedirs(folder)
+                    with open(os.path.join(folder, os.path.basename(item["name"])), 'w', encoding="utf-8") as f:
+                        f.write(item["csv"])
+            with open(self.keys_path, 'a') as f:
+                for item in new: f.write(item["key"] + "\n")
+            self.keys.update(item["key"] for item in new)
+            stored = len(new)
+        return stored, len(items) - stored
+
+
+class UploadHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if random.random() < self.server.fail_rate: return self.reply(503, {"error": "simulated outage"})
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.headers.get("Content-Encoding") == "gzip": body = gzip.decompress(body)
+            batch = json.loads(body)
+            stored, duplicates = self.server.store.accept(str(batch["terminal"]), batch["items"])
+        except (ValueError, KeyError, TypeError, OSError) as e:
+            return self.reply(400, {"error": str(e)})
+        self.reply(200, {"stored": stored, "duplicates": duplicates})
+
+    def reply(self, status, message):
+        data = json.dumps(message).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        pass  # one line per batch is noise; errors come back in the response
+
+
+def make_server(data_dir="head_office", host="0.0.0.0", port=config.UPLOAD_SERVER_PORT, fail_rate=0.0):
+    server = ThreadingHTTPServer((host, port), UploadHandler)
+    server.store = UploadStore(data_dir)
+    server.fail_rate = fail_rate
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in head-office endpoint for POS uploads.")
+    parser.add_argument("--data-dir", default="head_office")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=config.UPLOAD_SERVER_PORT)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 503")
+    args = parser.parse_args(argv)
+    server = make_server(args.data_dir, args.host, args.port, args.fail_rate)
+    print(f"Upload server listening on {args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
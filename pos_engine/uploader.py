@@ -0,0 +1,122 @@
+# --- HEAD OFFICE UPLOAD ---
+# Sends every receipt and end-of-shift report to a head-office HTTP endpoint.
+# Items are queued in a file-backed outbox (outbox.py, as the sync client does)
+# the moment they exist, and a background thread POSTs them in gzipped batches,
+# so a sale never waits on the network and nothing is lost across restarts.
+#
+#   POST <url>   Content-Encoding: gzip, Idempotency-Key: <hash of the item keys>
+#   {"terminal": "T1", "items": [{"key": "T1:receipt:1712345678", "kind": "receipt", "receipt": {..}}
+#                               | {"key": "T1:report:Report_..csv", "kind": "report", "name": .., "csv": ".."}]}
+#   -> any 2xx: the whole batch is removed from the outbox
+#
+# An item leaves the outbox only after a 2xx, so a crash in between means it is
+# sent again; the server drops items whose key it has already stored.
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+
+from . import config
+from .outbox import Outbox
+
+
+def backoff(failures, base=config.UPLOAD_RETRY_BASE, cap=config.UPLOAD_RETRY_MAX):
+    # Exponential with jitter, so terminals that lost the same link do not retry in step
+    return min(cap, base * 2 ** (failures - 1)) * random.uniform(0.5, 1.0)
+
+
+class Uploader:
+    def __init__(self, engine, url, terminal_id="pos", token=None, outbox_path=None,
+                 batch_size=config.UPLOAD_BATCH_SIZE, gather_delay=config.UPLOAD_GATHER_DELAY,
+                 timeout=config.UPLOAD_TIMEOUT):
+        self.engine = engine
+        self.url = url
+        self.terminal_id = terminal_id
+        self.token = token
+        self.outbox = Outbox(outbox_path or engine.path(config.UPLOAD_OUTBOX_FILE))
+        self.batch_size = batch_size
+        self.gather_delay = gather_delay
+        self.timeout = timeout
+        self.failures = 0        # consecutive failed batches
+        self.last_error = None
+        self.last_upload = None  # time of the last accepted batch
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.engine.bind("sale", self.on_sale)
+        self.engine.bind("shift_closed", self.on_shift_closed)
+        self._thread = threading.Thread(target=self._run, name="upload", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.engine.unbind("sale", self.on_sale)
+        self.engine.unbind("shift_closed", self.on_shift_closed)
+        self._stop.set()
+        self._wake.set()
+        if self._thread: self._thread.join(timeout=self.timeout + 1)
+
+    def pending(self):
+        return len(self.outbox)
+
+    # --- QUEUEING (UI thread) ---
+    def on_sale(self, receipt, usage):
+        self.enqueue({"key": f"{self.terminal_id}:receipt:{receipt['id']}", "kind": "receipt", "receipt": receipt})
+
+    def on_shift_closed(self, paths):
+        # paths[0] is the CSV report; the archive and gzip copies stay on the device
+        name = os.path.basename(paths[0])
+        self.enqueue({"key": f"{self.terminal_id}:report:{name}", "kind": "report", "name": name, "path": paths[0]})
+
+    def enqueue(self, item):
+        self.outbox.append(item)
+        self._wake.set()
+
+    # --- SENDING (upload thread) ---
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self.outbox.pending()[:self.batch_size]
+            if not batch:
+                self._wake.wait()
+                self._wake.clear()
+                if self._stop.wait(self.gather_delay): return  # let a burst of sales become one batch
+                continue
+            try:
+                self.send(batch)
+            except (OSError, ValueError, http.client.HTTPException) as e:  # HTTPError/URLError are OSErrors
+                self.failures += 1
+                self.last_error = str(e)
+                print(f"Upload: batch of {len(batch)} failed ({e}); retry #{self.failures}")
+                self._stop.wait(backoff(self.failures))
+                continue
+            self.outbox.remove(op["key"] for op in batch)
+            self.failures = 0
+            self.last_error = None
+            self.last_upload = time.time()
+
+    def send(self, batch):
+        items = [self._wire(op) for op in batch]
+        body = gzip.compress(json.dumps({"terminal": self.terminal_id, "items": items},
+                                        separators=(",", ":")).encode("utf-8"))
+        headers = {"Content-Type": "application/json", "Content-Encoding": "gzip",
+                   "Idempotency-Key": hashlib.sha256("\n".join(op["key"] for op in batch).encode()).hexdigest()}
+        if self.token: headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(self.url, data=body, headers=headers, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response: response.read()
+
+    @staticmethod
+    def _wire(op):
+        # Reports are queued by path and read only when sent
+        if op["kind"] != "report": return op
+        try:
+            with open(op["path"], encoding="utf-8") as f: csv = f.read()
+        except OSError:
+            csv = None  # deleted from the device; head office still learns the shift existed
+        return {"key": op["key"], "kind": "report", "name": op["name"], "csv": csv}
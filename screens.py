@@ -0,0 +1,370 @@
+# --- SECONDARY SCREENS ---
+# Inventory, dashboard, sales history and admin are only needed once someone
+# leaves the POS screen, so CafeApp imports this module and builds them on
+# first visit instead of at startup.
+import os
+import time
+
+from kivy.clock import Clock
+from kivy.lang import Builder
+from kivy.properties import StringProperty, BooleanProperty
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.behaviors import ButtonBehavior
+from kivy.uix.scrollview import ScrollView
+from kivymd.app import MDApp
+from kivymd.uix.screen import MDScreen
+from kivymd.uix.dialog import MDDialog
+from kivymd.uix.button import MDFlatButton, MDRaisedButton
+from kivymd.uix.list import OneLineAvatarIconListItem, ThreeLineAvatarIconListItem, OneLineListItem, TwoLineListItem
+from kivymd.uix.textfield import MDTextField
+from kivymd.uix.label import MDLabel
+from kivymd.toast import toast
+
+from pos_engine import UNIT_SIZES, PosError, item_label
+from pos_engine.metrics import metrics, timed
+from pos_engine.inventory_model import InventoryModel, SORTS
+
+RECEIPT_PAGE_SIZE = 50  # receipts fetched per page on the Sales History screen
+SEARCH_DELAY = 0.3      # seconds of no typing before the receipt search runs
+KV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'screens.kv')
+
+# The list-row rules need KivyMD's own list rules (imported above) loaded first
+Builder.load_file(KV_FILE)
+
+
+class InventoryRow(ButtonBehavior, BoxLayout):
+    name = StringProperty()
+    start_qty = StringProperty()
+    current_qty = StringProperty()
+    low = BooleanProperty(False)
+
+    def on_release(self):
+        app = MDApp.get_running_app()
+        raw_start = app.engine.shift_start.get(self.name, 0)
+        unit_size = UNIT_SIZES.get(self.name, 1)
+        display_start = raw_start / unit_size
+
+        content = BoxLayout(orientation='vertical', spacing="10dp", padding="10dp", size_hint_y=None, height="100dp")
+        start_text = f"{display_start:.2f}"
+        qty_field = MDTextField(text=start_text, hint_text="Actual Quantity (Units)", input_type="number")
+        content.add_widget(qty_field)
+
+        def save_changes(x):
+            try:
+                # Confirming the untouched figure is not a count: it would undo this shift's sales
+                if qty_field.text != start_text:
+                    app.engine.set_stock_count(self.name, float(qty_field.text) * unit_size)
+                    toast(f"Stock Reset: {self.name}")
+                dialog.dismiss()
+            except ValueError:
+                toast("Please enter valid numbers")
+            except PosError as e:
+                toast(str(e))
+
+        dialog = MDDialog(title=f"Count Stock: {self.name}", type="custom", content_cls=content,
+                          buttons=[MDFlatButton(text="CANCEL", on_release=lambda x: dialog.dismiss()),
+                                   MDRaisedButton(text="CONFIRM", on_release=save_changes)])
+        dialog.open()
+
+
+class InventoryScreen(MDScreen):
+    sort = StringProperty("default")
+    sort_label = StringProperty(SORTS["default"])
+    low_only = BooleanProperty(False)
+    model = None      # InventoryModel, created on first visit and kept current by engine events
+    positions = {}    # item -> index in the RecycleView data
+
+    def on_enter(self):
+        if self.model is None:
+            self.model = InventoryModel(MDApp.get_running_app().engine)
+            self.model.bind("rows_changed", self.on_rows_changed)
+            self.model.bind("reloaded", self.load_inventory)
+        self.load_inventory()
+
+    @timed("load_inventory")
+    def load_inventory(self, *args):
+        if self.model is None: return  # filter text set before the first visit
+        rows = self.model.view(self.sort, self.ids.inventory_search.text, self.low_only)
+        self.positions = {row["name"]: i for i, row in enumerate(rows)}
+        self.ids.inventory_list.data = rows
+
+    def on_rows_changed(self, items):
+        # Same rows in the same order: swap in just the changed ones; otherwise re-sort the data
+        rows = self.model.view(self.sort, self.ids.inventory_search.text, self.low_only)
+        if [row["name"] for row in rows] != list(self.positions): return self.load_inventory()
+        data = self.ids.inventory_list.data
+        for item in items:
+            if item in self.positions: data[self.positions[item]] = self.model.rows[item]
+
+    def next_sort(self):
+        names = list(SORTS)
+        self.sort = names[(names.index(self.sort) + 1) % len(names)]
+        self.sort_label = SORTS[self.sort]
+        self.load_inventory()
+
+    def toggle_low_only(self):
+        self.low_only = not self.low_only
+        self.load_inventory()
+
+
+class DashboardScreen(MDScreen):
+    def on_enter(self): self.load_dashboard()
+
+    @timed("load_dashboard")
+    def load_dashboard(self):
+        # Everything comes from the running shift totals; no receipt scan
+        stats = MDApp.get_running_app().engine.stats
+        self.ids.revenue_label.text = f"Revenue\nP{stats.revenue}"
+        self.ids.tickets_label.text = f"Orders\n{stats.tickets}"
+        self.ids.average_label.text = f"Avg Ticket\nP{stats.average_ticket:.2f}"
+        self.ids.margin_label.text = f"Margin\nP{stats.margin:.2f} ({stats.margin_rate:.0%})"
+        dashboard_list = self.ids.dashboard_list
+        dashboard_list.clear_widgets()
+
+        dashboard_list.add_widget(OneLineListItem(text="[b]SALES BY ITEM[/b]"))
+        for sku, qty in stats.top_products():
+            revenue = stats.sku_revenue[sku]
+            margin = revenue - stats.sku_cost.get(sku, 0)
+            dashboard_list.add_widget(TwoLineListItem(text=sku, secondary_text=f"{qty} sold - P{revenue} - margin P{margin:.2f}"))
+
+        dashboard_list.add_widget(OneLineListItem(text="[b]SALES BY HOUR[/b]"))
+        for hour, (tickets, revenue) in sorted(stats.hourly.items()):
+            dashboard_list.add_widget(TwoLineListItem(text=f"{hour}:00", secondary_text=f"{tickets} orders - P{revenue}"))
+
+        dashboard_list.add_widget(OneLineListItem(text="[b]INGREDIENT USAGE[/b]"))
+        for ing, amt in stats.ingredients.items():
+            dashboard_list.add_widget(
+                TwoLineListItem(text=ing, secondary_text=f"{amt / UNIT_SIZES.get(ing, 1):.2f} units used"))
+
+
+class ReceiptRow(ThreeLineAvatarIconListItem): pass
+
+
+class ReceiptsScreen(MDScreen):
+    loaded = 0           # receipts already in the list (newest first)
+    exhausted = False    # no older receipts left in storage
+    needs_reload = True  # list has to be rebuilt on next visit (first visit, shift end)
+    searching = False    # list shows search results instead of the paged history
+
+    def on_enter(self):
+        # Warm the search index off the UI thread while the list is being read
+        MDApp.get_running_app().engine.build_receipt_index(background=True)
+        if self.needs_reload:
+            self.ids.search_field.text = ""
+            self.load_receipts()
+
+    def on_search_text(self, text):
+        Clock.unschedule(self.run_search)
+        Clock.schedule_once(self.run_search, SEARCH_DELAY)
+
+    def run_search(self, *args):
+        text = self.ids.search_field.text.strip()
+        if not text:
+            if self.searching: self.load_receipts()
+            return
+        self.searching = True
+        self.exhausted = True
+        results = MDApp.get_running_app().engine.search_receipts(text)
+        self.ids.receipt_list.data = [self.row_data(r) for r in results]
+
+    @timed("load_receipts")
+    def load_receipts(self):
+        self.needs_reload = False
+        self.searching = False
+        self.loaded = 0
+        self.exhausted = False
+        self.ids.receipt_list.data = []
+        self.load_more()
+
+    def load_more(self):
+        if self.exhausted: return
+        page = MDApp.get_running_app().engine.receipts_page(self.loaded, RECEIPT_PAGE_SIZE)
+        self.loaded += len(page)
+        self.exhausted = len(page) < RECEIPT_PAGE_SIZE
+        self.ids.receipt_list.data.extend(self.row_data(r) for r in page)
+
+    def on_scroll(self, rv):
+        if rv.scroll_y <= 0.05: self.load_more()
+
+    def add_receipt(self, receipt):
+        # New sale: prepend one row instead of rebuilding the list
+        if self.needs_reload or self.searching: return
+        self.ids.receipt_list.data.insert(0, self.row_data(receipt))
+        self.loaded += 1
+
+    def row_data(self, r):
+        item_summary = ", ".join([item_label(item) for item in r['items']])
+        margin = MDApp.get_running_app().engine.receipt_margin(r)
+        date = r['date'] if margin is None else f"{r['date']} - margin P{margin:.2f}"
+        return {"text": f"Order #{r['id']} - P{r['total']}", "secondary_text": date,
+                "tertiary_text": item_summary}
+
+
+class PriceRow(OneLineAvatarIconListItem):
+    cat = StringProperty()
+    name = StringProperty()
+    drink_size = StringProperty()  # not `size`: that is the widget's own size
+    selected = BooleanProperty(False)
+    batch = BooleanProperty(False)  # show a checkbox instead of the edit icon
+
+
+def whole(price):
+    return int(price) if float(price).is_integer() else price
+
+
+class AdminScreen(MDScreen):
+    batch_mode = BooleanProperty(False)
+    status = StringProperty()
+    rows = []        # (cat, name, size, lowercase search text), menu order
+    selected = set()  # (cat, name, size) ticked in batch mode
+
+    def on_enter(self):
+        self.load_prices()
+
+    @timed("load_prices")
+    def load_prices(self):
+        # Plain row data; the RecycleView only makes widgets for the visible rows
+        products = MDApp.get_running_app().engine.products
+        self.rows = [(cat, name, size, f"{cat} {name} {size}".lower())
+                     for cat, items in products.items() for name, sizes in items.items() for size in sizes]
+        self.show_rows()
+
+    def show_rows(self):
+        products = MDApp.get_running_app().engine.products
+        words = self.ids.price_search.text.lower().split()
+        self.ids.price_list.data = [{"text": f"{name} {size} - P{products[cat][name][size]}", "cat": cat,
+                                     "name": name, "drink_size": size, "selected": (cat, name, size) in self.selected,
+                                     "batch": self.batch_mode}
+                                    for cat, name, size, text in self.rows if all(w in text for w in words)]
+        self.show_status()
+
+    def show_status(self):
+        self.status = f"{len(self.selected)} selected" if self.batch_mode else "Tap a product below to edit price:"
+
+    def toggle_batch(self):
+        self.batch_mode = not self.batch_mode
+        self.selected = set()
+        self.show_rows()
+
+    def on_row(self, row):
+        if not self.batch_mode: return self.edit_price(row.cat, row.name, row.drink_size)
+        key = (row.cat, row.name, row.drink_size)
+        self.selected ^= {key}
+        for item in self.ids.price_list.data:
+            if (item["cat"], item["name"], item["drink_size"]) == key: item["selected"] = key in self.selected
+        self.ids.price_list.refresh_from_data()
+        self.show_status()
+
+    def select_shown(self, select=True):
+        # Type a category or product in the filter, then tick everything it shows
+        shown = {(item["cat"], item["name"], item["drink_size"]) for item in self.ids.price_list.data}
+        self.selected = self.selected | shown if select else self.selected - shown
+        self.show_rows()
+
+    def edit_price(self, category, product_name, size):
+        app = MDApp.get_running_app()
+        field = MDTextField(text=str(app.engine.products[category][product_name][size]), hint_text="Enter new price")
+
+        def save(x):
+            try:
+                price = float(field.text)
+            except ValueError:
+                return toast("Invalid")
+            dialog.dismiss()
+            if app.engine.update_price(category, product_name, size, whole(price)): self.show_rows()
+
+        dialog = MDDialog(title=f"Edit: {product_name} {size}", type="custom", content_cls=field,
+                          buttons=[MDFlatButton(text="CANCEL", on_release=lambda x: dialog.dismiss()),
+                                   MDRaisedButton(text="SAVE", on_release=save)])
+        dialog.open()
+
+    def open_batch_edit(self, mode):
+        # mode "percent": +/- N% on every ticked row (rounded to whole pesos); "price": one price for all
+        if not self.selected: return toast("Tick some products first")
+        app = MDApp.get_running_app()
+        hint = "Change in % (e.g. 10 or -5)" if mode == "percent" else "New price"
+        field = MDTextField(hint_text=hint)
+
+        def apply(x):
+            try:
+                value = float(field.text)
+            except ValueError:
+                return toast("Invalid")
+            products = app.engine.products
+            changes = [(cat, name, size, round(products[cat][name][size] * (1 + value / 100)) if mode == "percent"
+                        else whole(value)) for cat, name, size in sorted(self.selected)]
+            changed = app.engine.update_prices(changes)
+            dialog.dismiss()
+            toast(f"Updated {len(changed)} prices")
+            self.selected = set()
+            self.show_rows()
+
+        title = f"{'Adjust' if mode == 'percent' else 'Set'} {len(self.selected)} prices"
+        dialog = MDDialog(title=title, type="custom", content_cls=field,
+                          buttons=[MDFlatButton(text="CANCEL", on_release=lambda x: dialog.dismiss()),
+                                   MDRaisedButton(text="APPLY", on_release=apply)])
+        dialog.open()
+
+    def open_costs(self):
+        # Cost per purchase unit of every ingredient; only the figures edited here are saved
+        app = MDApp.get_running_app()
+        costs = app.engine.costs
+        shown = {ing: f"{costs.get(ing, 0):g}" for ing in dict.fromkeys(list(app.engine.inventory) + list(costs))}
+        box = BoxLayout(orientation='vertical', size_hint_y=None)
+        box.bind(minimum_height=box.setter('height'))
+        fields = {}
+        for ing, text in shown.items():
+            fields[ing] = MDTextField(text=text, hint_text=f"{ing} (P per unit)", input_type="number")
+            box.add_widget(fields[ing])
+        scroll = ScrollView(size_hint_y=None, height="400dp")
+        scroll.add_widget(box)
+
+        def save(x):
+            try:
+                edited = {ing: float(field.text) for ing, field in fields.items() if field.text != shown[ing]}
+            except ValueError:
+                return toast("Invalid")
+            dialog.dismiss()
+            toast(f"Updated {len(app.engine.update_costs(edited))} costs")
+
+        dialog = MDDialog(title="Ingredient Costs", type="custom", content_cls=scroll,
+                          buttons=[MDFlatButton(text="CANCEL", on_release=lambda x: dialog.dismiss()),
+                                   MDRaisedButton(text="SAVE", on_release=save)])
+        dialog.open()
+
+    def open_diagnostics(self):
+        # Span timings (ms) and frame stats, refreshed every second while open
+        app = MDApp.get_running_app()
+        label = MDLabel(font_name="RobotoMono-Regular", font_size="12sp", size_hint_y=None)
+        label.bind(texture_size=lambda w, size: setattr(w, "height", size[1]))
+        scroll = ScrollView(size_hint_y=None, height="320dp")
+        scroll.add_widget(label)
+
+        def refresh(*args):
+            label.text = metrics.report() if metrics.enabled or metrics.series else "Instrumentation is off."
+            toggle.text = "DISABLE" if metrics.enabled else "ENABLE"
+
+        def toggle_metrics(x):
+            app.set_metrics(not metrics.enabled)
+            refresh()
+
+        def clear(x):
+            metrics.clear()
+            refresh()
+
+        def export(x):
+            path = metrics.export(app.engine.path(f"Diagnostics_{time.strftime('%Y-%m-%d_%H-%M-%S')}.json"))
+            toast(f"Saved: {path}")
+
+        def close(x):
+            Clock.unschedule(refresh)
+            dialog.dismiss()
+
+        toggle = MDFlatButton(on_release=toggle_metrics)
+        dialog = MDDialog(title="Diagnostics", type="custom", content_cls=scroll, auto_dismiss=False,
+                          buttons=[toggle, MDFlatButton(text="CLEAR", on_release=clear),
+                                   MDFlatButton(text="EXPORT", on_release=export),
+                                   MDRaisedButton(text="CLOSE", on_release=close)])
+        refresh()
+        Clock.schedule_interval(refresh, 1)
+        dialog.open()
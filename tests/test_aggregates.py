@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from pos_engine.aggregates import ShiftAggregates
+from pos_engine.engine import PosEngine
+
+SKUS = [("Cafe Latte 12oz", 80), ("Americano 16oz", 70), ("Iced Latte 16oz", 95), ("Cappuccino 12oz", 85)]
+
+
+def sell_day(engine, rng, count):
+    for n in range(count):
+        for sku, price in rng.sample(SKUS, rng.randint(1, 3)): engine.add_to_cart(sku, price, rng.randint(1, 3))
+        engine.checkout(date=f"2024-05-01 {8 + n % 9:02d}:{n % 60:02d}")
+
+
+def recompute(engine):
+    # Totals straight from the stored receipts, the slow way
+    totals = {"tickets": 0, "revenue": 0, "units": {}, "sku_revenue": {}, "hourly": {}, "ingredients": {}, "cost": 0}
+    for r in engine.storage.iter_receipts():
+        totals["tickets"] += 1
+        totals["revenue"] += r["total"]
+        hour = totals["hourly"].setdefault(r["date"][:13], [0, 0])
+        hour[0] += 1
+        hour[1] += r["total"]
+        for item in r["items"]:
+            sku, qty = item["name"], item["qty"]
+            totals["units"][sku] = totals["units"].get(sku, 0) + qty
+            totals["sku_revenue"][sku] = totals["sku_revenue"].get(sku, 0) + item["price"] * qty
+            totals["cost"] += item["cost"] * qty
+            for ing, amt in engine.recipes[sku].items():
+                totals["ingredients"][ing] = totals["ingredients"].get(ing, 0) + amt * qty
+    return totals
+
+
+def assert_matches(stats, totals):
+    data = stats.to_dict()
+    for key in ("tickets", "revenue", "units", "sku_revenue", "hourly"): assert data[key] == totals[key], key
+    assert data["ingredients"] == pytest.approx(totals["ingredients"])
+    assert data["cost"] == pytest.approx(totals["cost"])
+    assert stats.margin == pytest.approx(totals["revenue"] - totals["cost"])
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_running_totals_match_a_full_recompute(tmp_path, backend):
+    engine = PosEngine(str(tmp_path), backend=backend).open()
+    engine.start_shift()
+    sell_day(engine, random.Random(11), 60)
+    totals = recompute(engine)
+    assert_matches(engine.stats, totals)
+    assert_matches(ShiftAggregates.rebuild(engine.storage.iter_receipts(), engine.recipe_matrix, engine.margins),
+                   totals)
+    engine.close()
+
+    engine = PosEngine(str(tmp_path), backend=backend).open()  # saved totals
+    assert_matches(engine.stats, totals)
+    engine.storage.save_shift_stats({"tickets": 3})  # behind the receipts, as after a crash
+    engine.close()
+    engine = PosEngine(str(tmp_path), backend=backend).open()
+    assert_matches(engine.stats, totals)
+    engine.close()
+
+
+def test_new_shift_starts_from_zero(tmp_path):
+    engine = PosEngine(str(tmp_path)).open()
+    engine.start_shift()
+    sell_day(engine, random.Random(2), 5)
+    engine.end_shift(background=False)
+    engine.start_shift()
+    assert engine.stats.tickets == 0 and engine.stats.revenue == 0 and not engine.stats.units
+    engine.close()
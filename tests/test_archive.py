@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from pos_engine import archive
+from pos_engine.archive import SalesArchive, iter_archived_receipts, write_shift_archive
+from pos_engine.catalog import RECIPES
+
+SKUS = ["Cafe Latte 12oz", "Americano 16oz", "Iced Latte 16oz", "Spanish Latte 12oz"]
+
+
+def shift_receipts(rng, day, count, first_id):
+    receipts = []
+    for n in range(count):
+        items = [{"name": sku, "price": rng.choice([60, 80, 95.5]), "qty": rng.randint(1, 3)}
+                 for sku in rng.sample(SKUS, rng.randint(1, 3))]
+        receipts.append({"id": str(first_id + n), "date": f"2024-03-{day:02d} {8 + n % 10:02d}:{n % 60:02d}",
+                         "total": sum(i["price"] * i["qty"] for i in items), "items": items})
+    return receipts
+
+
+@pytest.fixture
+def shifts():
+    rng = random.Random(7)
+    return {day: shift_receipts(rng, day, 40, day * 1000) for day in range(1, 11)}
+
+
+@pytest.fixture
+def sales_archive(tmp_path, shifts):
+    sales = SalesArchive(str(tmp_path / "archive"), RECIPES)
+    for day, receipts in shifts.items(): sales.archive_shift(receipts, f"2024-03-{day:02d}")
+    return sales
+
+
+def test_round_trip(tmp_path, shifts):
+    path = write_shift_archive(str(tmp_path / "one.posa"), shifts[1], "one")
+    assert list(iter_archived_receipts(path)) == shifts[1]
+
+
+def naive_rollup(shifts, days):
+    tickets, revenue, units = 0, 0.0, {}
+    for day in days:
+        for r in shifts[day]:
+            tickets += 1
+            revenue += r["total"]
+            for i in r["items"]: units[i["name"]] = units.get(i["name"], 0) + i["qty"]
+    return tickets, revenue, units
+
+
+def check_days(result, shifts, days):
+    for day in days:
+        part = result[f"2024-03-{day:02d}"]
+        tickets, revenue, units = naive_rollup(shifts, [day])
+        assert part["tickets"] == tickets
+        assert part["revenue"] == pytest.approx(revenue)
+        assert {sku: u for sku, (u, _) in part["products"].items()} == units
+
+
+def test_rollup_by_day_matches_the_receipts(sales_archive, shifts):
+    check_days(sales_archive.rollup(group="day", workers=1), shifts, range(1, 11))
+
+
+def test_rollup_range_and_ingredients(sales_archive, shifts):
+    result = sales_archive.rollup("2024-03-03 00:00", "2024-03-05 23:59")
+    tickets, revenue, units = naive_rollup(shifts, [3, 4, 5])
+    assert result["all"]["tickets"] == tickets
+    assert result["all"]["revenue"] == pytest.approx(revenue)
+    milk = sum(RECIPES[sku].get("Milk", 0) * qty for sku, qty in units.items())
+    assert result["all"]["ingredients"]["Milk"] == pytest.approx(milk)
+
+
+def test_pure_python_scan_matches_numpy(sales_archive, shifts, monkeypatch):
+    monkeypatch.setattr(archive, "_numpy", lambda: None)
+    check_days(sales_archive.rollup(group="day", workers=1), shifts, range(1, 11))
+
+
+def test_process_pool_matches_serial(sales_archive, monkeypatch):
+    serial = sales_archive.rollup(group="week", workers=1)
+    monkeypatch.setattr(archive, "PARALLEL_MIN_SHIFTS", 1)
+    assert sales_archive.rollup(group="week", workers=2) == serial
+
+
+def test_shifts_closed_in_the_same_minute_keep_both_files(tmp_path, shifts):
+    sales = SalesArchive(str(tmp_path / "archive"))
+    first = sales.archive_shift(shifts[1], "2024-03-01_18-00")
+    second = sales.archive_shift(shifts[2], "2024-03-01_18-00")
+    assert first != second
+    assert [r["id"] for r in sales.iter_receipts()] == [r["id"] for r in shifts[1] + shifts[2]]
@@ -0,0 +1,34 @@
+from pos_engine.cart import Cart, item_label
+from pos_engine.engine import PosEngine
+
+
+def test_lines_keep_their_ids_and_the_total_follows():
+    cart = Cart()
+    latte = cart.add("Cafe Latte 12oz", 80)
+    cart.add("Americano 16oz", 70, 2)
+    assert cart.add("Cafe Latte 12oz", 80) is latte and latte.qty == 2
+    assert cart.total == 300
+    assert cart.remove(latte.line_id, 5).qty == 0  # clamped: never below zero
+    assert cart.total == 140 and list(cart.lines) == ["Americano 16oz"]
+    assert cart.change_qty(latte.line_id, 1) is None  # a dropped line is gone for good
+    assert cart.items() == [{"name": "Americano 16oz", "price": 70, "qty": 2}]
+    assert cart.counts() == {"Americano 16oz": 2}
+    assert cart.add("Cafe Latte 12oz", 80).line_id != latte.line_id
+
+
+def test_item_label():
+    assert item_label({"name": "Cafe Latte 12oz", "price": 80}) == "Cafe Latte 12oz"
+    assert item_label({"name": "Cafe Latte 12oz", "price": 80, "qty": 3}) == "3x Cafe Latte 12oz"
+
+
+def test_engine_emits_only_the_changed_line(tmp_path):
+    engine = PosEngine(str(tmp_path)).open()
+    changed = []
+    engine.bind("cart_changed", lambda line: changed.append((line.sku, line.qty)))
+    engine.add_to_cart("Cafe Latte 12oz", 80, 2)
+    line_id = engine.cart.lines["Cafe Latte 12oz"].line_id
+    engine.change_cart_qty(line_id, -1)
+    engine.change_cart_qty(line_id, -1)
+    assert changed == [("Cafe Latte 12oz", 2), ("Cafe Latte 12oz", 1), ("Cafe Latte 12oz", 0)]
+    assert not engine.cart and engine.cart.total == 0
+    engine.close()
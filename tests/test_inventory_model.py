@@ -0,0 +1,52 @@
+from pos_engine.engine import PosEngine
+from pos_engine.inventory_model import InventoryModel
+
+
+def open_model(tmp_path):
+    engine = PosEngine(str(tmp_path)).open()
+    engine.start_shift()
+    return engine, InventoryModel(engine)
+
+
+def names(rows):
+    return [row["name"] for row in rows]
+
+
+def test_a_sale_updates_only_the_rows_it_used(tmp_path):
+    engine, model = open_model(tmp_path)
+    assert names(model.view()) == list(engine.inventory)
+    changed = []
+    model.bind("rows_changed", changed.append)
+    engine.add_to_cart("Americano 12oz", 60, 2)
+    engine.checkout()
+    assert sorted(changed[0]) == sorted(engine.recipes["Americano 12oz"])
+    beans = model.rows["Beans"]
+    assert float(beans["current_qty"]) < float(beans["start_qty"])
+    engine.set_stock_count("Milk", 123000)
+    assert changed[-1] == ["Milk"] and model.rows["Milk"]["current_qty"] == "123.00"
+    engine.close()
+
+
+def test_view_sorts_and_filters(tmp_path):
+    engine, model = open_model(tmp_path)
+    engine.add_to_cart("Cafe Latte 12oz", 80, 5)
+    engine.checkout()
+    engine.apply_inventory_update(levels={"Milk": 1})  # down to almost nothing: low
+    used = names(model.view("used"))
+    assert used[0] == "Milk"
+    assert names(model.view("remaining"))[0] == "Milk"
+    assert names(model.view("low"))[0] == "Milk" and model.rows["Milk"]["low"]
+    assert names(model.view("name")) == sorted(engine.inventory, key=str.lower)
+    assert "Milk" in names(model.view(low_only=True))
+    assert all("cups" in n.lower() and "hot" in n.lower() for n in names(model.view(text="hot cups")))
+    engine.close()
+
+
+def test_reloaded_after_the_shift_closes(tmp_path):
+    engine, model = open_model(tmp_path)
+    reloaded = []
+    model.bind("reloaded", lambda: reloaded.append(True))
+    engine.end_shift(background=False)
+    assert reloaded and all(row["start_qty"] == "0.00" for row in model.view())
+    model.close()
+    engine.close()
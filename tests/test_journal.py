@@ -0,0 +1,71 @@
+import json
+import os
+
+from pos_engine.storage import FSYNC_ALWAYS, JsonStorage, ReceiptJournal
+
+
+def receipt(n):
+    return {"id": str(1700000000 + n), "date": "2024-01-01 10:00", "total": 80,
+            "items": [{"name": "Cafe Latte 12oz", "price": 80, "qty": 1}]}
+
+
+def journal(tmp_path, compact_every=200):
+    return ReceiptJournal(str(tmp_path / "receipts.json"), str(tmp_path / "receipts.journal"),
+                          fsync=FSYNC_ALWAYS, compact_every=compact_every)
+
+
+def test_torn_last_line_is_dropped_and_truncated(tmp_path):
+    j = journal(tmp_path)
+    j.replay()
+    for n in range(3): j.append(receipt(n))
+    j.close()
+    path = tmp_path / "receipts.journal"
+    good_size = path.stat().st_size
+    with open(path, 'ab') as f: f.write(json.dumps(receipt(3)).encode()[:25])  # crash mid-append
+
+    j = journal(tmp_path)
+    assert [r["id"] for r in j.replay()] == [receipt(n)["id"] for n in range(3)]
+    assert path.stat().st_size == good_size
+    assert int(j.next_id()) > int(receipt(2)["id"])
+
+
+def test_records_already_in_the_checkpoint_are_not_repeated(tmp_path):
+    # Crash after the checkpoint was written but before the journal was removed
+    j = journal(tmp_path)
+    j.replay()
+    for n in range(3): j.append(receipt(n))
+    j.close()
+    with open(tmp_path / "receipts.json", 'w') as f: json.dump([receipt(0), receipt(1)], f)
+    assert [r["id"] for r in journal(tmp_path).replay()] == [receipt(n)["id"] for n in range(3)]
+
+
+def test_crash_during_background_compaction_keeps_every_sale(tmp_path):
+    j = journal(tmp_path)
+    receipts = j.replay()
+    for n in range(3):
+        receipts.append(receipt(n))
+        j.append(receipt(n))
+    j.rotate()                   # compaction started...
+    j.append(receipt(3))         # ...a sale came in...
+    j.close()                    # ...and the app died before the checkpoint was written
+    j = journal(tmp_path)
+    assert [r["id"] for r in j.replay()] == [receipt(n)["id"] for n in range(4)]
+    assert not os.path.exists(j.old_path)
+
+
+def storage(tmp_path):
+    return JsonStorage(*(str(tmp_path / name) for name in (
+        "inventory.json", "products.json", "receipts.json", "receipts.journal", "images.json",
+        "shift_start.json", "shift_stats.json", "costs.json")), compact_every=5)
+
+
+def test_compaction_runs_outside_record_sale(tmp_path):
+    s = storage(tmp_path)
+    for n in range(7): s.record_sale({}, {}, receipt(n))
+    assert s.should_compact()
+    assert not os.path.exists(tmp_path / "receipts.json")  # record_sale left it to the caller
+    s.compact()
+    s.record_sale({}, {}, receipt(7))
+    s.close()
+    with open(tmp_path / "receipts.json") as f: assert len(json.load(f)) == 7
+    assert [r["id"] for r in storage(tmp_path).iter_receipts()] == [receipt(n)["id"] for n in range(8)]
@@ -0,0 +1,53 @@
+import pytest
+
+from pos_engine import RECIPES, UNIT_SIZES
+from pos_engine.engine import PosEngine
+
+
+def recipe_cost(engine, sku):
+    return sum(amt * engine.costs.get(ing, 0) / UNIT_SIZES.get(ing, 1) for ing, amt in RECIPES[sku].items())
+
+
+def test_margins_follow_the_recipe_matrix_and_cost_edits(tmp_path):
+    engine = PosEngine(str(tmp_path)).open()
+    sku = "Americano 12oz"
+    assert engine.margins.matrix is engine.recipe_matrix
+    price, cost, margin = engine.margins.margin(sku)
+    assert cost == pytest.approx(recipe_cost(engine, sku))
+    assert margin == pytest.approx(price - cost)
+
+    assert engine.update_costs({"Beans": engine.costs["Beans"] * 2}) == ["Beans"]
+    assert engine.margins.cost(sku) == pytest.approx(recipe_cost(engine, sku))
+    assert engine.margins.cost(sku) > cost
+    engine.add_to_cart(sku, price, 2)
+    receipt = engine.checkout()
+    assert engine.receipt_margin(receipt) == pytest.approx(2 * (price - engine.margins.cost(sku)))
+    engine.close()
+
+    reopened = PosEngine(str(tmp_path)).open()
+    assert reopened.costs["Beans"] == engine.costs["Beans"]
+    reopened.close()
+
+
+def test_sku_without_a_recipe_costs_nothing(tmp_path):
+    engine = PosEngine(str(tmp_path)).open()
+    assert engine.margins.cost("Mystery Drink 12oz") == 0
+    assert engine.margins.margin("Mystery Drink 12oz") is None
+    engine.close()
+
+
+def test_receipt_margin_is_fixed_at_checkout(tmp_path):
+    engine = PosEngine(str(tmp_path)).open()
+    engine.start_shift()
+    engine.add_to_cart("Cafe Latte 12oz", 80)
+    receipt = engine.checkout(date="2024-05-01 10:00")
+    margin = engine.receipt_margin(receipt)
+    assert margin == pytest.approx(80 - engine.margins.cost("Cafe Latte 12oz"))
+
+    engine.update_costs({"Milk": engine.costs["Milk"] * 3})
+    assert engine.receipt_margin(engine.storage.get_receipts([receipt["id"]])[0]) == pytest.approx(margin)
+    engine.end_shift(background=False)
+    assert engine.receipt_margin(engine.search_receipts(receipt["id"])[0]) == pytest.approx(margin)
+    # Receipts from before line costs were stored have no margin rather than today's
+    assert engine.receipt_margin({"total": 80, "items": [{"name": "Cafe Latte 12oz", "price": 80}]}) is None
+    engine.close()
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+from pos_engine import DEFAULT_PRODUCTS
+from pos_engine.menu_index import MenuIndex, split_quantity
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+from bench_pos import menu_skus  # noqa: E402
+
+
+def test_quick_codes_are_unique_across_the_menu():
+    index = MenuIndex(DEFAULT_PRODUCTS)
+    codes = [index.entries[sku].code for sku, _ in menu_skus()]
+    assert len(codes) == len(set(codes))
+    assert all(index.search(code)[0].sku == sku for code, sku in zip(codes, (sku for sku, _ in menu_skus())))
+
+
+def test_collisions_spell_out_more_of_the_name():
+    index = MenuIndex(DEFAULT_PRODUCTS)
+    code = {sku: entry.code for sku, entry in index.entries.items()}
+    assert code["Cafe Latte 12oz"] == "cl12"  # the codes the benchmark session types
+    assert code["Iced Cappuccino 16oz"] == "ic16" and code["Iced Choco 16oz"] == "ich16"
+    assert code["Vietnamese 12oz"] == "v12" and code["Vanilla 12oz"] == "va12"
+    assert len({code["Salted Caramel 16oz"], code["Strawberry Coffee 16oz"], code["Strawberry Choco 16oz"]}) == 3
+
+
+def test_codes_survive_menu_edits():
+    index = MenuIndex({"Hot": {"Iced Cappuccino": {"16oz": 90}, "Iced Choco": {"16oz": 95}}})
+    index.update([("Hot", "Iced Choco", "16oz", 100)])
+    assert index.entries["Iced Choco 16oz"].code == "ich16"
+    index.sync({"Hot": {"Iced Choco": {"16oz": 100}}})
+    assert index.codes == {"ich16": "Iced Choco 16oz"}
+    assert [e.sku for e in index.search("ic16")] == []
+    index.sync({"Hot": {"Iced Choco": {"16oz": 100}, "Iced Chai": {"16oz": 80}}})
+    assert index.entries["Iced Chai 16oz"].code == "ic16"
+
+
+def test_split_quantity():
+    assert split_quantity("3x cl12") == (3, "cl12")
+    assert split_quantity("cl12 x2") == (2, "cl12")
+    assert split_quantity("cl12") == (1, "cl12")
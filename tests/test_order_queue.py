@@ -0,0 +1,68 @@
+import asyncio
+import socket
+import time
+
+import pytest
+
+from pos_engine.engine import PosEngine
+from pos_engine.order_queue import OrderQueueClient, OrderQueueServer
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = PosEngine(str(tmp_path)).open()
+    engine.start_shift()
+    yield engine
+    engine.close()
+
+
+def test_start_raises_when_the_port_is_taken(engine):
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        t0 = time.time()
+        with pytest.raises(OSError):
+            OrderQueueServer(engine, host="127.0.0.1", port=taken.getsockname()[1]).start()
+        assert time.time() - t0 < 2
+    # Not bound to the engine, so selling goes on without it
+    engine.add_to_cart("Cafe Latte 12oz", 80)
+    engine.checkout()
+    assert not engine.cart
+
+
+def test_publish_after_stop_is_a_no_op(engine):
+    queue = OrderQueueServer(engine, host="127.0.0.1", port=0).start()
+    queue.stop()
+    queue.publish({"id": "1", "date": "", "total": 0, "items": []})
+
+
+def test_failing_sale_listener_does_not_break_checkout(engine, capsys):
+    def broken(receipt, usage): raise RuntimeError("display gone")
+    engine.bind("sale", broken)
+    engine.add_to_cart("Cafe Latte 12oz", 80)
+    engine.checkout()
+    assert not engine.cart
+    assert engine.count_receipts() == 1
+    assert "display gone" in capsys.readouterr().err
+
+
+def test_order_published_while_a_display_connects_reaches_it(engine, monkeypatch):
+    # The server publishes an order while a new display's snapshot is still draining
+    server = OrderQueueServer(engine, host="127.0.0.1", port=0).start()
+    drain = asyncio.StreamWriter.drain
+    racing = [{"id": "1700000001", "date": "2024-05-01 10:00", "total": 80,
+               "items": [{"name": "Cafe Latte 12oz", "price": 80, "qty": 1}]}]
+
+    async def publishing_drain(writer):
+        if racing: server._publish(racing.pop())
+        await drain(writer)
+
+    monkeypatch.setattr(asyncio.StreamWriter, "drain", publishing_drain)
+    client = OrderQueueClient("127.0.0.1", server.port).start()
+    try:
+        deadline = time.time() + 5
+        while "1700000001" not in client.queue.orders and time.time() < deadline: time.sleep(0.02)
+        assert "1700000001" in client.queue.orders
+    finally:
+        client.stop()
+        server.stop()
@@ -0,0 +1,13 @@
+from pos_engine.outbox import Outbox
+
+
+def test_outbox_survives_restarts_and_torn_appends(tmp_path):
+    path = str(tmp_path / "outbox.jsonl")
+    outbox = Outbox(path)
+    for n in range(3): outbox.append({"key": f"T1:{n}", "n": n})
+    with open(path, 'a') as f: f.write('{"key": "T1:3", "n"')  # crash mid-append
+
+    outbox = Outbox(path)
+    assert [op["key"] for op in outbox.pending()] == ["T1:0", "T1:1", "T1:2"]
+    outbox.remove(["T1:0", "T1:2", "unknown"])
+    assert [op["key"] for op in Outbox(path).pending()] == ["T1:1"]
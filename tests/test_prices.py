@@ -0,0 +1,31 @@
+import pytest
+
+from pos_engine.engine import PosEngine
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_batch_price_edit_is_one_event_and_one_write(tmp_path, backend):
+    engine = PosEngine(str(tmp_path), backend=backend, write_behind_delay=60).open()
+    events, writes = [], []
+    engine.bind("prices_changed", events.append)
+    save = engine.storage.save_prices
+    engine.storage.save_prices = lambda products, keys: (writes.append(keys), save(products, keys))
+    cat = next(cat for cat, items in engine.products.items() if "Cafe Latte" in items)
+    latte = engine.products[cat]["Cafe Latte"]
+
+    changed = engine.update_prices([(cat, "Cafe Latte", "12oz", 85), (cat, "Cafe Latte", "16oz", latte["16oz"]),
+                                    (cat, "Cafe Latte", "12oz", 88)])  # the last edit of a row wins
+    assert changed == [(cat, "Cafe Latte", "12oz", 88)] and events == [changed]
+    assert engine.update_prices([(cat, "Cafe Latte", "12oz", 88)]) == [] and len(events) == 1
+    assert engine.margins.margin("Cafe Latte 12oz")[0] == 88
+    assert engine.menu_index.entries["Cafe Latte 12oz"].price == 88
+
+    # A second edit while the first is still queued: both rows go out in one write
+    engine.update_price(cat, "Cafe Latte", "16oz", 99)
+    engine.flush()
+    assert writes == [[(cat, "Cafe Latte", "12oz"), (cat, "Cafe Latte", "16oz")]]
+    engine.close()
+
+    engine = PosEngine(str(tmp_path), backend=backend).open()
+    assert engine.products[cat]["Cafe Latte"] == {"12oz": 88, "16oz": 99}
+    engine.close()
@@ -0,0 +1,59 @@
+import pytest
+
+from pos_engine.engine import PosEngine
+from pos_engine.receipt_index import ReceiptIndex, parse_query
+
+
+@pytest.mark.parametrize("text, query", [
+    ("#1712345678", {"order_id": "1712345678"}),
+    ("1712345678", {"order_id": "1712345678"}),
+    ("1234", {"product": "1234"}),  # too short for an order id
+    ("2024-05-01", {"start": "2024-05-01 00:00", "end": "2024-05-01 23:59"}),
+    ("2024-05-01 9:00-11:30", {"start": "2024-05-01 09:00", "end": "2024-05-01 11:30"}),
+    (">100", {"min_total": 100 + 1e-9}),
+    ("<=250", {"max_total": 250}),
+    ("=120", {"min_total": 120, "max_total": 120}),
+    ("iced latte >=90", {"product": "iced latte", "min_total": 90}),
+    ("", {}),
+])
+def test_parse_query(text, query):
+    assert parse_query(text) == query
+
+
+def test_time_range_defaults_to_the_latest_day():
+    assert parse_query("10:00-12:00", "2024-05-03 17:45") == {"start": "2024-05-03 10:00", "end": "2024-05-03 12:00"}
+
+
+def test_index_search_combines_filters_newest_first():
+    receipts = [{"id": str(n), "date": f"2024-05-01 {10 + n}:00", "total": 80 * (n + 1),
+                 "items": [{"name": "Cafe Latte 12oz" if n % 2 else "Americano 12oz", "price": 80}]}
+                for n in range(6)]
+    index = ReceiptIndex.build(receipts)
+    assert index.search(product="latte") == ["5", "3", "1"]
+    assert index.search(**parse_query("latte >200 2024-05-01")) == ["5", "3"]
+    assert index.search(order_id="4") == ["4"]
+
+
+def sell(engine, sku, price, date):
+    engine.add_to_cart(sku, price)
+    return engine.checkout(date=date)
+
+
+def test_search_covers_closed_shifts(tmp_path):
+    engine = PosEngine(str(tmp_path)).open()
+    engine.start_shift()
+    old = sell(engine, "Cafe Latte 12oz", 80, "2024-05-01 10:00")
+    engine.search_receipts("latte")  # index built before the close
+    engine.end_shift(background=False)
+    engine.start_shift()
+    new = sell(engine, "Cafe Latte 16oz", 90, "2024-05-02 10:00")
+
+    assert [r["id"] for r in engine.search_receipts("latte")] == [new["id"], old["id"]]
+    assert [r["id"] for r in engine.search_receipts(f"#{old['id']}")] == [old["id"]]
+    assert [r["id"] for r in engine.search_receipts("2024-05-01")] == [old["id"]]
+    engine.close()
+
+    # A fresh start indexes the archive from scratch
+    engine = PosEngine(str(tmp_path)).open()
+    assert engine.search_receipts(old["id"])[0]["items"] == old["items"]
+    engine.close()
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from pos_engine import recipes
+from pos_engine.catalog import DEFAULT_INVENTORY, RECIPES
+from pos_engine.recipes import RecipeMatrix
+
+
+def expected_usage(counts):
+    used = {}
+    for sku, qty in counts.items():
+        for ing, amt in RECIPES.get(sku, {}).items(): used[ing] = used.get(ing, 0) + amt * qty
+    return used
+
+
+def expected_capacity(inventory, sku):
+    return max(min(inventory.get(ing, 0) // amt for ing, amt in RECIPES[sku].items() if amt > 0), 0)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def matrix(request, monkeypatch):
+    if request.param == "python": monkeypatch.setattr(recipes, "_numpy", lambda: None)
+    elif recipes._numpy() is None: pytest.skip("numpy is not installed")
+    matrix = RecipeMatrix(RECIPES, DEFAULT_INVENTORY)
+    assert matrix.use_numpy == (request.param == "numpy")
+    return matrix
+
+
+def test_deduct_matches_the_recipes(matrix):
+    rng = random.Random(3)
+    counts = {sku: rng.randint(1, 4) for sku in rng.sample(list(RECIPES), 6)}
+    counts["Mystery Drink 12oz"] = 2  # no recipe: ignored
+    inventory = dict(DEFAULT_INVENTORY)
+    used = matrix.deduct(inventory, counts)
+    assert used == pytest.approx(expected_usage(counts))
+    for ing, amt in used.items(): assert inventory[ing] == pytest.approx(DEFAULT_INVENTORY.get(ing, 0) - amt)
+
+
+def test_capacity_is_the_scarcest_ingredient(matrix):
+    inventory = dict(DEFAULT_INVENTORY, Milk=1000)
+    capacity = matrix.capacity(inventory)
+    assert capacity == {sku: expected_capacity(inventory, sku) for sku in RECIPES}
+    milk = matrix.skus_using(["Milk"])
+    assert milk and matrix.capacity(inventory, milk) == {sku: capacity[sku] for sku in milk}
+    assert all(n == 0 for n in matrix.capacity(dict(inventory, Milk=-50), milk).values())
+
+
+def test_numpy_and_python_agree(monkeypatch):
+    if recipes._numpy() is None: pytest.skip("numpy is not installed")
+    fast = RecipeMatrix(RECIPES, DEFAULT_INVENTORY)
+    monkeypatch.setattr(recipes, "_numpy", lambda: None)
+    slow = RecipeMatrix(RECIPES, DEFAULT_INVENTORY)
+    rng = random.Random(5)
+    for _ in range(20):
+        inventory = {ing: rng.uniform(0, qty) for ing, qty in DEFAULT_INVENTORY.items()}
+        counts = {sku: rng.randint(1, 3) for sku in rng.sample(list(RECIPES), 4)}
+        assert fast.capacity(inventory) == slow.capacity(inventory)
+        assert fast.usage(counts) == pytest.approx(slow.usage(counts))
@@ -0,0 +1,43 @@
+import pytest
+
+from pos_engine.engine import PosEngine, PosError
+
+
+def test_stock_changes_while_the_shift_closes(tmp_path):
+    # call_soon is held back so the test decides when the report thread's result lands
+    pending = []
+    engine = PosEngine(str(tmp_path), call_soon=lambda fn, *args: pending.append((fn, args)),
+                       write_behind_delay=60).open()
+    engine.start_shift()
+    engine.add_to_cart("Cafe Latte 12oz", 80)
+    engine.checkout()
+    engine.end_shift(background=False)
+    assert engine.closing_shift
+
+    with pytest.raises(PosError):
+        engine.set_stock_count("Milk", 5000)
+    engine.apply_inventory_update(levels={"Beans": 4000})  # from the sync server: still applied
+    engine.save_shift_start()  # a queued save that must not bring the shift back after the close
+
+    for fn, args in pending: fn(*args)
+    assert not engine.closing_shift and not engine.has_shift()
+    engine.close()
+
+    engine = PosEngine(str(tmp_path)).open()
+    assert not engine.has_shift()
+    assert engine.inventory["Beans"] == 4000
+    engine.close()
+
+
+def test_two_shifts_closed_in_the_same_minute_keep_both_reports(tmp_path):
+    engine = PosEngine(str(tmp_path)).open()
+    reports = []
+    for _ in range(2):
+        engine.start_shift()
+        engine.add_to_cart("Cafe Latte 12oz", 80)
+        engine.checkout()
+        reports.append(engine.end_shift(timestamp="2024-05-01_18-00", background=False))
+    assert reports[0] != reports[1]
+    assert all((tmp_path / path).exists() for path in reports)
+    assert len(engine.archive.shift_files()) == 2
+    engine.close()
@@ -0,0 +1,63 @@
+from pos_engine.engine import PosEngine
+from pos_engine.recipes import RecipeMatrix
+from pos_engine.stock_alerts import LowStockMonitor, alert_text
+
+RECIPES = {"Latte 12oz": {"Milk": 100, "Beans": 10}, "Big Latte 16oz": {"Milk": 200, "Beans": 15}}
+
+
+def monitor():
+    return LowStockMonitor(RecipeMatrix(RECIPES), drinks=5, levels={"Sugar": 50})
+
+
+def test_raise_and_clear_at_the_threshold():
+    alerts = monitor()
+    stock = {"Milk": 1201, "Beans": 5000, "Sugar": 500}
+    assert alerts.check(stock) == ([], [])  # 6 big lattes left
+    stock["Milk"] = 1000
+    raised, cleared = alerts.check(stock, ["Milk"])
+    assert [(a["ingredient"], a["sku"], a["left"]) for a in raised] == [("Milk", "Big Latte 16oz", 5)]
+    assert alerts.is_low("Latte 12oz") and alerts.is_low("Big Latte 16oz")
+    stock["Milk"] = 900
+    assert alerts.check(stock, ["Milk"]) == ([], [])  # still low: refreshed, not raised again
+    assert alerts.alerts["Milk"]["left"] == 4
+    stock["Milk"] = 1400
+    assert alerts.check(stock, ["Milk"]) == ([], ["Milk"])
+    assert not alerts.is_low("Latte 12oz") and not alerts.alerts
+
+
+def test_fixed_levels_and_untouched_ingredients():
+    alerts = monitor()
+    stock = {"Milk": 0, "Beans": 5000, "Sugar": 50}
+    raised, _ = alerts.check(stock, ["Sugar"])  # Milk is not looked at
+    assert [a["ingredient"] for a in raised] == ["Sugar"]
+    assert alert_text(raised[0]) == "Sugar: 50 left"
+    assert "Milk" not in alerts.alerts and not alerts.is_low("Latte 12oz")
+
+
+def test_engine_reports_only_transitions(tmp_path):
+    engine = PosEngine(str(tmp_path)).open()
+    engine.start_shift()
+    events = []
+    engine.bind("low_stock", lambda raised, cleared: events.append(([a["ingredient"] for a in raised], cleared)))
+    engine.set_stock_count("Milk", 10 ** 6)
+    engine.set_stock_count("Milk", 500)
+    engine.set_stock_count("Milk", 400)
+    engine.set_stock_count("Milk", 10 ** 6)
+    assert events == [(["Milk"], []), ([], ["Milk"])]
+    engine.close()
+
+
+def test_availability_event_names_only_the_changed_skus(tmp_path):
+    engine = PosEngine(str(tmp_path)).open()
+    engine.start_shift()
+    events = []
+    engine.bind("availability_changed", lambda capacity, skus: events.append(set(skus)))
+    before = dict(engine.capacity)
+    engine.add_to_cart("Americano 12oz", 60)
+    engine.checkout()
+    changed = {sku for sku, n in engine.capacity.items() if before.get(sku) != n}
+    assert events == [changed] and "Americano 12oz" in changed
+    assert changed < set(engine.capacity)  # drinks sharing no ingredient are left alone
+    engine.set_stock_count("Beans", 0)
+    assert events[-1] and all(engine.capacity[sku] == 0 for sku in events[-1])
+    engine.close()
@@ -0,0 +1,39 @@
+import pytest
+
+from pos_engine.engine import PosEngine
+from pos_engine.storage import FSYNC_ALWAYS, FSYNC_BATCH, FSYNC_NEVER, SqliteStorage
+
+
+@pytest.mark.parametrize("policy, level", [(FSYNC_ALWAYS, 2), (FSYNC_BATCH, 1), (FSYNC_NEVER, 0)])
+def test_sqlite_follows_the_fsync_policy(tmp_path, policy, level):
+    storage = SqliteStorage(str(tmp_path / "pos.db"), fsync=policy)
+    assert storage.conn.execute("PRAGMA synchronous").fetchone()[0] == level
+    storage.close()
+
+
+def sell(engine, n, sku="Cafe Latte 12oz", price=80):
+    for _ in range(n):
+        engine.add_to_cart(sku, price)
+        engine.checkout()
+
+
+def test_json_stock_saved_in_background_is_recovered_from_the_journal(tmp_path):
+    # A long write-behind delay and no close() stand in for a crash before the stock save
+    engine = PosEngine(str(tmp_path), backend="json", write_behind_delay=60).open()
+    engine.start_shift()
+    engine.flush()
+    sell(engine, 3)
+    milk = engine.inventory["Milk"]
+    assert PosEngine(str(tmp_path), backend="json").open().inventory["Milk"] == milk
+
+
+def test_json_stock_is_not_deducted_twice_after_a_clean_close(tmp_path):
+    engine = PosEngine(str(tmp_path), backend="json").open()
+    engine.start_shift()
+    sell(engine, 3)
+    milk = engine.inventory["Milk"]
+    engine.close()
+    for _ in range(2):
+        engine = PosEngine(str(tmp_path), backend="json").open()
+        assert engine.inventory["Milk"] == milk
+        engine.close()
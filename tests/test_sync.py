@@ -0,0 +1,116 @@
+import asyncio
+import queue
+import threading
+import time
+
+import pytest
+
+from pos_engine.engine import PosEngine
+from pos_engine.protocol import MAX_MESSAGE, read_message, send_message
+from pos_engine.sync_client import SyncClient
+from pos_engine.sync_server import SyncServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    srv = SyncServer(str(tmp_path / "server"), host="127.0.0.1", port=0)
+    asyncio.run_coroutine_threadsafe(srv.start(), loop).result(10)
+    srv.loop = loop
+    yield srv
+    asyncio.run_coroutine_threadsafe(srv.close(), loop).result(10)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+def run(server, coro):
+    return asyncio.run_coroutine_threadsafe(coro, server.loop).result(10)
+
+
+# Server messages reach a terminal's engine through call_soon, i.e. the UI thread in
+# the app; here they queue up for the test thread, which runs them while it waits
+main_thread = queue.Queue()
+
+
+def open_terminal(path):
+    engine = PosEngine(str(path), call_soon=lambda fn, *args: main_thread.put((fn, args))).open()
+    if not engine.has_shift(): engine.start_shift()
+    return engine
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        while not main_thread.empty():
+            fn, args = main_thread.get()
+            fn(*args)
+        if condition(): return
+        time.sleep(0.02)
+    raise AssertionError("timed out")
+
+
+def test_device_ids_are_unique_and_kept(tmp_path):
+    a, b = PosEngine(str(tmp_path / "a")), PosEngine(str(tmp_path / "b"))
+    assert a.device_id() != b.device_id()
+    assert a.device_id() == PosEngine(str(tmp_path / "a")).device_id()
+
+
+def test_two_terminals_selling_in_the_same_second(server, tmp_path):
+    # Both receipts get the same id; with distinct device ids both sales must count
+    terminals = [open_terminal(tmp_path / name) for name in ("t1", "t2")]
+    clients = [SyncClient(e, "127.0.0.1", server.port, e.device_id(), flush_interval=0.05, retry_delay=0.1).start()
+               for e in terminals]
+    try:
+        wait_for(lambda: all(c.connected for c in clients))
+        same_second = int(time.time()) + 1000
+        for engine in terminals:
+            engine.storage.ids.last_id = same_second
+            engine.add_to_cart("Cafe Latte 12oz", 80)
+            assert engine.checkout()["id"] == str(same_second + 1)
+        wait_for(lambda: all(len(c.outbox) == 0 for c in clients))
+        wait_for(lambda: all(e.inventory["Milk"] == 10000 - 2 * 180 for e in terminals))
+    finally:
+        for c in clients: c.stop()
+    assert server.engine.count_receipts() == 2
+    assert server.engine.inventory["Milk"] == 10000 - 2 * 180
+    for e in terminals: e.close()
+
+
+async def hello(port, terminal, instance):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=MAX_MESSAGE)
+    await send_message(writer, {"type": "hello", "terminal": terminal, "instance": instance, "pending": []})
+    return reader, writer, await read_message(reader)
+
+
+def test_second_live_connection_with_same_terminal_id_is_refused(server):
+    async def scenario():
+        _, first, reply = await hello(server.port, "T1", "a")
+        assert reply["type"] == "snapshot"
+        _, other, reply = await hello(server.port, "T1", "b")
+        assert reply["type"] == "error"
+        # The same client reconnecting replaces its old connection
+        _, again, reply = await hello(server.port, "T1", "a")
+        assert reply["type"] == "snapshot"
+        for writer in (first, other, again): writer.close()
+    run(server, scenario())
+
+
+def test_resent_sale_is_acked_but_applied_once(server):
+    receipt = {"id": "1700000000", "date": "2024-01-01 10:00", "total": 80,
+               "items": [{"name": "Cafe Latte 12oz", "price": 80, "qty": 1}]}
+    op = {"key": receipt["id"], "op": "sale", "receipt": receipt}
+
+    async def scenario():
+        reader, writer, _ = await hello(server.port, "T1", "a")
+        acks = []
+        for _ in range(2):
+            await send_message(writer, {"type": "ops", "ops": [op]})
+            acks.append(await read_message(reader))
+        writer.close()
+        return acks
+    acks = run(server, scenario())
+    assert [a["keys"] for a in acks] == [["1700000000"], ["1700000000"]]
+    assert server.engine.count_receipts() == 1
+    assert server.engine.inventory["Milk"] == 10000 - 180
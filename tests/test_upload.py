@@ -0,0 +1,121 @@
+import json
+import threading
+import time
+
+import pytest
+
+from pos_engine import uploader as uploader_module
+from pos_engine.engine import PosEngine
+from pos_engine.upload_server import make_server
+from pos_engine.uploader import Uploader
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline: raise AssertionError("timed out")
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def office(tmp_path, monkeypatch):
+    # Local stand-in head office; every accepted POST is logged as its batch of keys
+    server = make_server(str(tmp_path / "office"), "127.0.0.1", 0)
+    server.batches = []
+    accept = server.store.accept
+
+    def logging_accept(terminal, items):
+        server.batches.append([item["key"] for item in items])
+        return accept(terminal, items)
+
+    server.store.accept = logging_accept
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/upload"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(uploader_module, "backoff", lambda failures: 0.05)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = PosEngine(str(tmp_path / "pos")).open()
+    engine.start_shift()
+    yield engine
+    engine.close()
+
+
+def sell(engine, n):
+    ids = []
+    for _ in range(n):
+        engine.add_to_cart("Cafe Latte 12oz", 80)
+        ids.append(engine.checkout()["id"])
+    return ids
+
+
+def stored_receipts(office):
+    with open(office.store.receipts_path) as f: return [json.loads(line)["id"] for line in f]
+
+
+def test_a_burst_of_sales_goes_in_batches(office, engine):
+    uploader = Uploader(engine, office.url, "T1", batch_size=3, gather_delay=0.3).start()
+    try:
+        ids = sell(engine, 5)
+        wait_for(lambda: uploader.pending() == 0)
+    finally:
+        uploader.stop()
+    assert [len(batch) for batch in office.batches] == [3, 2]
+    assert stored_receipts(office) == ids
+
+
+def test_failed_batches_are_retried(office, engine):
+    office.fail_rate = 1.0  # every POST answered with 503
+    uploader = Uploader(engine, office.url, "T1", gather_delay=0).start()
+    try:
+        ids = sell(engine, 2)
+        wait_for(lambda: uploader.failures >= 2)
+        assert uploader.pending() == 2 and "503" in uploader.last_error
+        office.fail_rate = 0.0
+        wait_for(lambda: uploader.pending() == 0)
+    finally:
+        uploader.stop()
+    assert uploader.failures == 0 and uploader.last_error is None
+    assert stored_receipts(office) == ids
+
+
+def test_pending_items_are_sent_after_a_restart(office, engine, tmp_path):
+    office.fail_rate = 1.0
+    uploader = Uploader(engine, office.url, "T1", gather_delay=0).start()
+    ids = sell(engine, 3)
+    engine.end_shift(background=False)
+    wait_for(lambda: uploader.failures >= 1)
+    uploader.stop()
+    assert uploader.pending() == 4  # three receipts and the shift report
+
+    office.fail_rate = 0.0
+    uploader = Uploader(engine, office.url, "T1", gather_delay=0).start()  # same outbox file
+    try:
+        wait_for(lambda: uploader.pending() == 0)
+    finally:
+        uploader.stop()
+    assert stored_receipts(office) == ids
+    assert len(list((tmp_path / "office" / "reports" / "T1").iterdir())) == 1
+
+
+def test_a_resent_batch_is_stored_once(office, engine):
+    # The server stored the batch but the terminal died before it saw the reply
+    uploader = Uploader(engine, office.url, "T1", gather_delay=0)
+    engine.bind("sale", uploader.on_sale)
+    ids = sell(engine, 2)
+    engine.unbind("sale", uploader.on_sale)
+    uploader.send(uploader.outbox.pending())
+    assert uploader.pending() == 2
+
+    uploader.start()
+    try:
+        wait_for(lambda: uploader.pending() == 0)
+    finally:
+        uploader.stop()
+    assert len(office.batches) == 2 and office.batches[0] == office.batches[1]
+    assert office.store.duplicates == 2
+    assert stored_receipts(office) == ids